@@ -1,4 +1,6 @@
-from flask import Flask, Blueprint
+import time
+
+from flask import Flask, Blueprint, Response, g, request
 from flask_cors import CORS
 from flask_api import status
 from flask_restplus import Api
@@ -10,12 +12,62 @@ from app.api.network_route import network_ns
 from app.api.data_stream_route import data_stream_ns
 from app.api.permission_route import permission_ns
 
+from app.config import Config
+from app.models.data.data_controller import DataController
+from app.models.encoding.response_compressor import ResponseCompressor
+from app.models.encoding.response_encoder import ResponseEncoder
 from app.models.exception.multichain_error import MultiChainError
+from app.models.exception.node_busy_error import NodeBusyError
+from app.models.exception.node_timeout_error import NodeTimeoutError
+from app.models.monitor.metrics import (
+    CONTENT_TYPE,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_RESPONSE_SIZE,
+    registry,
+)
 
 app = Flask(__name__)
 CORS(app)
 
+
+@app.route("/metrics")
+def get_metrics():
+    """
+    Returns the metrics of this process in the Prometheus text format
+    """
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.monotonic()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    HTTP_REQUEST_DURATION.observe(
+        route,
+        request.method,
+        str(response.status_code),
+        value=time.monotonic() - g.request_started,
+    )
+    # Streamed responses have no length until they have been sent
+    #
+    if response.content_length is not None:
+        HTTP_RESPONSE_SIZE.observe(route, value=response.content_length)
+    return response
+
+
+@app.teardown_request
+def end_request(error):
+    HTTP_REQUESTS_IN_FLIGHT.dec()
+
+
 blueprint = Blueprint("api", __name__, url_prefix="/api")
+blueprint.after_request(ResponseCompressor.compress_response)
 
 api = Api(
     blueprint,
@@ -24,6 +76,10 @@ api = Api(
     description="A configurable platform for developing and deploying blockchains",
 )
 
+api.representation(ResponseEncoder.JSON_MIMETYPE)(ResponseEncoder.output_json)
+for namespace in (data_ns, data_stream_ns, permission_ns):
+    ResponseEncoder.accept_msgpack(namespace)
+
 api.add_namespace(config_ns)
 api.add_namespace(data_ns)
 api.add_namespace(node_ns)
@@ -34,16 +90,40 @@ api.add_namespace(permission_ns)
 app.register_blueprint(blueprint)
 
 
-@api.errorhandler(Exception)
-def handle_root_exception(error):
-    return {"error": {"message": str(error)}}, status.HTTP_400_BAD_REQUEST
+def start_stream_index():
+    """
+    Starts the stream indexer in this process, unless the index is disabled or
+    runs in its own process. It isn't started on import, since app.server
+    imports the app in the gunicorn master before forking the workers, and a
+    thread running while forking could leave its locks held in the workers.
+    """
+    if Config.STREAM_INDEX_ENABLED and not Config.STREAM_INDEX_EXTERNAL:
+        DataController.get_stream_index().start()
 
 
-@api.errorhandler(ValueError)
-def handle_value_exception(error):
-    return {"error": {"message": str(error)}}, status.HTTP_400_BAD_REQUEST
+# flask_restplus uses the first registered handler that matches the error, so
+# handlers are registered from the most to the least specific exception
+#
+@api.errorhandler(NodeTimeoutError)
+def handle_node_timeout_exception(error):
+    return error.get_info(), status.HTTP_504_GATEWAY_TIMEOUT
+
+
+@api.errorhandler(NodeBusyError)
+def handle_node_busy_exception(error):
+    return error.get_info(), status.HTTP_503_SERVICE_UNAVAILABLE
 
 
 @api.errorhandler(MultiChainError)
 def handle_multichain_exception(error):
     return error.get_info(), status.HTTP_400_BAD_REQUEST
+
+
+@api.errorhandler(ValueError)
+def handle_value_exception(error):
+    return {"error": {"message": str(error)}}, status.HTTP_400_BAD_REQUEST
+
+
+@api.errorhandler(Exception)
+def handle_root_exception(error):
+    return {"error": {"message": str(error)}}, status.HTTP_400_BAD_REQUEST
@@ -1,9 +1,21 @@
-from flask import Flask, request, jsonify, Blueprint
+from flask import (
+    Flask,
+    request,
+    jsonify,
+    Blueprint,
+    Response,
+    stream_with_context,
+)
 from flask_api import status
+from app.config import Config
 from app.models.data.data_controller import DataController
+from app.models.data.encrypted_data_controller import EncryptedDataController
+from app.models.data.entity_tag import EntityTag
+from app.models.encoding.response_encoder import ResponseEncoder
 from app.models.exception.multichain_error import MultiChainError
 import json
 from flask_restplus import Namespace, Resource, reqparse, inputs, fields
+from werkzeug.datastructures import FileStorage
 
 
 VERBOSE_FIELD_NAME = "verbose"
@@ -11,12 +23,32 @@ COUNT_FIELD_NAME = "count"
 START_FIELD_NAME = "start"
 BLOCKCHAIN_NAME_FIELD_NAME = "blockchainName"
 STREAM_NAME_FIELD_NAME = "streamName"
+STREAM_NAMES_FIELD_NAME = "streamNames"
 DATA_FIELD_NAME = "data"
 LOCAL_ORDERING_FIELD_NAME = "localOrdering"
 PUBLISHER_FIELD_NAME = "publisher"
 PUBLISHERS_FIELD_NAME = "publishers"
 KEY_FIELD_NAME = "key"
 KEYS_FIELD_NAME = "keys"
+ITEMS_FIELD_NAME = "items"
+CURSOR_FIELD_NAME = "cursor"
+ITEM_FIELD_NAME = "item"
+MATCH_ALL_FIELD_NAME = "matchAll"
+TIMEOUT_FIELD_NAME = "timeout"
+LIMIT_FIELD_NAME = "limit"
+FROM_FIELD_NAME = "from"
+TO_FIELD_NAME = "to"
+PREFIX_FIELD_NAME = "prefix"
+PUBLIC_KEYS_FIELD_NAME = "publicKeys"
+PRIVATE_KEY_FIELD_NAME = "privateKey"
+KEY_STREAM_FIELD_NAME = "keyStream"
+FILE_FIELD_NAME = "file"
+TXID_FIELD_NAME = "txid"
+NEXT_CURSOR_FIELD_NAME = "nextCursor"
+LAST_EVENT_ID_HEADER = "Last-Event-ID"
+NDJSON_MIMETYPE = "application/x-ndjson"
+OCTET_STREAM_MIMETYPE = "application/octet-stream"
+EVENT_STREAM_MIMETYPE = "text/event-stream"
 
 data_ns = Namespace("data", description="Data API")
 
@@ -110,10 +142,381 @@ class PublishItem(Resource):
         return {"status": "Data published!"}, status.HTTP_200_OK
 
 
+publish_items_entry_model = data_ns.model(
+    "Publish Items Entry",
+    {
+        STREAM_NAME_FIELD_NAME: fields.String(
+            required=True, description="The stream name"
+        ),
+        KEYS_FIELD_NAME: fields.List(
+            fields.String, required=True, description="a list of keys for the data"
+        ),
+        DATA_FIELD_NAME: fields.String(
+            required=True, description="the data to be stored"
+        ),
+    },
+)
+
+publish_items_model = data_ns.model(
+    "Publish Items",
+    {
+        BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
+            required=True, description="The blockchain name"
+        ),
+        ITEMS_FIELD_NAME: fields.List(
+            fields.Nested(publish_items_entry_model),
+            required=True,
+            description="the items to be published in a single transaction",
+        ),
+    },
+)
+
+
+@data_ns.route("/publish_items")
+class PublishItems(Resource):
+    @data_ns.expect(publish_items_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Publishes several items, possibly to different streams, in a single transaction.
+        """
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        items = data_ns.payload[ITEMS_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not items:
+            raise ValueError("The list of items can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        transaction_id = DataController.publish_items(
+            blockchain_name,
+            [
+                {
+                    "stream": item[STREAM_NAME_FIELD_NAME],
+                    "keys": item[KEYS_FIELD_NAME],
+                    "data": item[DATA_FIELD_NAME],
+                }
+                for item in items
+            ],
+        )
+        return (
+            {"status": "Data published!", "transactionID": transaction_id},
+            status.HTTP_200_OK,
+        )
+
+
+publish_encrypted_model = data_ns.inherit(
+    "Publish Encrypted Item",
+    publish_item_model,
+    {
+        PUBLIC_KEYS_FIELD_NAME: fields.List(
+            fields.String,
+            required=True,
+            description="the base64 encoded public keys of the users that can read the data",
+        ),
+        PRIVATE_KEY_FIELD_NAME: fields.String(
+            required=False,
+            description="the base64 encoded private key of the publisher, to also encrypt the data for the publisher",
+        ),
+        KEY_STREAM_FIELD_NAME: fields.String(
+            required=False,
+            description="the stream the group key of the recipients is published in, to encrypt the data with it",
+        ),
+    },
+)
+
+
+@data_ns.route("/publish_encrypted")
+class PublishEncrypted(Resource):
+    @data_ns.expect(publish_encrypted_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Publishes an item to a stream with its data encrypted for each of the public keys.
+        """
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        keys = data_ns.payload[KEYS_FIELD_NAME]
+        data = data_ns.payload[DATA_FIELD_NAME]
+        public_keys = data_ns.payload[PUBLIC_KEYS_FIELD_NAME]
+        private_key = data_ns.payload.get(PRIVATE_KEY_FIELD_NAME)
+        key_stream = data_ns.payload.get(KEY_STREAM_FIELD_NAME)
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not keys:
+            raise ValueError("The list of keys can't be empty!")
+
+        if not data:
+            raise ValueError("The data can't be empty!")
+
+        if not public_keys:
+            raise ValueError("The list of public keys can't be empty!")
+
+        if key_stream is not None and not key_stream.strip():
+            raise ValueError("The key stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+
+        EncryptedDataController.publish_encrypted_item(
+            blockchain_name,
+            stream_name,
+            keys,
+            data,
+            public_keys,
+            private_key,
+            key_stream,
+        )
+        return {"status": "Data published!"}, status.HTTP_200_OK
+
+
+decrypted_items_model = data_ns.model(
+    "Get Decrypted Items",
+    {
+        BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
+            required=True, description="The blockchain name"
+        ),
+        STREAM_NAME_FIELD_NAME: fields.String(
+            required=True, description="The stream name"
+        ),
+        PRIVATE_KEY_FIELD_NAME: fields.String(
+            required=True,
+            description="the base64 encoded private key of the reader of the data",
+        ),
+        KEY_FIELD_NAME: fields.String(
+            required=False,
+            description="only retrieve the items of this key, like get_items_by_key",
+        ),
+        VERBOSE_FIELD_NAME: fields.Boolean(
+            default=DataController.DEFAULT_VERBOSE_VALUE,
+            description="Set verbose to true for additional information about each item’s transaction",
+        ),
+        COUNT_FIELD_NAME: fields.Integer(
+            default=DataController.DEFAULT_ITEM_COUNT_VALUE,
+            description="retrieve part of the list only ex. only 5 items",
+        ),
+        START_FIELD_NAME: fields.Integer(
+            default=DataController.DEFAULT_ITEM_START_VALUE,
+            description="deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        ),
+        LOCAL_ORDERING_FIELD_NAME: fields.Boolean(
+            default=DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+            description="Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        ),
+    },
+)
+
+
+@data_ns.route("/get_decrypted_items")
+class DecryptedItems(Resource):
+    @data_ns.expect(decrypted_items_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Retrieves items in stream, or those of a key, and decrypts the data of those encrypted for the private key. Items that can't be decrypted get a decryptionError field. The private key is sent in the body rather than the URL so that it isn't logged.
+        """
+        payload = data_ns.payload
+        blockchain_name = payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = payload[STREAM_NAME_FIELD_NAME]
+        private_key = payload[PRIVATE_KEY_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not private_key or not private_key.strip():
+            raise ValueError("The private key can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        json_data = EncryptedDataController.get_decrypted_stream_items(
+            blockchain_name,
+            stream_name,
+            private_key,
+            payload.get(VERBOSE_FIELD_NAME, DataController.DEFAULT_VERBOSE_VALUE),
+            payload.get(COUNT_FIELD_NAME, DataController.DEFAULT_ITEM_COUNT_VALUE),
+            payload.get(START_FIELD_NAME, DataController.DEFAULT_ITEM_START_VALUE),
+            payload.get(
+                LOCAL_ORDERING_FIELD_NAME, DataController.DEFAULT_LOCAL_ORDERING_VALUE
+            ),
+            payload.get(KEY_FIELD_NAME),
+        )
+        return json_data, status.HTTP_200_OK
+
+
+publish_encrypted_file_parser = reqparse.RequestParser(bundle_errors=True)
+publish_encrypted_file_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, type=str, location="form", required=True
+)
+publish_encrypted_file_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="form", required=True
+)
+publish_encrypted_file_parser.add_argument(
+    KEYS_FIELD_NAME, action="append", location="form", required=True
+)
+publish_encrypted_file_parser.add_argument(
+    PUBLIC_KEYS_FIELD_NAME, action="append", location="form", required=True
+)
+publish_encrypted_file_parser.add_argument(
+    PRIVATE_KEY_FIELD_NAME, type=str, location="form"
+)
+publish_encrypted_file_parser.add_argument(
+    FILE_FIELD_NAME, type=FileStorage, location="files", required=True
+)
+
+
+@data_ns.route("/publish_encrypted_file")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys of the item",
+        PUBLIC_KEYS_FIELD_NAME: "the base64 encoded public keys of the users that can read the file",
+        PRIVATE_KEY_FIELD_NAME: "the base64 encoded private key of the publisher, to also encrypt the file for the publisher",
+        FILE_FIELD_NAME: "the file to encrypt",
+    }
+)
+class PublishEncryptedFile(Resource):
+    @data_ns.expect(publish_encrypted_file_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Publishes a file as an off-chain item, encrypted in chunks for each of the public keys, without holding it in memory.
+        """
+        args = publish_encrypted_file_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        keys = args[KEYS_FIELD_NAME]
+        public_keys = args[PUBLIC_KEYS_FIELD_NAME]
+        private_key = args[PRIVATE_KEY_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not keys:
+            raise ValueError("The list of keys can't be empty!")
+
+        if not public_keys:
+            raise ValueError("The list of public keys can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+
+        transaction_id = EncryptedDataController.publish_encrypted_file(
+            blockchain_name,
+            stream_name,
+            keys,
+            args[FILE_FIELD_NAME].stream,
+            public_keys,
+            private_key,
+        )
+        return (
+            {"status": "File published!", "transactionID": transaction_id},
+            status.HTTP_200_OK,
+        )
+
+
+decrypted_file_model = data_ns.model(
+    "Get Decrypted File",
+    {
+        BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
+            required=True, description="The blockchain name"
+        ),
+        STREAM_NAME_FIELD_NAME: fields.String(
+            required=True, description="The stream name"
+        ),
+        TXID_FIELD_NAME: fields.String(
+            required=True,
+            description="the ID of the transaction returned by publish_encrypted_file",
+        ),
+        PRIVATE_KEY_FIELD_NAME: fields.String(
+            required=True,
+            description="the base64 encoded private key of the reader of the file",
+        ),
+    },
+)
+
+
+@data_ns.route("/get_decrypted_file")
+class DecryptedFile(Resource):
+    @data_ns.expect(decrypted_file_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Streams a file published by publish_encrypted_file, decrypted a chunk at a time with the private key.
+        """
+        payload = data_ns.payload
+        blockchain_name = payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = payload[STREAM_NAME_FIELD_NAME]
+        txid = payload[TXID_FIELD_NAME]
+        private_key = payload[PRIVATE_KEY_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not txid or not txid.strip():
+            raise ValueError("The transaction ID can't be empty!")
+
+        if not private_key or not private_key.strip():
+            raise ValueError("The private key can't be empty!")
+
+        chunks = EncryptedDataController.get_decrypted_file(
+            blockchain_name.strip(), stream_name.strip(), txid.strip(), private_key
+        )
+
+        # The status line has already been sent when a later chunk fails to
+        # decrypt, so the response is cut short instead
+        #
+        return Response(stream_with_context(chunks), mimetype=OCTET_STREAM_MIMETYPE)
+
+
 items_key_parser = base_parser.copy()
 items_key_parser.add_argument(
     KEY_FIELD_NAME, type=str, location="args", required=True
 )
+items_key_parser.add_argument(FROM_FIELD_NAME, type=int, location="args")
+items_key_parser.add_argument(TO_FIELD_NAME, type=int, location="args")
 
 
 @data_ns.route("/get_items_by_key")
@@ -126,6 +529,8 @@ items_key_parser.add_argument(
         COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
         START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
         LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        FROM_FIELD_NAME: "only retrieve confirmed items whose blocktime, as a unix timestamp, is at least this value. count and start then select part of the items in the time range",
+        TO_FIELD_NAME: "only retrieve confirmed items whose blocktime, as a unix timestamp, is at most this value. count and start then select part of the items in the time range",
     }
 )
 class ItemByKey(Resource):
@@ -149,6 +554,9 @@ class ItemByKey(Resource):
         count = args[COUNT_FIELD_NAME]
         start = args[START_FIELD_NAME]
         local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+        time_from = args[FROM_FIELD_NAME]
+        time_to = args[TO_FIELD_NAME]
+        is_time_range = time_from is not None or time_to is not None
 
         if blockchain_name is None:
             raise ValueError(
@@ -169,10 +577,11 @@ class ItemByKey(Resource):
                 "The " + KEY_FIELD_NAME + " parameter was not found in the request!"
             )
 
-        verbose = DataController.DEFAULT_VERBOSE_VALUE
-        count = DataController.DEFAULT_ITEM_COUNT_VALUE
-        start = DataController.DEFAULT_ITEM_START_VALUE
-        local_ordering = DataController.DEFAULT_LOCAL_ORDERING_VALUE
+        if not is_time_range:
+            verbose = DataController.DEFAULT_VERBOSE_VALUE
+            count = DataController.DEFAULT_ITEM_COUNT_VALUE
+            start = DataController.DEFAULT_ITEM_START_VALUE
+            local_ordering = DataController.DEFAULT_LOCAL_ORDERING_VALUE
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -183,12 +592,27 @@ class ItemByKey(Resource):
         if not key or not key.strip():
             raise ValueError("The data key can't be empty!")
 
+        if is_time_range and local_ordering:
+            raise ValueError("A time range can't be combined with local ordering!")
+
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
         key = key.strip()
-        json_data = DataController.get_items_by_key(
-            blockchain_name, stream_name, key, verbose, count, start, local_ordering
-        )
+        if is_time_range:
+            json_data = DataController.get_items_by_key_in_range(
+                blockchain_name,
+                stream_name,
+                key,
+                time_from,
+                time_to,
+                verbose,
+                count,
+                start,
+            )
+        else:
+            json_data = DataController.get_items_by_key(
+                blockchain_name, stream_name, key, verbose, count, start, local_ordering
+            )
         return json_data, status.HTTP_200_OK
 
 
@@ -199,6 +623,12 @@ items_keys_parser.add_argument(
 items_keys_parser.remove_argument(START_FIELD_NAME)
 items_keys_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
 items_keys_parser.remove_argument(COUNT_FIELD_NAME)
+items_keys_parser.add_argument(
+    MATCH_ALL_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=DataController.DEFAULT_MATCH_ALL_VALUE,
+)
 
 
 @data_ns.route("/get_items_by_keys")
@@ -208,6 +638,7 @@ items_keys_parser.remove_argument(COUNT_FIELD_NAME)
         STREAM_NAME_FIELD_NAME: "stream name",
         KEYS_FIELD_NAME: "list of keys for the data to be retrieved",
         VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        MATCH_ALL_FIELD_NAME: "Set matchAll to false to retrieve items that match any of the keys instead of all of them",
     }
 )
 class ItemByKeys(Resource):
@@ -228,6 +659,7 @@ class ItemByKeys(Resource):
         stream_name = args[STREAM_NAME_FIELD_NAME]
         keys = args[KEYS_FIELD_NAME]
         verbose = args[VERBOSE_FIELD_NAME]
+        match_all = args[MATCH_ALL_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -241,7 +673,7 @@ class ItemByKeys(Resource):
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
         json_data = DataController.get_items_by_keys(
-            blockchain_name, stream_name, keys, verbose
+            blockchain_name, stream_name, keys, verbose, match_all
         )
         return json_data, status.HTTP_200_OK
 
@@ -253,6 +685,12 @@ items_publishers_parser.add_argument(
 items_publishers_parser.remove_argument(START_FIELD_NAME)
 items_publishers_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
 items_publishers_parser.remove_argument(COUNT_FIELD_NAME)
+items_publishers_parser.add_argument(
+    MATCH_ALL_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=DataController.DEFAULT_MATCH_ALL_VALUE,
+)
 
 
 @data_ns.route("/get_items_by_publishers")
@@ -262,6 +700,7 @@ items_publishers_parser.remove_argument(COUNT_FIELD_NAME)
         STREAM_NAME_FIELD_NAME: "stream name",
         PUBLISHERS_FIELD_NAME: "list of publishers wallet address for the data to be retrieved",
         VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        MATCH_ALL_FIELD_NAME: "Set matchAll to false to retrieve items that match any of the publishers instead of all of them",
     }
 )
 class ItemByPublisher(Resource):
@@ -282,6 +721,7 @@ class ItemByPublisher(Resource):
         stream_name = args[STREAM_NAME_FIELD_NAME]
         publishers = args[PUBLISHERS_FIELD_NAME]
         verbose = args[VERBOSE_FIELD_NAME]
+        match_all = args[MATCH_ALL_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -295,11 +735,136 @@ class ItemByPublisher(Resource):
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
         json_data = DataController.get_items_by_publishers(
-            blockchain_name, stream_name, publishers, verbose
+            blockchain_name, stream_name, publishers, verbose, match_all
         )
         return json_data, status.HTTP_200_OK
 
 
+query_items_parser = items_keys_parser.copy()
+query_items_parser.replace_argument(KEYS_FIELD_NAME, action="append", location="args")
+query_items_parser.add_argument(
+    PUBLISHERS_FIELD_NAME, action="append", location="args"
+)
+
+
+@data_ns.route("/query_items")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys for the data to be retrieved",
+        PUBLISHERS_FIELD_NAME: "list of publishers wallet address for the data to be retrieved",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        MATCH_ALL_FIELD_NAME: "Set matchAll to false to retrieve items that match any of the keys and publishers instead of all of them",
+    }
+)
+class QueryItems(Resource):
+    @data_ns.expect(query_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves items in stream which match all of the specified keys and publishers in query.
+        """
+        args = query_items_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        keys = args[KEYS_FIELD_NAME]
+        publishers = args[PUBLISHERS_FIELD_NAME]
+        verbose = args[VERBOSE_FIELD_NAME]
+        match_all = args[MATCH_ALL_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not keys and not publishers:
+            raise ValueError("The lists of keys and publishers can't both be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        json_data = DataController.query_items(
+            blockchain_name, stream_name, keys, publishers, verbose, match_all
+        )
+        return json_data, status.HTTP_200_OK
+
+
+latest_items_parser = reqparse.RequestParser(bundle_errors=True)
+latest_items_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+latest_items_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+latest_items_parser.add_argument(KEYS_FIELD_NAME, action="append", location="args")
+latest_items_parser.add_argument(
+    PREFIX_FIELD_NAME,
+    type=str,
+    location="args",
+    default=DataController.DEFAULT_KEY_PREFIX_VALUE,
+)
+
+
+@data_ns.route("/latest")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys whose latest item should be retrieved",
+        PREFIX_FIELD_NAME: "if no keys are provided, retrieve the latest item of every key that starts with this prefix",
+    }
+)
+class LatestItems(Resource):
+    @data_ns.expect(latest_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+            status.HTTP_304_NOT_MODIFIED: "NOT MODIFIED",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the latest item of each key of a stream used as a key-value store, as an object of key to item.
+        """
+        args = latest_items_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        keys = args[KEYS_FIELD_NAME]
+        prefix = args[PREFIX_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        etag = EntityTag.get("latest", blockchain_name, stream_name, [keys, prefix])
+        if EntityTag.is_not_modified(etag):
+            return EntityTag.not_modified(etag)
+
+        json_data = DataController.get_latest_items(
+            blockchain_name, stream_name, keys, prefix
+        )
+        return json_data, status.HTTP_200_OK, EntityTag.get_headers(etag)
+
+
+stream_items_parser = base_parser.copy()
+stream_items_parser.add_argument(CURSOR_FIELD_NAME, type=str, location="args")
+stream_items_parser.add_argument(FROM_FIELD_NAME, type=int, location="args")
+stream_items_parser.add_argument(TO_FIELD_NAME, type=int, location="args")
+
+
 @data_ns.route("/get_stream_items")
 @data_ns.doc(
     params={
@@ -309,14 +874,18 @@ class ItemByPublisher(Resource):
         COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
         START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
         LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        CURSOR_FIELD_NAME: "pass * for the first page, then the nextCursor of the previous page, to walk the list in pages of count entries that stay put as items are added. The response is then an object with the page and its nextCursor",
+        FROM_FIELD_NAME: "only retrieve confirmed items whose blocktime, as a unix timestamp, is at least this value. count and start then select part of the items in the time range",
+        TO_FIELD_NAME: "only retrieve confirmed items whose blocktime, as a unix timestamp, is at most this value. count and start then select part of the items in the time range",
     }
 )
 class StreamItem(Resource):
-    @data_ns.expect(base_parser)
+    @data_ns.expect(stream_items_parser)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
             status.HTTP_200_OK: "SUCCESS",
+            status.HTTP_304_NOT_MODIFIED: "NOT MODIFIED",
         }
     )
     def get(self):
@@ -324,7 +893,7 @@ class StreamItem(Resource):
         Retrieves items in stream. 
         """
 
-        args = base_parser.parse_args(strict=True)
+        args = stream_items_parser.parse_args(strict=True)
 
         blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
         stream_name = args[STREAM_NAME_FIELD_NAME]
@@ -332,6 +901,10 @@ class StreamItem(Resource):
         count = args[COUNT_FIELD_NAME]
         start = args[START_FIELD_NAME]
         local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+        cursor = args[CURSOR_FIELD_NAME]
+        time_from = args[FROM_FIELD_NAME]
+        time_to = args[TO_FIELD_NAME]
+        is_time_range = time_from is not None or time_to is not None
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -339,10 +912,321 @@ class StreamItem(Resource):
         if not stream_name or not stream_name.strip():
             raise ValueError("The stream name can't be empty!")
 
+        if is_time_range and cursor is not None:
+            raise ValueError("A time range can't be combined with a cursor!")
+
+        if is_time_range and local_ordering:
+            raise ValueError("A time range can't be combined with local ordering!")
+
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
-        json_data = DataController.get_stream_items(
-            blockchain_name, stream_name, verbose, count, start, local_ordering
+        etag = EntityTag.get(
+            "get_stream_items",
+            blockchain_name,
+            stream_name,
+            [verbose, count, start, local_ordering, cursor, time_from, time_to],
+        )
+        if EntityTag.is_not_modified(etag):
+            return EntityTag.not_modified(etag)
+
+        if is_time_range:
+            json_data = DataController.get_stream_items_in_range(
+                blockchain_name, stream_name, time_from, time_to, verbose, count, start
+            )
+        elif cursor is not None:
+            json_data = DataController.get_stream_items_page(
+                blockchain_name,
+                stream_name,
+                verbose,
+                count,
+                start,
+                local_ordering,
+                cursor,
+            )
+        else:
+            json_data = DataController.get_stream_items(
+                blockchain_name, stream_name, verbose, count, start, local_ordering
+            )
+        return json_data, status.HTTP_200_OK, EntityTag.get_headers(etag)
+
+
+export_stream_parser = base_parser.copy()
+export_stream_parser.remove_argument(COUNT_FIELD_NAME)
+export_stream_parser.remove_argument(START_FIELD_NAME)
+export_stream_parser.add_argument(
+    CURSOR_FIELD_NAME,
+    type=int,
+    location="args",
+    default=DataController.DEFAULT_EXPORT_CURSOR_VALUE,
+)
+
+
+@data_ns.route("/export_stream")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        CURSOR_FIELD_NAME: "position to start exporting from. Use the cursor of the last line received to resume an interrupted export",
+        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+    }
+)
+class ExportStream(Resource):
+    @data_ns.expect(export_stream_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Exports every item in a stream as newline-delimited JSON. Each line holds an item and the cursor to resume from after it.
+        """
+        args = export_stream_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        verbose = args[VERBOSE_FIELD_NAME]
+        cursor = args[CURSOR_FIELD_NAME]
+        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        items = DataController.export_stream_items(
+            blockchain_name, stream_name, verbose, cursor, local_ordering
+        )
+
+        def generate():
+            try:
+                for next_cursor, item in items:
+                    line = {CURSOR_FIELD_NAME: next_cursor, ITEM_FIELD_NAME: item}
+                    yield json.dumps(line) + "\n"
+            except MultiChainError as err:
+                # The status line has already been sent, so the error is reported
+                # as the last line of the export
+                #
+                yield json.dumps(err.get_info()) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+feed_parser = reqparse.RequestParser(bundle_errors=True)
+feed_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+feed_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+feed_parser.add_argument(CURSOR_FIELD_NAME, type=int, location="args")
+feed_parser.add_argument(KEY_FIELD_NAME, type=str, location="args")
+feed_parser.add_argument(PUBLISHER_FIELD_NAME, type=str, location="args")
+
+
+def parse_feed_args(parser):
+    args = parser.parse_args(strict=True)
+
+    blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+    stream_name = args[STREAM_NAME_FIELD_NAME]
+
+    if not blockchain_name or not blockchain_name.strip():
+        raise ValueError("The blockchain name can't be empty!")
+
+    if not stream_name or not stream_name.strip():
+        raise ValueError("The stream name can't be empty!")
+
+    return args
+
+
+@data_ns.route("/subscribe_items")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        CURSOR_FIELD_NAME: "position to start from, by default only items added from now on are sent. A reconnecting EventSource resumes from its Last-Event-ID instead",
+        KEY_FIELD_NAME: "only send items with this key",
+        PUBLISHER_FIELD_NAME: "only send items from this publisher",
+    }
+)
+class SubscribeItems(Resource):
+    @data_ns.expect(feed_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Pushes new items of a stream as Server-Sent Events. The id of each event is the cursor to resume from after the item.
+        """
+        args = parse_feed_args(feed_parser)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME].strip()
+        stream_name = args[STREAM_NAME_FIELD_NAME].strip()
+        key = args[KEY_FIELD_NAME]
+        publisher = args[PUBLISHER_FIELD_NAME]
+        cursor = args[CURSOR_FIELD_NAME]
+        if request.headers.get(LAST_EVENT_ID_HEADER, "").isdigit():
+            cursor = int(request.headers[LAST_EVENT_ID_HEADER])
+
+        # Reading what is already there before the response starts lets errors,
+        # such as an unknown stream, be answered with an error status
+        #
+        cursor, items = DataController.wait_for_stream_items(
+            blockchain_name, stream_name, cursor, 0, key, publisher
+        )
+
+        def generate(cursor, items):
+            try:
+                while True:
+                    for item_cursor, item in items:
+                        yield (
+                            "id: "
+                            + str(item_cursor)
+                            + "\ndata: "
+                            + ResponseEncoder.dumps_json(item).decode()
+                            + "\n\n"
+                        )
+                    if not items:
+                        yield ": keep-alive\n\n"
+                    cursor, items = DataController.wait_for_stream_items(
+                        blockchain_name,
+                        stream_name,
+                        cursor,
+                        Config.STREAM_FEED_HEARTBEAT_MS / 1000.0,
+                        key,
+                        publisher,
+                    )
+            except MultiChainError as err:
+                yield (
+                    "event: error\ndata: "
+                    + ResponseEncoder.dumps_json(err.get_info()).decode()
+                    + "\n\n"
+                )
+
+        return Response(
+            stream_with_context(generate(cursor, items)),
+            mimetype=EVENT_STREAM_MIMETYPE,
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+poll_items_parser = feed_parser.copy()
+poll_items_parser.add_argument(
+    TIMEOUT_FIELD_NAME,
+    type=float,
+    location="args",
+    default=DataController.DEFAULT_WAIT_TIMEOUT_VALUE,
+)
+
+
+@data_ns.route("/poll_items")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        CURSOR_FIELD_NAME: "position to start from, usually the nextCursor of the previous response. By default only items added from now on are returned",
+        KEY_FIELD_NAME: "only return items with this key",
+        PUBLISHER_FIELD_NAME: "only return items from this publisher",
+        TIMEOUT_FIELD_NAME: "seconds to wait for new items before returning an empty list",
+    }
+)
+class PollItems(Resource):
+    @data_ns.expect(poll_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Returns the items added to a stream after cursor, waiting up to timeout seconds for one to appear
+        """
+        args = parse_feed_args(poll_items_parser)
+
+        next_cursor, items = DataController.wait_for_stream_items(
+            args[BLOCKCHAIN_NAME_FIELD_NAME].strip(),
+            args[STREAM_NAME_FIELD_NAME].strip(),
+            args[CURSOR_FIELD_NAME],
+            args[TIMEOUT_FIELD_NAME],
+            args[KEY_FIELD_NAME],
+            args[PUBLISHER_FIELD_NAME],
+        )
+        return (
+            {
+                ITEMS_FIELD_NAME: [item for item_cursor, item in items],
+                NEXT_CURSOR_FIELD_NAME: next_cursor,
+            },
+            status.HTTP_200_OK,
+        )
+
+
+changes_parser = reqparse.RequestParser(bundle_errors=True)
+changes_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+changes_parser.add_argument(
+    STREAM_NAMES_FIELD_NAME, action="append", location="args", required=True
+)
+changes_parser.add_argument(CURSOR_FIELD_NAME, type=str, location="args")
+changes_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=DataController.DEFAULT_CHANGES_LIMIT_VALUE,
+)
+changes_parser.add_argument(
+    VERBOSE_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=DataController.DEFAULT_VERBOSE_VALUE,
+)
+
+
+@data_ns.route("/changes")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAMES_FIELD_NAME: "names of the streams to read changes from",
+        CURSOR_FIELD_NAME: "the nextCursor of the previous response. Without it every item of the streams is returned, from the oldest",
+        LIMIT_FIELD_NAME: "maximum number of items to return, shared between the streams",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+    }
+)
+class Changes(Resource):
+    @data_ns.expect(changes_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Returns the items added to streams since cursor, each with the name of its stream, along with the cursor to resume from and whether more items are waiting
+        """
+        args = changes_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_names = args[STREAM_NAMES_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        json_data = DataController.get_changes(
+            blockchain_name.strip(),
+            stream_names,
+            args[CURSOR_FIELD_NAME],
+            args[LIMIT_FIELD_NAME],
+            args[VERBOSE_FIELD_NAME],
         )
         return json_data, status.HTTP_200_OK
 
@@ -351,6 +1235,9 @@ stream_publishers_parser = base_parser.copy()
 stream_publishers_parser.add_argument(
     PUBLISHERS_FIELD_NAME, action="append", location="args"
 )
+stream_publishers_parser.add_argument(
+    CURSOR_FIELD_NAME, type=str, location="args"
+)
 
 
 @data_ns.route("/get_stream_publishers")
@@ -363,6 +1250,7 @@ stream_publishers_parser.add_argument(
         COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
         START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
         LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        CURSOR_FIELD_NAME: "pass * for the first page, then the nextCursor of the previous page, to walk the list in pages of count entries that stay put as items are added. The response is then an object with the page and its nextCursor",
     }
 )
 class StreamPublisher(Resource):
@@ -386,6 +1274,7 @@ class StreamPublisher(Resource):
         count = args[COUNT_FIELD_NAME]
         start = args[START_FIELD_NAME]
         local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+        cursor = args[CURSOR_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -395,20 +1284,33 @@ class StreamPublisher(Resource):
 
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
-        json_data = DataController.get_stream_publishers(
-            blockchain_name,
-            stream_name,
-            publishers,
-            verbose,
-            count,
-            start,
-            local_ordering,
-        )
+        if cursor is not None:
+            json_data = DataController.get_stream_publishers_page(
+                blockchain_name,
+                stream_name,
+                publishers,
+                verbose,
+                count,
+                start,
+                local_ordering,
+                cursor,
+            )
+        else:
+            json_data = DataController.get_stream_publishers(
+                blockchain_name,
+                stream_name,
+                publishers,
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
         return json_data, status.HTTP_200_OK
 
 
 stream_keys_parser = base_parser.copy()
 stream_keys_parser.add_argument(KEYS_FIELD_NAME, action="append", location="args")
+stream_keys_parser.add_argument(CURSOR_FIELD_NAME, type=str, location="args")
 
 
 @data_ns.route("/get_stream_keys")
@@ -421,6 +1323,7 @@ stream_keys_parser.add_argument(KEYS_FIELD_NAME, action="append", location="args
         COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
         START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
         LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        CURSOR_FIELD_NAME: "pass * for the first page, then the nextCursor of the previous page, to walk the list in pages of count entries that stay put as items are added. The response is then an object with the page and its nextCursor",
     }
 )
 class StreamKey(Resource):
@@ -444,6 +1347,7 @@ class StreamKey(Resource):
         count = args[COUNT_FIELD_NAME]
         start = args[START_FIELD_NAME]
         local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+        cursor = args[CURSOR_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -453,13 +1357,40 @@ class StreamKey(Resource):
 
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
-        json_data = DataController.get_stream_keys(
-            blockchain_name,
-            stream_name,
-            stream_keys,
-            verbose,
-            count,
-            start,
-            local_ordering,
-        )
+        if cursor is not None:
+            json_data = DataController.get_stream_keys_page(
+                blockchain_name,
+                stream_name,
+                stream_keys,
+                verbose,
+                count,
+                start,
+                local_ordering,
+                cursor,
+            )
+        else:
+            json_data = DataController.get_stream_keys(
+                blockchain_name,
+                stream_name,
+                stream_keys,
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
         return json_data, status.HTTP_200_OK
+
+
+@data_ns.route("/cache_stats")
+class CacheStats(Resource):
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Returns the hit and miss counters of the stream query cache per endpoint
+        """
+        return DataController.get_cache_stats(), status.HTTP_200_OK
@@ -1,6 +1,7 @@
 from flask import Flask, request, jsonify, Blueprint
 from flask_api import status
 from app.models.data.data_stream_controller import DataStreamController
+from app.models.data.entity_tag import EntityTag
 from app.models.exception.multichain_error import MultiChainError
 import json
 from flask_restplus import Namespace, Resource, reqparse, inputs, fields
@@ -109,6 +110,7 @@ class GetStream(Resource):
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
             status.HTTP_200_OK: "SUCCESS",
+            status.HTTP_304_NOT_MODIFIED: "NOT MODIFIED",
         }
     )
     def get(self):
@@ -128,10 +130,16 @@ class GetStream(Resource):
             raise ValueError("The blockchain name can't be empty!")
 
         blockchain_name = blockchain_name.strip()
+        etag = EntityTag.get(
+            "get_streams", blockchain_name, None, [streams, verbose, count, start]
+        )
+        if EntityTag.is_not_modified(etag):
+            return EntityTag.not_modified(etag)
+
         json_data = DataStreamController.get_streams(
             blockchain_name, streams, verbose, count, start
         )
-        return json_data, status.HTTP_200_OK
+        return json_data, status.HTTP_200_OK, EntityTag.get_headers(etag)
 
 
 subscribe_stream_model = data_stream_ns.model(
@@ -56,12 +56,9 @@ class GrantGlobalPermission(Resource):
             raise ValueError("The provided blockchain name can't be empty!")
 
         blockchain_name = blockchain_name.strip()
-        output = (
-            PermissionController.grant_global_permission(
-                blockchain_name, addresses, permissions
-            )
-        ).decode("utf-8")
-        output = output[:-1]
+        output = PermissionController.grant_global_permission(
+            blockchain_name, addresses, permissions
+        )
         return {"transactionID": output}, status.HTTP_200_OK
 
 
@@ -102,8 +99,7 @@ class GrantStreamPermission(Resource):
         stream_name = stream_name.strip()
         transaction_id = PermissionController.grant_stream_permission(
             blockchain_name, address, stream_name, permissions
-        ).decode("utf-8")
-        transaction_id = transaction_id[:-1]
+        )
         return {"transactionID": transaction_id}, status.HTTP_200_OK
 
 
@@ -131,8 +127,7 @@ class RevokeGlobalPermission(Resource):
 
         transaction_id = PermissionController.revoke_global_permission(
             blockchain_name, addresses, permissions
-        ).decode("utf-8")
-        transaction_id = transaction_id[:-1]
+        )
 
         return {"transactionID": transaction_id}, status.HTTP_200_OK
 
@@ -166,8 +161,7 @@ class RevokeStreamPermission(Resource):
 
         transaction_id = PermissionController.revoke_stream_permission(
             blockchain_name, address, stream_name, permissions
-        ).decode("utf-8")
-        transaction_id = transaction_id[:-1]
+        )
 
         return {"transactionID": transaction_id}, status.HTTP_200_OK
 
@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+
+ENVIRONMENT_PREFIX = "TALOS_"
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def get_setting(name: str, default, value_type=str):
+    """
+    Returns the value of the TALOS_<name> environment variable converted to
+    the provided type, or the default value if the variable is not set
+    """
+    value = os.environ.get(ENVIRONMENT_PREFIX + name)
+    if value is None:
+        return default
+    if value_type is bool:
+        return value.strip().lower() in TRUE_VALUES
+    return value_type(value)
+
+
+class Config:
+    """
+    Runtime settings of the server. Every setting can be overridden through an
+    environment variable of the same name prefixed with TALOS_, for example
+    TALOS_PUBLISH_MICRO_BATCHING=true
+    """
+
+    # Directory that holds one sub-directory per blockchain, ~/.multichain if empty
+    #
+    MULTICHAIN_DATA_DIR = get_setting("MULTICHAIN_DATA_DIR", "")
+
+    # Merges concurrent publish_item calls into a single publishmulti transaction
+    #
+    PUBLISH_MICRO_BATCHING = get_setting("PUBLISH_MICRO_BATCHING", False, bool)
+    PUBLISH_BATCH_WINDOW_MS = get_setting("PUBLISH_BATCH_WINDOW_MS", 20, int)
+    PUBLISH_BATCH_MAX_ITEMS = get_setting("PUBLISH_BATCH_MAX_ITEMS", 50, int)
+
+    # Number of items read from the node per liststreamitems call when exporting
+    #
+    EXPORT_PAGE_SIZE = get_setting("EXPORT_PAGE_SIZE", 1000, int)
+
+    # Read-through cache in front of the DataController stream queries
+    #
+    STREAM_CACHE_ENABLED = get_setting("STREAM_CACHE_ENABLED", True, bool)
+    STREAM_CACHE_MAX_ENTRIES = get_setting("STREAM_CACHE_MAX_ENTRIES", 1024, int)
+    STREAM_CACHE_CHECK_INTERVAL_MS = get_setting(
+        "STREAM_CACHE_CHECK_INTERVAL_MS", 500, int
+    )
+
+    # Lets identical concurrent stream reads share a single node call
+    #
+    READ_COALESCING_ENABLED = get_setting("READ_COALESCING_ENABLED", True, bool)
+
+    # Local SQLite index answering key and publisher queries of subscribed streams.
+    # Set STREAM_INDEX_EXTERNAL when the indexer runs as its own process
+    # (python -m app.models.index.stream_index) instead of inside a server worker
+    #
+    STREAM_INDEX_ENABLED = get_setting("STREAM_INDEX_ENABLED", False, bool)
+    STREAM_INDEX_EXTERNAL = get_setting("STREAM_INDEX_EXTERNAL", False, bool)
+    STREAM_INDEX_PATH = get_setting("STREAM_INDEX_PATH", "")
+    STREAM_INDEX_POLL_INTERVAL_MS = get_setting(
+        "STREAM_INDEX_POLL_INTERVAL_MS", 1000, int
+    )
+    STREAM_INDEX_PAGE_SIZE = get_setting("STREAM_INDEX_PAGE_SIZE", 500, int)
+
+    # Limits on calls to the node. At most NODE_CALL_MAX_CONCURRENCY calls run at
+    # once on each blockchain (0 disables the limit), and a call that waits longer
+    # than NODE_CALL_QUEUE_TIMEOUT_MS for its turn is rejected. NODE_CALL_TIMEOUT_MS
+    # applies to methods without their own timeout, which NODE_CALL_METHOD_TIMEOUTS
+    # can override, e.g. "liststreamitems=120000,getinfo=2000"
+    #
+    NODE_CALL_MAX_CONCURRENCY = get_setting("NODE_CALL_MAX_CONCURRENCY", 16, int)
+    NODE_CALL_QUEUE_TIMEOUT_MS = get_setting("NODE_CALL_QUEUE_TIMEOUT_MS", 2000, int)
+    NODE_CALL_TIMEOUT_MS = get_setting("NODE_CALL_TIMEOUT_MS", 30000, int)
+    NODE_CALL_METHOD_TIMEOUTS = get_setting("NODE_CALL_METHOD_TIMEOUTS", "")
+
+    # Feed of new stream items behind subscribe_items and poll_items. One watcher
+    # per stream polls the node every STREAM_FEED_POLL_INTERVAL_MS and keeps the
+    # last STREAM_FEED_BUFFER_SIZE items, and stops after STREAM_FEED_IDLE_TIMEOUT_MS
+    # without listeners
+    #
+    STREAM_FEED_POLL_INTERVAL_MS = get_setting("STREAM_FEED_POLL_INTERVAL_MS", 500, int)
+    STREAM_FEED_BUFFER_SIZE = get_setting("STREAM_FEED_BUFFER_SIZE", 1000, int)
+    STREAM_FEED_IDLE_TIMEOUT_MS = get_setting("STREAM_FEED_IDLE_TIMEOUT_MS", 30000, int)
+    STREAM_FEED_HEARTBEAT_MS = get_setting("STREAM_FEED_HEARTBEAT_MS", 15000, int)
+    STREAM_FEED_MAX_WAIT_MS = get_setting("STREAM_FEED_MAX_WAIT_MS", 60000, int)
+
+    # Planner of get_items_by_keys, get_items_by_publishers and query_items when
+    # the stream index can't answer them. Items of a key or publisher are read
+    # QUERY_PLANNER_PAGE_SIZE at a time, by up to QUERY_PLANNER_MAX_CONCURRENCY
+    # concurrent calls for OR queries
+    #
+    QUERY_PLANNER_PAGE_SIZE = get_setting("QUERY_PLANNER_PAGE_SIZE", 1000, int)
+    QUERY_PLANNER_MAX_CONCURRENCY = get_setting("QUERY_PLANNER_MAX_CONCURRENCY", 4, int)
+
+    # Latest items of the keys of a stream. Without the stream index, the keys are
+    # read LATEST_ITEMS_PAGE_SIZE at a time, and a request matching more than
+    # LATEST_ITEMS_MAX_KEYS keys is rejected rather than read as a whole
+    #
+    LATEST_ITEMS_PAGE_SIZE = get_setting("LATEST_ITEMS_PAGE_SIZE", 1000, int)
+    LATEST_ITEMS_MAX_KEYS = get_setting("LATEST_ITEMS_MAX_KEYS", 10000, int)
+
+    # Number of decoded recipient public keys kept by EncrytpionController, so
+    # that encrypted publishes to known recipients skip decoding their keys
+    #
+    ENCRYPTION_KEY_CACHE_SIZE = get_setting("ENCRYPTION_KEY_CACHE_SIZE", 1024, int)
+
+    # Encrypted items are published as compact binary envelopes, raw data keyed
+    # by short fingerprints of the recipients, instead of base64 in JSON. Both
+    # formats are always decrypted.
+    #
+    ENCRYPTION_BINARY_ENVELOPE = get_setting("ENCRYPTION_BINARY_ENVELOPE", True, bool)
+
+    # Files of publish_encrypted_file are encrypted and sent to the node in
+    # chunks of ENCRYPTED_FILE_CHUNK_SIZE bytes, and get_decrypted_file reads and
+    # decrypts them a chunk at a time
+    #
+    ENCRYPTED_FILE_CHUNK_SIZE = get_setting("ENCRYPTED_FILE_CHUNK_SIZE", 1048576, int)
+
+    # Workers decrypting the items of get_decrypted_items in parallel. Pages of
+    # fewer than DECRYPTION_MIN_BATCH_SIZE items are decrypted by the request
+    # thread. Pages holding at least DECRYPTION_PROCESS_MIN_BYTES of encrypted
+    # data can be decrypted by a process pool instead of threads, which is
+    # disabled by default (0)
+    #
+    DECRYPTION_WORKERS = get_setting(
+        "DECRYPTION_WORKERS", multiprocessing.cpu_count(), int
+    )
+    DECRYPTION_MIN_BATCH_SIZE = get_setting("DECRYPTION_MIN_BATCH_SIZE", 16, int)
+    DECRYPTION_PROCESS_MIN_BYTES = get_setting("DECRYPTION_PROCESS_MIN_BYTES", 0, int)
+
+    # Group keys of publish_encrypted with a key stream are replaced after
+    # GROUP_KEY_ROTATION_INTERVAL_MS, 0 to only replace them when the recipients
+    # change. The last GROUP_KEY_CACHE_SIZE keys used to publish, and decrypted
+    # by readers, are kept in memory.
+    #
+    GROUP_KEY_ROTATION_INTERVAL_MS = get_setting(
+        "GROUP_KEY_ROTATION_INTERVAL_MS", 86400000, int
+    )
+    GROUP_KEY_CACHE_SIZE = get_setting("GROUP_KEY_CACHE_SIZE", 1024, int)
+
+    # Strong ETags on get_stream_items and get_streams, checked against the chain
+    # state tracked by the stream cache before the node is queried
+    #
+    ETAGS_ENABLED = get_setting("ETAGS_ENABLED", True, bool)
+
+    # gzip or deflate compression of API responses of at least
+    # COMPRESSION_MIN_SIZE bytes
+    #
+    COMPRESSION_ENABLED = get_setting("COMPRESSION_ENABLED", True, bool)
+    COMPRESSION_MIN_SIZE = get_setting("COMPRESSION_MIN_SIZE", 1024, int)
+    COMPRESSION_LEVEL = get_setting("COMPRESSION_LEVEL", 6, int)
+
+    # JSON library used to encode API responses: orjson, ujson or json, or auto
+    # for the fastest one installed
+    #
+    JSON_ENCODER = get_setting("JSON_ENCODER", "auto")
+
+    # Production WSGI server started with python3 -m app.server
+    #
+    SERVER_BIND = get_setting("SERVER_BIND", "0.0.0.0:5000")
+    SERVER_WORKERS = get_setting(
+        "SERVER_WORKERS", multiprocessing.cpu_count() * 2 + 1, int
+    )
+    SERVER_THREADS = get_setting("SERVER_THREADS", 4, int)
+    SERVER_BACKLOG = get_setting("SERVER_BACKLOG", 2048, int)
+    SERVER_TIMEOUT = get_setting("SERVER_TIMEOUT", 60, int)
+    SERVER_GRACEFUL_TIMEOUT = get_setting("SERVER_GRACEFUL_TIMEOUT", 30, int)
+    SERVER_KEEPALIVE = get_setting("SERVER_KEEPALIVE", 5, int)
+
+    # asyncio gateway started with python3 -m app.gateway
+    #
+    GATEWAY_HOST = get_setting("GATEWAY_HOST", "0.0.0.0")
+    GATEWAY_PORT = get_setting("GATEWAY_PORT", 5001, int)
@@ -0,0 +1,280 @@
+import time
+
+from aiohttp import web
+
+from app.config import Config
+from app.models.client.async_multichain_client import AsyncMultiChainClient
+from app.models.data.async_data_controller import AsyncDataController
+from app.models.data.data_controller import DataController
+from app.models.encoding.response_encoder import ResponseEncoder
+from app.models.exception.multichain_error import MultiChainError
+from app.models.exception.node_busy_error import NodeBusyError
+from app.models.exception.node_timeout_error import NodeTimeoutError
+from app.models.monitor.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_RESPONSE_SIZE,
+    registry,
+)
+
+VERBOSE_FIELD_NAME = "verbose"
+COUNT_FIELD_NAME = "count"
+START_FIELD_NAME = "start"
+BLOCKCHAIN_NAME_FIELD_NAME = "blockchainName"
+STREAM_NAME_FIELD_NAME = "streamName"
+STREAM_NAMES_FIELD_NAME = "streamNames"
+LOCAL_ORDERING_FIELD_NAME = "localOrdering"
+PUBLISHERS_FIELD_NAME = "publishers"
+KEY_FIELD_NAME = "key"
+KEYS_FIELD_NAME = "keys"
+MATCH_ALL_FIELD_NAME = "matchAll"
+CURSOR_FIELD_NAME = "cursor"
+FROM_FIELD_NAME = "from"
+TO_FIELD_NAME = "to"
+TRUE_VALUES = {"true", "1"}
+FALSE_VALUES = {"false", "0"}
+
+
+def get_string(request, name: str):
+    value = request.query.get(name)
+    if value is None:
+        raise ValueError(
+            "The " + name + " parameter was not found in the request!"
+        )
+    return value
+
+
+def get_list(request, name: str, required: bool = True):
+    values = request.query.getall(name, [])
+    if not values and required:
+        raise ValueError(
+            "The " + name + " parameter was not found in the request!"
+        )
+    return values or None
+
+
+def get_boolean(request, name: str, default: bool):
+    value = request.query.get(name)
+    if value is None:
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError("The " + name + " parameter must be a boolean")
+
+
+def get_integer(request, name: str, default: int):
+    value = request.query.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("The " + name + " parameter must be an integer")
+
+
+def reject_unsupported(request, *names):
+    """
+    Raises a ValueError for parameters the Flask API takes but the gateway
+    doesn't support, rather than silently ignoring them
+    """
+    for name in names:
+        if name in request.query:
+            raise ValueError(
+                "The " + name + " parameter is not supported by the gateway!"
+            )
+
+
+def get_verbose(request):
+    return get_boolean(
+        request, VERBOSE_FIELD_NAME, DataController.DEFAULT_VERBOSE_VALUE
+    )
+
+
+def get_paging(request):
+    return (
+        get_verbose(request),
+        get_integer(
+            request, COUNT_FIELD_NAME, DataController.DEFAULT_ITEM_COUNT_VALUE
+        ),
+        get_integer(
+            request, START_FIELD_NAME, DataController.DEFAULT_ITEM_START_VALUE
+        ),
+        get_boolean(
+            request,
+            LOCAL_ORDERING_FIELD_NAME,
+            DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+        ),
+    )
+
+
+async def get_stream_items(request):
+    reject_unsupported(request, CURSOR_FIELD_NAME, FROM_FIELD_NAME, TO_FIELD_NAME)
+    return await AsyncDataController.get_stream_items(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_string(request, STREAM_NAME_FIELD_NAME),
+        *get_paging(request)
+    )
+
+
+async def get_streams_items(request):
+    reject_unsupported(request, CURSOR_FIELD_NAME, FROM_FIELD_NAME, TO_FIELD_NAME)
+    return await AsyncDataController.get_streams_items(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_list(request, STREAM_NAMES_FIELD_NAME),
+        *get_paging(request)
+    )
+
+
+async def get_items_by_key(request):
+    reject_unsupported(request, FROM_FIELD_NAME, TO_FIELD_NAME)
+    return await AsyncDataController.get_items_by_key(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_string(request, STREAM_NAME_FIELD_NAME),
+        get_string(request, KEY_FIELD_NAME),
+        *get_paging(request)
+    )
+
+
+async def get_items_by_keys(request):
+    return await AsyncDataController.get_items_by_keys(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_string(request, STREAM_NAME_FIELD_NAME),
+        get_list(request, KEYS_FIELD_NAME),
+        get_verbose(request),
+        get_boolean(
+            request, MATCH_ALL_FIELD_NAME, DataController.DEFAULT_MATCH_ALL_VALUE
+        ),
+    )
+
+
+async def get_items_by_publishers(request):
+    return await AsyncDataController.get_items_by_publishers(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_string(request, STREAM_NAME_FIELD_NAME),
+        get_list(request, PUBLISHERS_FIELD_NAME),
+        get_verbose(request),
+        get_boolean(
+            request, MATCH_ALL_FIELD_NAME, DataController.DEFAULT_MATCH_ALL_VALUE
+        ),
+    )
+
+
+async def get_stream_keys(request):
+    reject_unsupported(request, CURSOR_FIELD_NAME)
+    return await AsyncDataController.get_stream_keys(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_string(request, STREAM_NAME_FIELD_NAME),
+        get_list(request, KEYS_FIELD_NAME, required=False),
+        *get_paging(request)
+    )
+
+
+async def get_stream_publishers(request):
+    reject_unsupported(request, CURSOR_FIELD_NAME)
+    return await AsyncDataController.get_stream_publishers(
+        get_string(request, BLOCKCHAIN_NAME_FIELD_NAME),
+        get_string(request, STREAM_NAME_FIELD_NAME),
+        get_list(request, PUBLISHERS_FIELD_NAME, required=False),
+        *get_paging(request)
+    )
+
+
+def encoded_response(request, data, status: int = 200):
+    """
+    Returns data encoded as JSON, or as MessagePack if the client prefers it
+    """
+    mimetype = ResponseEncoder.get_mimetype(request.headers.get("Accept"))
+    return web.Response(
+        body=ResponseEncoder.encode(data, mimetype),
+        status=status,
+        content_type=mimetype,
+    )
+
+
+def json_route(handler):
+    """
+    Turns the result of a handler into a JSON or MessagePack response, and errors
+    into the same responses as the Flask API
+    """
+
+    async def route(request):
+        try:
+            return encoded_response(request, await handler(request))
+        except NodeTimeoutError as err:
+            return encoded_response(request, err.get_info(), 504)
+        except NodeBusyError as err:
+            return encoded_response(request, err.get_info(), 503)
+        except MultiChainError as err:
+            return encoded_response(request, err.get_info(), 400)
+        except ValueError as err:
+            return encoded_response(request, {"error": {"message": str(err)}}, 400)
+
+    return route
+
+
+@web.middleware
+async def record_request_metrics(request, handler):
+    """
+    Records the same request metrics as the Flask API
+    """
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.monotonic()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        if response.content_length is not None:
+            HTTP_RESPONSE_SIZE.observe(route, value=response.content_length)
+        return response
+    except web.HTTPException as err:
+        status = err.status
+        raise
+    finally:
+        HTTP_REQUEST_DURATION.observe(
+            route, request.method, str(status), value=time.monotonic() - started
+        )
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+
+
+async def get_metrics(request):
+    return web.Response(text=registry.render(), content_type="text/plain")
+
+
+async def close_client(application):
+    await AsyncMultiChainClient.close()
+
+
+def create_gateway():
+    """
+    Returns the aiohttp application serving the read endpoints of the data API
+    """
+    gateway = web.Application(middlewares=[record_request_metrics])
+    gateway.add_routes(
+        [
+            web.get("/metrics", get_metrics),
+            web.get("/api/data/get_stream_items", json_route(get_stream_items)),
+            web.get("/api/data/get_streams_items", json_route(get_streams_items)),
+            web.get("/api/data/get_items_by_key", json_route(get_items_by_key)),
+            web.get("/api/data/get_items_by_keys", json_route(get_items_by_keys)),
+            web.get(
+                "/api/data/get_items_by_publishers",
+                json_route(get_items_by_publishers),
+            ),
+            web.get("/api/data/get_stream_keys", json_route(get_stream_keys)),
+            web.get(
+                "/api/data/get_stream_publishers", json_route(get_stream_publishers)
+            ),
+        ]
+    )
+    gateway.on_cleanup.append(close_client)
+    return gateway
+
+
+if __name__ == "__main__":
+    web.run_app(
+        create_gateway(), host=Config.GATEWAY_HOST, port=Config.GATEWAY_PORT
+    )
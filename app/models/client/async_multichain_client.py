@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+import json
+
+import aiohttp
+
+from app.models.client.command_executor import CommandExecutor
+from app.models.client.multichain_client import MultiChainClient
+from app.models.exception.multichain_error import MultiChainError
+from app.models.exception.node_timeout_error import NodeTimeoutError
+
+
+class AsyncMultiChainClient:
+    """
+    asyncio counterpart of MultiChainClient. Requests are sent with one aiohttp
+    session per event loop, whose connector opens up to MAX_CONNECTIONS
+    keep-alive connections to the daemons, so a single event loop can keep many
+    node calls in flight at once. The session is closed by close.
+    """
+
+    MAX_CONNECTIONS = 32
+
+    _sessions = {}
+    _request_ids = itertools.count(1)
+
+    @staticmethod
+    async def call(blockchain_name: str, method: str, *params):
+        """
+        Calls a MultiChain JSON-RPC method on the daemon running the provided
+        blockchain and returns the decoded result. Errors, timeouts and call
+        slots are the same as for MultiChainClient.call.
+        """
+        semaphore = await CommandExecutor.acquire_async_slot(
+            blockchain_name, method, list(params)
+        )
+        try:
+            with CommandExecutor.observe(method):
+                response = await AsyncMultiChainClient.__send(
+                    blockchain_name, method, list(params)
+                )
+                if response.get("error") is not None:
+                    raise MultiChainError.from_rpc_error(
+                        response["error"], method, list(params)
+                    )
+                return response.get("result")
+        finally:
+            CommandExecutor.release_async_slot(blockchain_name, semaphore)
+
+    @staticmethod
+    async def close():
+        """
+        Closes the session of the running event loop and its connections
+        """
+        session = AsyncMultiChainClient._sessions.pop(asyncio.get_event_loop(), None)
+        if session is not None:
+            await session.close()
+
+    @staticmethod
+    def __get_session():
+        """
+        Returns the session of the running event loop, creating it on first use
+        """
+        loop = asyncio.get_event_loop()
+        session = AsyncMultiChainClient._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=AsyncMultiChainClient.MAX_CONNECTIONS
+                )
+            )
+            AsyncMultiChainClient._sessions[loop] = session
+        return session
+
+    @staticmethod
+    async def __send(blockchain_name: str, method: str, params: list):
+        timeout = CommandExecutor.get_timeout(method)
+        body = json.dumps(
+            {
+                "method": method,
+                "params": params,
+                "id": next(AsyncMultiChainClient._request_ids),
+                "chain_name": blockchain_name,
+            }
+        ).encode()
+
+        for attempt in range(2):
+            settings = MultiChainClient.get_settings(blockchain_name)
+            try:
+                async with AsyncMultiChainClient.__get_session().post(
+                    "http://%s:%d/" % (settings["host"], settings["port"]),
+                    data=body,
+                    headers={
+                        "Authorization": settings["authorization"],
+                        "Content-Type": "application/json",
+                    },
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                ) as response:
+                    status = response.status
+                    payload = await response.read()
+            except aiohttp.ServerDisconnectedError as err:
+                # A keep-alive connection may have been closed by the daemon in
+                # the meantime. The gateway only reads, so the call can be retried.
+                #
+                if attempt == 0:
+                    continue
+                raise MultiChainError(
+                    "error: couldn't connect to server: " + repr(err)
+                )
+            except asyncio.TimeoutError:
+                CommandExecutor.record_timeout(blockchain_name)
+                raise NodeTimeoutError(method, params, timeout)
+            except (aiohttp.ClientError, OSError) as err:
+                raise MultiChainError(
+                    "error: couldn't connect to server: " + repr(err)
+                )
+
+            if status == 401:
+                MultiChainClient.reset(blockchain_name)
+                if attempt == 0:
+                    continue
+                raise MultiChainError(
+                    "error: incorrect rpcuser or rpcpassword (authorization failed)"
+                )
+
+            try:
+                return json.loads(payload)
+            except ValueError:
+                raise MultiChainError(
+                    "error: server returned HTTP error " + str(status)
+                )
@@ -0,0 +1,355 @@
+import asyncio
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from subprocess import CalledProcessError, CompletedProcess
+
+from app.config import Config
+from app.models.exception.multichain_error import MultiChainError
+from app.models.exception.node_busy_error import NodeBusyError
+from app.models.exception.node_timeout_error import NodeTimeoutError
+from app.models.monitor.metrics import (
+    NODE_CALL_DURATION,
+    NODE_CALL_ERRORS,
+    NODE_CALL_QUEUE_WAIT,
+    NODE_CALLS_IN_FLIGHT,
+    NODE_CALLS_REJECTED,
+)
+
+
+class CommandExecutor:
+    """
+    Single place through which the controllers reach a node, either over
+    JSON-RPC or by running one of the MultiChain binaries. Every call gets the
+    timeout of its method, and at most NODE_CALL_MAX_CONCURRENCY calls run at
+    once on each blockchain. A call that can't get a slot within the queue
+    timeout fails with a NodeBusyError instead of piling up behind the others,
+    and a command that runs past its timeout is killed and reaped.
+    """
+
+    # Seconds a method may take before the call is abandoned. Methods that are
+    # not listed use NODE_CALL_TIMEOUT_MS.
+    #
+    METHOD_TIMEOUTS = {
+        "getbestblockhash": 5,
+        "getblockcount": 5,
+        "liststreams": 10,
+        "liststreamitems": 60,
+        "liststreamkeyitems": 60,
+        "liststreampublisheritems": 60,
+        "liststreamqueryitems": 60,
+        "publishmulti": 60,
+        "subscribe": 300,
+        "multichain-util": 30,
+        "multichaind": 60,
+    }
+
+    _semaphores = {}
+    _async_semaphores = {}
+    _stats = {}
+    _children = []
+    _timeout_overrides = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_timeout(method: str):
+        """
+        Returns the number of seconds a call of the provided method may take
+        """
+        overrides = CommandExecutor.__get_timeout_overrides()
+        if method in overrides:
+            return overrides[method]
+        return CommandExecutor.METHOD_TIMEOUTS.get(
+            method, Config.NODE_CALL_TIMEOUT_MS / 1000.0
+        )
+
+    @staticmethod
+    @contextmanager
+    def slot(blockchain_name: str, method: str, params: list):
+        """
+        Holds one of the call slots of the blockchain for the duration of the
+        with block, waiting at most NODE_CALL_QUEUE_TIMEOUT_MS for it. The call
+        made in the with block is observed as well.
+        """
+        semaphore = CommandExecutor.__get_semaphore(
+            CommandExecutor._semaphores, blockchain_name, threading.BoundedSemaphore
+        )
+        if semaphore is None:
+            with CommandExecutor.observe(method):
+                yield
+            return
+
+        CommandExecutor.__record_queued(blockchain_name)
+        started = time.monotonic()
+        acquired = semaphore.acquire(timeout=Config.NODE_CALL_QUEUE_TIMEOUT_MS / 1000.0)
+        CommandExecutor.__record_wait(
+            blockchain_name, time.monotonic() - started, acquired
+        )
+        if not acquired:
+            raise NodeBusyError(blockchain_name, method, params)
+        try:
+            with CommandExecutor.observe(method):
+                yield
+        finally:
+            semaphore.release()
+            CommandExecutor.__record_release(blockchain_name)
+
+    @staticmethod
+    async def acquire_async_slot(blockchain_name: str, method: str, params: list):
+        """
+        asyncio counterpart of slot. Returns the semaphore to release once the
+        call is done, or None if concurrency isn't limited.
+        """
+        semaphore = CommandExecutor.__get_semaphore(
+            CommandExecutor._async_semaphores, blockchain_name, asyncio.Semaphore
+        )
+        if semaphore is None:
+            return None
+
+        CommandExecutor.__record_queued(blockchain_name)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                semaphore.acquire(), Config.NODE_CALL_QUEUE_TIMEOUT_MS / 1000.0
+            )
+        except asyncio.TimeoutError:
+            CommandExecutor.__record_wait(
+                blockchain_name, time.monotonic() - started, False
+            )
+            raise NodeBusyError(blockchain_name, method, params)
+        CommandExecutor.__record_wait(blockchain_name, time.monotonic() - started, True)
+        return semaphore
+
+    @staticmethod
+    def release_async_slot(blockchain_name: str, semaphore):
+        if semaphore is not None:
+            semaphore.release()
+            CommandExecutor.__record_release(blockchain_name)
+
+    @staticmethod
+    @contextmanager
+    def observe(method: str):
+        """
+        Records the duration and the outcome of the node call or command made in
+        the with block
+        """
+        NODE_CALLS_IN_FLIGHT.inc(method)
+        started = time.monotonic()
+        try:
+            yield
+        except MultiChainError as err:
+            NODE_CALL_ERRORS.inc(
+                method,
+                (
+                    "timeout"
+                    if isinstance(err, NodeTimeoutError)
+                    else err.get_error_code()
+                ),
+            )
+            raise
+        except Exception as err:
+            NODE_CALL_ERRORS.inc(method, type(err).__name__)
+            raise
+        finally:
+            NODE_CALL_DURATION.observe(method, value=time.monotonic() - started)
+            NODE_CALLS_IN_FLIGHT.dec(method)
+
+    @staticmethod
+    def record_timeout(blockchain_name: str):
+        with CommandExecutor._lock:
+            CommandExecutor.__get_stats(blockchain_name)["timeouts"] += 1
+
+    @staticmethod
+    def run(cmd: list, cwd: str = None, timeout: float = None):
+        """
+        Runs a MultiChain command and returns its CompletedProcess. The command
+        and every process it started are killed if it runs past its timeout, in
+        which case a NodeTimeoutError is raised. A CalledProcessError is raised
+        if the command fails.
+        """
+        if timeout is None:
+            timeout = CommandExecutor.get_timeout(os.path.basename(cmd[0]))
+        with CommandExecutor.observe(os.path.basename(cmd[0])):
+            process = CommandExecutor.start(cmd, cwd=cwd, stderr=subprocess.PIPE)
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                CommandExecutor.__kill(process)
+                raise NodeTimeoutError(cmd[0], cmd[1:], timeout)
+            except BaseException:
+                CommandExecutor.__kill(process)
+                raise
+
+            if process.returncode != 0:
+                raise CalledProcessError(process.returncode, cmd, stdout, stderr)
+            return CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    @staticmethod
+    def start(cmd: list, cwd: str = None, stderr=subprocess.STDOUT):
+        """
+        Starts a MultiChain command in its own process group so that it can be
+        killed along with its children
+        """
+        CommandExecutor.__reap_children()
+        return subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            cwd=cwd,
+            start_new_session=True,
+        )
+
+    @staticmethod
+    def read_lines(process, timeout: float = None):
+        """
+        Yields the output lines of a process started with start. The process is
+        killed and a NodeTimeoutError raised if the output doesn't end within the
+        timeout. A process that is still running once the caller stops reading
+        is left alone and reaped after it exits.
+        """
+        if timeout is None:
+            timeout = CommandExecutor.get_timeout(os.path.basename(process.args[0]))
+        deadline = time.monotonic() + timeout
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(process.stdout, selectors.EVENT_READ)
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not selector.select(remaining):
+                        CommandExecutor.__kill(process)
+                        raise NodeTimeoutError(
+                            process.args[0], process.args[1:], timeout
+                        )
+                    line = process.stdout.readline()
+                    if not line:
+                        break
+                    yield line
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                with CommandExecutor._lock:
+                    CommandExecutor._children.append(process)
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns, per blockchain, the number of calls in progress, waiting for a
+        slot, completed, rejected because no slot freed up in time and timed
+        out, along with the total and longest time spent waiting for a slot
+        """
+        with CommandExecutor._lock:
+            return {
+                blockchain_name: dict(stats)
+                for blockchain_name, stats in CommandExecutor._stats.items()
+            }
+
+    @staticmethod
+    def after_fork():
+        """
+        Gives the forked process its own slots, since calls in progress in the
+        parent don't run in the child
+        """
+        CommandExecutor._lock = threading.Lock()
+        CommandExecutor._semaphores = {}
+        CommandExecutor._async_semaphores = {}
+        CommandExecutor._stats = {}
+        CommandExecutor._children = []
+
+    @staticmethod
+    def __get_semaphore(semaphores: dict, blockchain_name: str, semaphore_type):
+        if Config.NODE_CALL_MAX_CONCURRENCY <= 0:
+            return None
+        with CommandExecutor._lock:
+            semaphore = semaphores.get(blockchain_name)
+            if semaphore is None:
+                semaphore = semaphore_type(Config.NODE_CALL_MAX_CONCURRENCY)
+                semaphores[blockchain_name] = semaphore
+            return semaphore
+
+    @staticmethod
+    def __get_stats(blockchain_name: str):
+        """
+        Returns the counters of the blockchain. Must be called with the lock held.
+        """
+        stats = CommandExecutor._stats.get(blockchain_name)
+        if stats is None:
+            stats = {
+                "in_flight": 0,
+                "waiting": 0,
+                "calls": 0,
+                "rejected": 0,
+                "timeouts": 0,
+                "queue_wait_seconds_total": 0.0,
+                "queue_wait_seconds_max": 0.0,
+            }
+            CommandExecutor._stats[blockchain_name] = stats
+        return stats
+
+    @staticmethod
+    def __record_queued(blockchain_name: str):
+        with CommandExecutor._lock:
+            CommandExecutor.__get_stats(blockchain_name)["waiting"] += 1
+
+    @staticmethod
+    def __record_wait(blockchain_name: str, wait: float, acquired: bool):
+        with CommandExecutor._lock:
+            stats = CommandExecutor.__get_stats(blockchain_name)
+            stats["waiting"] -= 1
+            stats["queue_wait_seconds_total"] += wait
+            stats["queue_wait_seconds_max"] = max(stats["queue_wait_seconds_max"], wait)
+            if acquired:
+                stats["in_flight"] += 1
+                stats["calls"] += 1
+            else:
+                stats["rejected"] += 1
+        NODE_CALL_QUEUE_WAIT.observe(blockchain_name, value=wait)
+        if not acquired:
+            NODE_CALLS_REJECTED.inc(blockchain_name)
+
+    @staticmethod
+    def __record_release(blockchain_name: str):
+        with CommandExecutor._lock:
+            CommandExecutor.__get_stats(blockchain_name)["in_flight"] -= 1
+
+    @staticmethod
+    def __get_timeout_overrides():
+        """
+        Parses NODE_CALL_METHOD_TIMEOUTS, e.g. "liststreamitems=120000,getinfo=2000",
+        into seconds per method
+        """
+        if CommandExecutor._timeout_overrides is not None:
+            return CommandExecutor._timeout_overrides
+        overrides = {}
+        for entry in Config.NODE_CALL_METHOD_TIMEOUTS.split(","):
+            method, _, timeout = entry.partition("=")
+            if method.strip() and timeout.strip():
+                overrides[method.strip()] = int(timeout) / 1000.0
+        CommandExecutor._timeout_overrides = overrides
+        return overrides
+
+    @staticmethod
+    def __kill(process):
+        """
+        Kills the process group of a command and waits for the command to exit
+        """
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+        process.wait()
+
+    @staticmethod
+    def __reap_children():
+        """
+        Collects the exit status of commands that were left running by read_lines
+        """
+        with CommandExecutor._lock:
+            CommandExecutor._children = [
+                process
+                for process in CommandExecutor._children
+                if process.poll() is None
+            ]
@@ -0,0 +1,338 @@
+import base64
+import http.client
+import itertools
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+from queue import LifoQueue, Empty, Full
+
+from configobj import ConfigObj
+
+from app.config import Config
+from app.models.client.command_executor import CommandExecutor
+from app.models.client.rpc_response_reader import RpcResponseReader
+from app.models.exception.multichain_error import MultiChainError
+from app.models.exception.node_timeout_error import NodeTimeoutError
+
+
+class MultiChainClient:
+    MULTICHAIN_PATH = ".multichain"
+    CONF_FILE = "multichain.conf"
+    PARAMS_FILE = "params.dat"
+    RPC_USER_ARG = "rpcuser"
+    RPC_PASSWORD_ARG = "rpcpassword"
+    RPC_PORT_ARG = "rpcport"
+    RPC_HOST_ARG = "rpcconnect"
+    DEFAULT_RPC_PORT_ARG = "default-rpc-port"
+    DEFAULT_RPC_HOST = "127.0.0.1"
+    DEFAULT_TIMEOUT = 30
+    MAX_POOL_SIZE = 8
+    CONNECTION_ERRORS = (
+        http.client.RemoteDisconnected,
+        BrokenPipeError,
+        ConnectionResetError,
+    )
+
+    _settings = {}
+    _pools = {}
+    _lock = threading.Lock()
+    _request_ids = itertools.count(1)
+
+    @staticmethod
+    def get_data_dir():
+        """
+        Returns the directory that holds one sub-directory per blockchain,
+        ~/.multichain unless MULTICHAIN_DATA_DIR is set
+        """
+        if Config.MULTICHAIN_DATA_DIR:
+            return Config.MULTICHAIN_DATA_DIR
+        return os.path.join(str(Path.home()), MultiChainClient.MULTICHAIN_PATH)
+
+    @staticmethod
+    def call(blockchain_name: str, method: str, *params):
+        """
+        Calls a MultiChain JSON-RPC method on the daemon running the provided
+        blockchain and returns the decoded result. A MultiChainError is raised
+        when the daemon answers with an error object, a NodeTimeoutError when it
+        doesn't answer within the timeout of the method and a NodeBusyError when
+        too many calls are already in progress on the blockchain.
+        """
+        with CommandExecutor.slot(blockchain_name, method, list(params)):
+            response = MultiChainClient.__send(blockchain_name, method, list(params))
+            if response.get("error") is not None:
+                raise MultiChainError.from_rpc_error(
+                    response["error"], method, list(params)
+                )
+            return response.get("result")
+
+    @staticmethod
+    def reset(blockchain_name: str = None):
+        """
+        Drops cached credentials and pooled connections for a blockchain, or for
+        every blockchain if no name is provided
+        """
+        with MultiChainClient._lock:
+            names = (
+                [blockchain_name]
+                if blockchain_name is not None
+                else list(MultiChainClient._pools)
+            )
+            for name in names:
+                MultiChainClient._settings.pop(name, None)
+                pool = MultiChainClient._pools.pop(name, None)
+                while pool is not None and not pool.empty():
+                    pool.get_nowait().close()
+
+    @staticmethod
+    def after_fork():
+        """
+        Forgets the connections inherited from the parent process without closing
+        them, since the parent may still be using them. The lock is replaced as
+        well because another thread of the parent may have held it while forking.
+        """
+        MultiChainClient._lock = threading.Lock()
+        MultiChainClient._pools = {}
+
+    @staticmethod
+    def iterate(blockchain_name: str, method: str, *params):
+        """
+        Calls a MultiChain JSON-RPC method that returns an array and yields its
+        elements. The elements are decoded as they are read from the connection
+        but only yielded once the whole response has been read and the call
+        slot released, so that a slow consumer doesn't keep the slot. Callers
+        should bound the size of the array, e.g. with a count parameter. Errors
+        are the same as for call.
+        """
+        params = list(params)
+        with CommandExecutor.slot(blockchain_name, method, params):
+            timeout = CommandExecutor.get_timeout(method)
+            connection, response = MultiChainClient.__request(
+                blockchain_name, method, params, timeout
+            )
+            is_consumed = False
+            try:
+                reader = RpcResponseReader(
+                    lambda size: MultiChainClient.__read(
+                        connection, response, size, blockchain_name, method, params
+                    )
+                )
+                try:
+                    elements = list(reader.iterate_result())
+                except ValueError:
+                    raise MultiChainError(
+                        "error: server returned HTTP error " + str(response.status)
+                    )
+                if reader.fields.get("error") is not None:
+                    raise MultiChainError.from_rpc_error(
+                        reader.fields["error"], method, params
+                    )
+                is_consumed = True
+            finally:
+                # A connection whose response wasn't read to the end can't be reused
+                #
+                if is_consumed:
+                    response.read()
+                    MultiChainClient.__release(blockchain_name, connection, response)
+                else:
+                    connection.close()
+
+        yield from elements
+
+    @staticmethod
+    def __send(blockchain_name: str, method: str, params: list):
+        """
+        Sends a request and returns its decoded response
+        """
+        timeout = CommandExecutor.get_timeout(method)
+        connection, response = MultiChainClient.__request(
+            blockchain_name, method, params, timeout
+        )
+        payload = MultiChainClient.__read(
+            connection, response, None, blockchain_name, method, params
+        )
+        MultiChainClient.__release(blockchain_name, connection, response)
+        try:
+            return json.loads(payload)
+        except ValueError:
+            raise MultiChainError(
+                "error: server returned HTTP error " + str(response.status)
+            )
+
+    @staticmethod
+    def __request(blockchain_name: str, method: str, params: list, timeout: float):
+        """
+        Sends a single request over a pooled keep-alive connection and returns the
+        connection along with the response, whose body is left unread. A
+        connection taken from the pool may have been closed by the daemon in the
+        meantime, in which case the request is retried once over a fresh
+        connection.
+        """
+        body = json.dumps(
+            {
+                "method": method,
+                "params": params,
+                "id": next(MultiChainClient._request_ids),
+                "chain_name": blockchain_name,
+            }
+        ).encode()
+
+        for attempt in range(2):
+            settings = MultiChainClient.get_settings(blockchain_name)
+            connection, reused = MultiChainClient.__acquire(blockchain_name, settings)
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            try:
+                connection.request(
+                    "POST",
+                    "/",
+                    body=body,
+                    headers={
+                        "Authorization": settings["authorization"],
+                        "Content-Type": "application/json",
+                    },
+                )
+                response = connection.getresponse()
+            except socket.timeout:
+                connection.close()
+                CommandExecutor.record_timeout(blockchain_name)
+                raise NodeTimeoutError(method, params, timeout)
+            except MultiChainClient.CONNECTION_ERRORS as err:
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise MultiChainError(
+                    "error: couldn't connect to server: " + str(err)
+                )
+            except (OSError, http.client.HTTPException) as err:
+                connection.close()
+                raise MultiChainError(
+                    "error: couldn't connect to server: " + str(err)
+                )
+
+            if response.status == http.client.UNAUTHORIZED:
+                # The chain may have been re-created with new credentials
+                #
+                connection.close()
+                MultiChainClient.reset(blockchain_name)
+                if attempt == 0:
+                    continue
+                raise MultiChainError(
+                    "error: incorrect rpcuser or rpcpassword (authorization failed)"
+                )
+
+            return connection, response
+
+    @staticmethod
+    def __read(
+        connection,
+        response,
+        size: int,
+        blockchain_name: str,
+        method: str,
+        params: list,
+    ):
+        """
+        Reads up to size bytes of the response body, or all of it if size is None
+        """
+        try:
+            return response.read(size)
+        except socket.timeout:
+            # The daemon may still answer later, so the connection can't be reused
+            #
+            connection.close()
+            CommandExecutor.record_timeout(blockchain_name)
+            raise NodeTimeoutError(method, params, connection.timeout)
+        except (OSError, http.client.HTTPException) as err:
+            connection.close()
+            raise MultiChainError("error: couldn't connect to server: " + str(err))
+
+    @staticmethod
+    def __acquire(blockchain_name: str, settings: dict):
+        """
+        Returns an idle connection from the chain's pool, or a new one if the
+        pool is empty, along with whether the connection was reused
+        """
+        pool = MultiChainClient.__get_pool(blockchain_name)
+        try:
+            return pool.get_nowait(), True
+        except Empty:
+            connection = http.client.HTTPConnection(
+                settings["host"],
+                settings["port"],
+                timeout=MultiChainClient.DEFAULT_TIMEOUT,
+            )
+            return connection, False
+
+    @staticmethod
+    def __release(blockchain_name: str, connection, response):
+        """
+        Returns a connection to the chain's pool so it can be reused, unless the
+        daemon asked for it to be closed or the pool is already full
+        """
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            MultiChainClient.__get_pool(blockchain_name).put_nowait(connection)
+        except Full:
+            connection.close()
+
+    @staticmethod
+    def __get_pool(blockchain_name: str):
+        with MultiChainClient._lock:
+            pool = MultiChainClient._pools.get(blockchain_name)
+            if pool is None:
+                pool = LifoQueue(maxsize=MultiChainClient.MAX_POOL_SIZE)
+                MultiChainClient._pools[blockchain_name] = pool
+            return pool
+
+    @staticmethod
+    def get_settings(blockchain_name: str):
+        """
+        Returns the host, port and authorization header used to reach the daemon
+        of the provided blockchain. Credentials are read from multichain.conf and
+        the port falls back to default-rpc-port in params.dat.
+        """
+        with MultiChainClient._lock:
+            settings = MultiChainClient._settings.get(blockchain_name)
+            if settings is not None:
+                return settings
+
+        chain_path = os.path.join(MultiChainClient.get_data_dir(), blockchain_name)
+        conf_path = os.path.join(chain_path, MultiChainClient.CONF_FILE)
+        params_path = os.path.join(chain_path, MultiChainClient.PARAMS_FILE)
+
+        if not os.path.exists(conf_path):
+            raise ValueError(
+                "The configuration for blockchain " + blockchain_name + " was not found"
+            )
+
+        conf = ConfigObj(conf_path)
+        port = conf.get(MultiChainClient.RPC_PORT_ARG)
+        if port is None and os.path.exists(params_path):
+            port = ConfigObj(params_path).get(MultiChainClient.DEFAULT_RPC_PORT_ARG)
+        if port is None:
+            raise ValueError(
+                "The RPC port for blockchain " + blockchain_name + " was not found"
+            )
+
+        credentials = (
+            conf.get(MultiChainClient.RPC_USER_ARG, "")
+            + ":"
+            + conf.get(MultiChainClient.RPC_PASSWORD_ARG, "")
+        )
+        settings = {
+            "host": conf.get(
+                MultiChainClient.RPC_HOST_ARG, MultiChainClient.DEFAULT_RPC_HOST
+            ),
+            "port": int(port),
+            "authorization": "Basic "
+            + base64.b64encode(credentials.encode()).decode(),
+        }
+
+        with MultiChainClient._lock:
+            MultiChainClient._settings[blockchain_name] = settings
+        return settings
@@ -0,0 +1,133 @@
+import codecs
+import json
+
+
+class RpcResponseReader:
+    """
+    Incremental parser for JSON-RPC responses. When the result is an array its
+    elements are decoded one at a time from the underlying stream, so memory use
+    is bounded by the largest element rather than by the whole response. The
+    other members of the response, such as error, are kept in fields.
+    """
+
+    CHUNK_SIZE = 65536
+    WHITESPACE = " \t\r\n"
+    DELIMITERS = WHITESPACE + ",:]}"
+
+    def __init__(self, read):
+        """
+        :param read: function returning up to the requested number of bytes, or
+        an empty bytes object once the stream has ended
+        """
+        self.fields = {}
+        self._read = read
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        self._is_finished = False
+
+    def iterate_result(self):
+        """
+        Yields the elements of the result if it is an array, or the result itself
+        if it is neither an array nor null
+        """
+        self.__expect("{")
+        if self.__peek() == "}":
+            self._position += 1
+            return
+
+        while True:
+            key = self.__decode_value()
+            self.__expect(":")
+            if key == "result" and self.__peek() == "[":
+                self._position += 1
+                yield from self.__iterate_array()
+            else:
+                value = self.__decode_value()
+                self.fields[key] = value
+                if key == "result" and value is not None:
+                    yield value
+
+            separator = self.__peek()
+            self._position += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Malformed JSON-RPC response")
+
+    def __iterate_array(self):
+        if self.__peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield self.__decode_value()
+            separator = self.__peek()
+            self._position += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError("Malformed JSON-RPC result")
+
+    def __decode_value(self):
+        """
+        Decodes the value at the current position. A value is only accepted once
+        the delimiter following it has been read, since a number cut at the end
+        of the buffer, e.g. 1.5 out of 1.5e3, would otherwise decode as another.
+        """
+        self.__peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                if self._is_finished or (
+                    end < len(self._buffer)
+                    and self._buffer[end] in RpcResponseReader.DELIMITERS
+                ):
+                    self._position = end
+                    return value
+            except ValueError:
+                if self._is_finished:
+                    raise
+
+            # Doubling what is buffered keeps the number of failed attempts
+            # logarithmic in the size of the value
+            #
+            self.__fill(max(len(self._buffer) - self._position, 1))
+
+    def __expect(self, character: str):
+        if self.__peek() != character:
+            raise ValueError("Malformed JSON-RPC response")
+        self._position += 1
+
+    def __peek(self):
+        """
+        Skips whitespace and returns the next character, or an empty string if
+        the stream has ended
+        """
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in RpcResponseReader.WHITESPACE
+            ):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._is_finished:
+                return ""
+            self.__fill(1)
+
+    def __fill(self, minimum: int):
+        """
+        Drops the consumed part of the buffer and reads until at least minimum
+        more characters are buffered or the stream has ended
+        """
+        self._buffer = self._buffer[self._position :]
+        self._position = 0
+        target = len(self._buffer) + minimum
+        while len(self._buffer) < target and not self._is_finished:
+            chunk = self._read(max(RpcResponseReader.CHUNK_SIZE, minimum))
+            if not chunk:
+                self._is_finished = True
+                self._buffer += self._text_decoder.decode(b"", final=True)
+            else:
+                self._buffer += self._text_decoder.decode(chunk)
@@ -1,18 +1,15 @@
 import os
+from app.models.client.command_executor import CommandExecutor
+from app.models.client.multichain_client import MultiChainClient
 from app.models.exception.multichain_error import MultiChainError
-import subprocess
 from subprocess import CalledProcessError
 from configobj import ConfigObj
-from pathlib import Path
-from shlex import quote
-import json
 import time
 
 
 class ConfigurationController:
     MULTICHAIN_UTIL_ARG = ['./multichain-util']
     MULTICHAIN_D_ARG = ['./multichaind']
-    MULTICHAIN_CLI_ARG = ['./multichain-cli']
     CREATE_ARG = MULTICHAIN_UTIL_ARG+['create']
     NETWORKINFO_ARG = 'getnetworkinfo'
     DATA_DIR_ARG = "-datadir="
@@ -48,7 +45,7 @@ class ConfigurationController:
         """
         try:
             cmd = ConfigurationController.CREATE_ARG + [blockchain_name]+[ConfigurationController.DATA_DIR_ARG+ConfigurationController.validate_params_path(params_path)]
-            output = subprocess.run(cmd, check=True, capture_output=True, cwd=ConfigurationController.validate_install_path(install_path))
+            output = CommandExecutor.run(cmd, cwd=ConfigurationController.validate_install_path(install_path))
             config = ConfigObj(ConfigurationController.validate_params_path(params_path)+blockchain_name + ConfigurationController.PARAMS_FILE)
             config[ConfigurationController.MINE_EMPTY_ROUNDS] = ConfigurationController.MINE_EMPTY_ROUNDS_VALUE
             config.write()
@@ -103,10 +100,10 @@ class ConfigurationController:
             cmd = ConfigurationController.MULTICHAIN_D_ARG + [blockchain_name, ConfigurationController.MULTICHAIN_DAEMON] + [
                 ConfigurationController.DATA_DIR_ARG + ConfigurationController.validate_params_path(params_path)]
 
-            p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=ConfigurationController.validate_install_path(install_path))
+            p = CommandExecutor.start(cmd, cwd=ConfigurationController.validate_install_path(install_path))
 
             output = []
-            for index,line in enumerate(p.stdout, start=1):
+            for index,line in enumerate(CommandExecutor.read_lines(p), start=1):
                 output.append(line)
                 if (ConfigurationController.GENESIS_BLOCK_FOUND_ARG in str(line)) or (ConfigurationController.RETRIEVING_BLOCKCHAIN_ARG in str(line)):
                     return True
@@ -126,7 +123,7 @@ class ConfigurationController:
         """
         if os.path.exists(path):
             return path
-        return os.path.join(str(Path.home()),ConfigurationController.MULTICHAIN_PATH)
+        return os.path.join(MultiChainClient.get_data_dir(), "")
 
     @staticmethod
     def validate_install_path(path):
@@ -149,15 +146,10 @@ class ConfigurationController:
         """
 
         try:
-            cmd = ConfigurationController.MULTICHAIN_CLI_ARG +[quote(blockchain_name)]+[ConfigurationController.NETWORKINFO_ARG]
-            output = subprocess.run(cmd, check=True, capture_output=True, cwd=ConfigurationController.validate_install_path(install_path))
-            json_output = json.loads(output.stdout.strip())
-            print(type(json_output))
+            json_output = MultiChainClient.call(blockchain_name, ConfigurationController.NETWORKINFO_ARG)
             ip_address = json_output[ConfigurationController.LOCAL_ADDRESSES_ARG][0][ConfigurationController.ADDRESS_ARG]
             val = blockchain_name +'@'+ ip_address+':'+ ConfigurationController.get_config_param(blockchain_name, param=ConfigurationController.DEFAULT_NETWORK_PORT_ARG)
             return val
-        except CalledProcessError as err:
-            raise err.stderr
         except Exception as err:
             raise err
 
@@ -0,0 +1,263 @@
+import asyncio
+
+from app.config import Config
+from app.models.client.async_multichain_client import AsyncMultiChainClient
+from app.models.data.async_query_planner import AsyncQueryPlanner
+from app.models.data.data_controller import DataController
+
+async_query_planner = AsyncQueryPlanner(
+    Config.QUERY_PLANNER_PAGE_SIZE, Config.QUERY_PLANNER_MAX_CONCURRENCY
+)
+
+
+class AsyncDataController:
+    """
+    Async variants of the DataController read methods, used by the asyncio
+    gateway. They take the same arguments and return the same results as their
+    DataController counterparts, but await the node instead of blocking a thread.
+    """
+
+    @staticmethod
+    async def get_stream_items(
+        blockchain_name: str,
+        stream: str,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Retrieves items in stream, passed as a stream name. 
+        See DataController.get_stream_items.
+        """
+        blockchain_name, stream = AsyncDataController.__validate(
+            blockchain_name, stream
+        )
+        return await AsyncMultiChainClient.call(
+            blockchain_name,
+            DataController.GET_STERAM_ITEMS_ARG,
+            stream,
+            verbose,
+            count,
+            start,
+            local_ordering,
+        )
+
+    @staticmethod
+    async def get_streams_items(
+        blockchain_name: str,
+        streams: list,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Retrieves items of several streams concurrently. Returns a dict of stream
+        name to items.
+        """
+        streams = [stream.strip() for stream in streams if stream.strip()]
+        if not streams:
+            raise ValueError("Stream names can't be empty")
+
+        results = await asyncio.gather(
+            *[
+                AsyncDataController.get_stream_items(
+                    blockchain_name, stream, verbose, count, start, local_ordering
+                )
+                for stream in streams
+            ]
+        )
+        return dict(zip(streams, results))
+
+    @staticmethod
+    async def get_items_by_key(
+        blockchain_name: str,
+        stream: str,
+        key: str,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Retrieves items that belong to the specified key from stream. 
+        See DataController.get_items_by_key.
+        """
+        blockchain_name, stream = AsyncDataController.__validate(
+            blockchain_name, stream
+        )
+        key = key.strip()
+        if not key:
+            raise ValueError("key can't be empty")
+
+        return await AsyncMultiChainClient.call(
+            blockchain_name,
+            DataController.GET_STREAM_KEY_ITEMS_ARG,
+            stream,
+            key,
+            verbose,
+            count,
+            start,
+            local_ordering,
+        )
+
+    @staticmethod
+    async def get_items_by_keys(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        match_all: bool = DataController.DEFAULT_MATCH_ALL_VALUE,
+    ):
+        """
+        Retrieves items in stream which match all of the specified keys in query, 
+        or any of them if match_all is false, with the query planner. 
+        See DataController.get_items_by_keys.
+        """
+        blockchain_name, stream = AsyncDataController.__validate(
+            blockchain_name, stream
+        )
+        keys = AsyncDataController.__validate_selectors(keys, "keys")
+
+        return await async_query_planner.query(
+            blockchain_name, stream, keys=keys, match_all=match_all, verbose=verbose
+        )
+
+    @staticmethod
+    async def get_items_by_publishers(
+        blockchain_name: str,
+        stream: str,
+        publishers: list,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        match_all: bool = DataController.DEFAULT_MATCH_ALL_VALUE,
+    ):
+        """
+        Retrieves items in stream which match all of the specified publishers in query, 
+        or any of them if match_all is false, with the query planner. 
+        See DataController.get_items_by_publishers.
+        """
+        blockchain_name, stream = AsyncDataController.__validate(
+            blockchain_name, stream
+        )
+        publishers = AsyncDataController.__validate_selectors(
+            publishers, "publishers"
+        )
+
+        return await async_query_planner.query(
+            blockchain_name,
+            stream,
+            publishers=publishers,
+            match_all=match_all,
+            verbose=verbose,
+        )
+
+    @staticmethod
+    async def get_stream_keys(
+        blockchain_name: str,
+        stream: str,
+        keys: list = DataController.DEFAULT_KEYS_LIST_CONTENT,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Provides information about stream keys that belong to a stream. 
+        See DataController.get_stream_keys.
+        """
+        blockchain_name, stream = AsyncDataController.__validate(
+            blockchain_name, stream
+        )
+        keys_selector = "*"
+        if keys is not None:
+            keys_selector = AsyncDataController.__validate_selectors(keys, "keys")
+
+        return await AsyncMultiChainClient.call(
+            blockchain_name,
+            DataController.GET_STREAM_KEYS_ARG,
+            stream,
+            keys_selector,
+            verbose,
+            count,
+            start,
+            local_ordering,
+        )
+
+    @staticmethod
+    async def get_stream_publishers(
+        blockchain_name: str,
+        stream: str,
+        publishers: list = DataController.DEFAULT_PUBLISHERS_LIST_CONTENT,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Provides information about publishers who have written to stream. 
+        See DataController.get_stream_publishers.
+        """
+        blockchain_name, stream = AsyncDataController.__validate(
+            blockchain_name, stream
+        )
+        address_selector = "*"
+        if publishers is not None:
+            address_selector = AsyncDataController.__validate_selectors(
+                publishers, "publishers"
+            )
+
+        return await AsyncMultiChainClient.call(
+            blockchain_name,
+            DataController.GET_STREAM_PUBLISHERS_ARG,
+            stream,
+            address_selector,
+            verbose,
+            count,
+            start,
+            local_ordering,
+        )
+
+    @staticmethod
+    def __validate(blockchain_name: str, stream: str):
+        """
+        Returns the stripped blockchain and stream names, raising a ValueError if
+        either is empty
+        """
+        blockchain_name = blockchain_name.strip()
+        stream = stream.strip()
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        return blockchain_name, stream
+
+    @staticmethod
+    def __validate_selectors(selectors: list, label: str):
+        """
+        Returns the stripped keys or publishers. Like DataController, a ValueError
+        is raised if any of them is empty rather than silently dropping it.
+        """
+        cleaned_selectors = [
+            selector.strip() for selector in selectors if selector.strip()
+        ]
+        if len(cleaned_selectors) != len(selectors):
+            raise ValueError(
+                "Only "
+                + str(len(cleaned_selectors))
+                + "/"
+                + str(len(selectors))
+                + " "
+                + label
+                + " are valid. Please check the "
+                + label
+                + " provided"
+            )
+
+        if not cleaned_selectors:
+            raise ValueError(label.capitalize() + " can't be empty")
+
+        return cleaned_selectors
@@ -0,0 +1,120 @@
+import asyncio
+
+from app.models.client.async_multichain_client import AsyncMultiChainClient
+from app.models.data.query_planner import QueryPlanner
+
+
+class AsyncQueryPlanner:
+    """
+    asyncio counterpart of QueryPlanner, used by the asyncio gateway. Queries are
+    planned the same way, with the item counts of liststreamkeys and
+    liststreampublishers read concurrently and the items of every key and
+    publisher of an OR query read by up to max_concurrency concurrent calls.
+    """
+
+    def __init__(self, page_size: int, max_concurrency: int):
+        self._page_size = page_size
+        self._max_concurrency = max_concurrency
+
+    async def query(
+        self,
+        blockchain_name: str,
+        stream: str,
+        keys: list = None,
+        publishers: list = None,
+        match_all: bool = True,
+        verbose: bool = True,
+    ):
+        """
+        Returns the items of the stream that have all (or, if match_all is false,
+        any) of the keys and publishers. See QueryPlanner.query.
+        """
+        keys = list(dict.fromkeys(keys or []))
+        publishers = list(dict.fromkeys(publishers or []))
+        selectors = QueryPlanner.get_selectors(keys, publishers)
+        if not selectors:
+            return []
+        if len(selectors) == 1:
+            return await self.__read(blockchain_name, stream, *selectors[0], verbose)
+        if not match_all:
+            return await self.__get_union(blockchain_name, stream, selectors, verbose)
+
+        key_entries, publisher_entries = await asyncio.gather(
+            self.__get_entries(
+                blockchain_name, QueryPlanner.GET_STREAM_KEYS_ARG, stream, keys
+            ),
+            self.__get_entries(
+                blockchain_name,
+                QueryPlanner.GET_STREAM_PUBLISHERS_ARG,
+                stream,
+                publishers,
+            ),
+        )
+        selector = QueryPlanner.get_most_selective(
+            selectors, key_entries, publisher_entries
+        )
+        if selector is None:
+            return []
+
+        return QueryPlanner.filter_items(
+            await self.__read(blockchain_name, stream, *selector, verbose),
+            keys,
+            publishers,
+        )
+
+    async def __get_entries(
+        self, blockchain_name: str, method: str, stream: str, selectors: list
+    ):
+        """
+        Returns the liststreamkeys or liststreampublishers entries of the
+        selectors, without calling the node if there are none
+        """
+        if not selectors:
+            return []
+        return await AsyncMultiChainClient.call(
+            blockchain_name, method, stream, selectors, False
+        )
+
+    async def __get_union(
+        self, blockchain_name: str, stream: str, selectors: list, verbose: bool
+    ):
+        """
+        Reads the items of every selector concurrently and merges them, dropping
+        the items read more than once
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def read(selector):
+            async with semaphore:
+                return await self.__read(blockchain_name, stream, *selector, verbose)
+
+        return QueryPlanner.merge_items(
+            await asyncio.gather(*[read(selector) for selector in selectors])
+        )
+
+    async def __read(
+        self,
+        blockchain_name: str,
+        stream: str,
+        method: str,
+        selector: str,
+        verbose: bool,
+    ):
+        """
+        Returns the items of a key or publisher in chain order, reading them a
+        page at a time so that no single call returns an unbounded response
+        """
+        items = []
+        while True:
+            page = await AsyncMultiChainClient.call(
+                blockchain_name,
+                method,
+                stream,
+                selector,
+                verbose,
+                self._page_size,
+                len(items),
+            )
+            items.extend(page)
+            if len(page) < self._page_size:
+                return items
@@ -1,24 +1,75 @@
-from subprocess import run, CalledProcessError
 import json
+import logging
+import threading
+from app.config import Config
+from app.models.client.multichain_client import MultiChainClient
+from app.models.data.publish_batcher import PublishBatcher
+from app.models.data.query_planner import QueryPlanner
+from app.models.data.single_flight import SingleFlight
+from app.models.data.stream_cache import StreamCache
+from app.models.data.stream_cursor import StreamCursor
+from app.models.data.stream_feed import StreamFeed
 from app.models.exception.multichain_error import MultiChainError
+from app.models.index.stream_index import StreamIndex
+from app.models.monitor.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+stream_cache = StreamCache(
+    Config.STREAM_CACHE_ENABLED,
+    Config.STREAM_CACHE_MAX_ENTRIES,
+    Config.STREAM_CACHE_CHECK_INTERVAL_MS,
+)
+registry.add_collector(stream_cache.collect_metrics)
+single_flight = SingleFlight(Config.READ_COALESCING_ENABLED)
+stream_feed = StreamFeed(
+    Config.STREAM_FEED_POLL_INTERVAL_MS,
+    Config.STREAM_FEED_BUFFER_SIZE,
+    Config.STREAM_FEED_IDLE_TIMEOUT_MS,
+)
+query_planner = QueryPlanner(
+    Config.QUERY_PLANNER_PAGE_SIZE, Config.QUERY_PLANNER_MAX_CONCURRENCY
+)
 
 
 class DataController:
     MAX_DATA_COUNT = 10
-    MULTICHAIN_ARG = "multichain-cli"
     PUBLISH_ITEM_ARG = "publish"
+    PUBLISH_ITEMS_ARG = "publishmulti"
     GET_STREAM_KEY_ITEMS_ARG = "liststreamkeyitems"
     GET_STREAM_KEYS_ITEMS_ARG = "liststreamqueryitems"
     GET_STREAM_KEYS_ARG = "liststreamkeys"
     GET_STERAM_ITEMS_ARG = "liststreamitems"
     GET_STREAM_PUBLISHER_ITEMS_ARG = "liststreampublisheritems"
     GET_STREAM_PUBLISHERS_ARG = "liststreampublishers"
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_ITEM_ARG = "getstreamitem"
+    GET_TX_OUT_DATA_ARG = "gettxoutdata"
+    CREATE_BINARY_CACHE_ARG = "createbinarycache"
+    APPEND_BINARY_CACHE_ARG = "appendbinarycache"
+    DELETE_BINARY_CACHE_ARG = "deletebinarycache"
+    OFFCHAIN_OPTION = "offchain"
+    BINARY_CACHE_FIELD = "cache"
+    CONFIRMED_ITEMS_FIELD = "confirmed"
+    BLOCKTIME_FIELD = "blocktime"
     DEFAULT_VERBOSE_VALUE = True
     DEFAULT_ITEM_COUNT_VALUE = MAX_DATA_COUNT
     DEFAULT_ITEM_START_VALUE = -MAX_DATA_COUNT
     DEFAULT_LOCAL_ORDERING_VALUE = False
     DEFAULT_PUBLISHERS_LIST_CONTENT = None
     DEFAULT_KEYS_LIST_CONTENT = None
+    DEFAULT_KEY_PREFIX_VALUE = ""
+    DEFAULT_EXPORT_CURSOR_VALUE = 0
+    DEFAULT_MATCH_ALL_VALUE = True
+    DEFAULT_WAIT_TIMEOUT_VALUE = 30
+    DEFAULT_CHANGES_LIMIT_VALUE = 1000
+    MAX_CHANGES_LIMIT_VALUE = 10000
+    MAX_ITEM_COUNT_VALUE = 2 ** 31 - 1
+
+    _publish_batcher = None
+    _publish_batcher_lock = threading.Lock()
+    _stream_index = None
+    _stream_index_lock = threading.Lock()
 
     @staticmethod
     def __is_json(data):
@@ -33,68 +84,353 @@ class DataController:
         return True
 
     @staticmethod
-    def publish_item(blockchain_name: str, stream: str, keys: list, data: str):
+    def publish_item(
+        blockchain_name: str, stream: str, keys: list, data: str, raw: bool = False
+    ):
         """
         Publishes an item in stream, passed as a stream name, an array of keys 
-        and data in JSON format.
+        and data in JSON format, or binary data as a hex string if raw is true.
+        If micro-batching is enabled, items published concurrently are merged
+        into a single transaction.
         """
         try:
             blockchain_name = blockchain_name.strip()
-            original_number_of_keys = len(keys)
-            stream = stream.strip()
-            keys = [key.strip() for key in keys if key.strip()]
-            new_number_of_keys = len(keys)
 
-            # If any of the provided keys is invalid then an exception is thrown. This is done to prevent MultiChain from
-            # overwritting records that belong to existing key(s) that match the valid keys.
-            # Example: stream contains KEY1. Provided keys: ['KEY1', '        ']. The second key is invalid, so after cleaning
-            # Provided keys: ['KEY1']. This key already exists so the data will be overwritten.
-            #
-            if new_number_of_keys != original_number_of_keys:
-                raise ValueError(
-                    "Only "
-                    + str(new_number_of_keys)
-                    + "/"
-                    + str(original_number_of_keys)
-                    + " keys are valid. Please check the keys provided"
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            item = DataController.__format_item(stream, keys, data, raw)
+
+            if Config.PUBLISH_MICRO_BATCHING:
+                output = DataController.__get_publish_batcher().submit(
+                    blockchain_name, item
+                )
+            else:
+                output = MultiChainClient.call(
+                    blockchain_name,
+                    DataController.PUBLISH_ITEM_ARG,
+                    item["for"],
+                    item["keys"],
+                    item["data"],
                 )
 
-            if not stream:
-                raise ValueError("Stream name can't be empty")
+            stream_cache.invalidate(blockchain_name, item["for"])
+            return output
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def publish_items(blockchain_name: str, items: list):
+        """
+        Publishes several items in a single transaction. Each item is a dict with
+        a stream name, an array of keys and data in JSON format, which are 
+        validated the same way as in publish_item. 
+        Returns the txid of the transaction.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
 
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            if not keys:
-                raise ValueError("key(s) can't be empty")
+            if not items:
+                raise ValueError("Items can't be empty")
 
-            # This is used to ensure that the json_data provided is a valid JSON object
-            #
-            if not DataController.__is_json(data):
-                data = '"' + data + '"'
+            formatted_items = []
+            for index, item in enumerate(items):
+                try:
+                    formatted_items.append(
+                        DataController.__format_item(
+                            item["stream"], item["keys"], item["data"]
+                        )
+                    )
+                except ValueError as err:
+                    raise ValueError("Item " + str(index) + ": " + str(err))
 
-            json_data = json.loads('{"json":' + data + "}")
-            formatted_data = json.dumps(json_data)
+            output = DataController.__publish_multi(blockchain_name, formatted_items)
 
-            args = [
-                DataController.MULTICHAIN_ARG,
+            for item in formatted_items:
+                stream_cache.invalidate(blockchain_name, item["for"])
+            return output
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def publish_offchain_item(blockchain_name: str, stream: str, keys: list, chunks):
+        """
+        Publishes binary data, given as an iterable of bytes chunks, as an
+        off-chain item in stream. The chunks are appended one at a time to a
+        binary cache of the node, so that the data is never held in memory as a
+        whole, and the item is published from the cache, which is then deleted.
+        Returns the txid of the transaction.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            stream, keys = DataController.__format_keys(stream, keys)
+
+            binary_cache = MultiChainClient.call(
+                blockchain_name, DataController.CREATE_BINARY_CACHE_ARG
+            )
+            try:
+                for chunk in chunks:
+                    MultiChainClient.call(
+                        blockchain_name,
+                        DataController.APPEND_BINARY_CACHE_ARG,
+                        binary_cache,
+                        chunk.hex(),
+                    )
+                output = MultiChainClient.call(
+                    blockchain_name,
+                    DataController.PUBLISH_ITEM_ARG,
+                    stream,
+                    keys,
+                    {DataController.BINARY_CACHE_FIELD: binary_cache},
+                    DataController.OFFCHAIN_OPTION,
+                )
+            finally:
+                # A failed cleanup only leaves a file in the node's cache, so it
+                # mustn't hide the outcome of the publish
+                #
+                try:
+                    MultiChainClient.call(
+                        blockchain_name,
+                        DataController.DELETE_BINARY_CACHE_ARG,
+                        binary_cache,
+                    )
+                except MultiChainError as err:
+                    logger.warning(
+                        "Could not delete binary cache %s on %s: %s",
+                        binary_cache,
+                        blockchain_name,
+                        err,
+                    )
+
+            stream_cache.invalidate(blockchain_name, stream)
+            return output
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_stream_item(
+        blockchain_name: str,
+        stream: str,
+        txid: str,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+    ):
+        """
+        Retrieves the item of stream published in the transaction txid. If its
+        data is larger than the maxshowndata runtime parameter, it is returned as
+        an object whose fields can be used with get_item_data.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+            txid = txid.strip()
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if not txid:
+                raise ValueError("Transaction ID can't be empty")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            return MultiChainClient.call(
                 blockchain_name,
-                DataController.PUBLISH_ITEM_ARG,
+                DataController.GET_STREAM_ITEM_ARG,
                 stream,
-                json.dumps(keys),
-                formatted_data,
-            ]
-            output = run(args, check=True, capture_output=True)
+                txid,
+                verbose,
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_item_data(
+        blockchain_name: str, txid: str, vout: int, count: int = None, start: int = 0
+    ):
+        """
+        Retrieves the data of an item, given the txid and vout MultiChain returns
+        instead of data larger than maxshowndata, or count bytes of it from start
+        if a count is provided. Binary data is returned as a hex string.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            txid = txid.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not txid:
+                raise ValueError("Transaction ID can't be empty")
 
-            return output.stdout.strip()
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            if count is None:
+                return MultiChainClient.call(
+                    blockchain_name, DataController.GET_TX_OUT_DATA_ARG, txid, vout
+                )
+            return MultiChainClient.call(
+                blockchain_name,
+                DataController.GET_TX_OUT_DATA_ARG,
+                txid,
+                vout,
+                count,
+                start,
+            )
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
 
     @staticmethod
+    def get_stream_index():
+        """
+        Returns the local stream index, creating it on first use, or None if the
+        index is disabled
+        """
+        if not Config.STREAM_INDEX_ENABLED:
+            return None
+        with DataController._stream_index_lock:
+            if DataController._stream_index is None:
+                DataController._stream_index = StreamIndex()
+            return DataController._stream_index
+
+    @staticmethod
+    def get_cache_stats():
+        """
+        Returns the hit and miss counters of the stream query cache per endpoint
+        """
+        return stream_cache.get_stats()
+
+    @staticmethod
+    def __get_latest_items_by_prefix(
+        blockchain_name: str, stream: str, prefix: str, limit: int
+    ):
+        """
+        Returns a dict of the latest item of every key of stream that starts with
+        prefix, reading the keys a page at a time and stopping once limit keys
+        have been found
+        """
+        page_size = Config.LATEST_ITEMS_PAGE_SIZE
+        items = {}
+        start = 0
+        while len(items) < limit:
+            entries = MultiChainClient.call(
+                blockchain_name,
+                DataController.GET_STREAM_KEYS_ARG,
+                stream,
+                "*",
+                True,
+                page_size,
+                start,
+            )
+            for entry in entries:
+                if entry.get("last") and entry["key"].startswith(prefix):
+                    items[entry["key"]] = entry["last"]
+            if len(entries) < page_size:
+                break
+            start += len(entries)
+        return items
+
+    @staticmethod
+    def __format_item(stream: str, keys: list, data: str, raw: bool = False):
+        """
+        Validates the stream name, keys and data of an item and returns it in the
+        format expected by publishmulti
+        """
+        stream, keys = DataController.__format_keys(stream, keys)
+
+        # Raw data is published as it is, MultiChain takes binary data as hex
+        #
+        if raw:
+            try:
+                bytes.fromhex(data)
+            except ValueError:
+                raise ValueError("Raw data must be a hex string")
+            return {"for": stream, "keys": keys, "data": data}
+
+        # This is used to ensure that the json_data provided is a valid JSON object
+        #
+        if not DataController.__is_json(data):
+            data = '"' + data + '"'
+
+        json_data = json.loads('{"json":' + data + "}")
+
+        return {"for": stream, "keys": keys, "data": json_data}
+
+    @staticmethod
+    def __format_keys(stream: str, keys: list):
+        """
+        Validates the stream name and keys of an item and returns them stripped
+        """
+        original_number_of_keys = len(keys)
+        stream = stream.strip()
+        keys = [key.strip() for key in keys if key.strip()]
+        new_number_of_keys = len(keys)
+
+        # If any of the provided keys is invalid then an exception is thrown. This is done to prevent MultiChain from
+        # overwritting records that belong to existing key(s) that match the valid keys.
+        # Example: stream contains KEY1. Provided keys: ['KEY1', '        ']. The second key is invalid, so after cleaning
+        # Provided keys: ['KEY1']. This key already exists so the data will be overwritten.
+        #
+        if new_number_of_keys != original_number_of_keys:
+            raise ValueError(
+                "Only "
+                + str(new_number_of_keys)
+                + "/"
+                + str(original_number_of_keys)
+                + " keys are valid. Please check the keys provided"
+            )
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        if not keys:
+            raise ValueError("key(s) can't be empty")
+
+        return stream, keys
+
+    @staticmethod
+    def __publish_multi(blockchain_name: str, items: list):
+        """
+        Publishes already formatted items in a single transaction and returns its txid
+        """
+        return MultiChainClient.call(
+            blockchain_name,
+            DataController.PUBLISH_ITEMS_ARG,
+            items[0]["for"],
+            items,
+        )
+
+    @staticmethod
+    def __get_publish_batcher():
+        """
+        Returns the batcher shared by every publish_item call, creating it on first use
+        """
+        with DataController._publish_batcher_lock:
+            if DataController._publish_batcher is None:
+                DataController._publish_batcher = PublishBatcher(
+                    DataController.__publish_multi,
+                    Config.PUBLISH_BATCH_WINDOW_MS,
+                    Config.PUBLISH_BATCH_MAX_ITEMS,
+                )
+            return DataController._publish_batcher
+
+    @staticmethod
+    @single_flight.coalesced("get_items_by_key")
+    @stream_cache.cached("get_items_by_key")
     def get_items_by_key(
         blockchain_name: str,
         stream: str,
@@ -125,39 +461,90 @@ class DataController:
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            args = [
-                DataController.MULTICHAIN_ARG,
+            items = MultiChainClient.call(
                 blockchain_name,
                 DataController.GET_STREAM_KEY_ITEMS_ARG,
                 stream,
                 key,
-                json.dumps(verbose),
-                json.dumps(count),
-                json.dumps(start),
-                json.dumps(local_ordering),
-            ]
-            items = run(args, check=True, capture_output=True)
-            return json.loads(items.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
+            return items
         except Exception as err:
             raise err
 
     @staticmethod
+    def get_items_by_key_in_range(
+        blockchain_name: str,
+        stream: str,
+        key: str,
+        time_from: int = None,
+        time_to: int = None,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+    ):
+        """
+        Retrieves the confirmed items of key in stream whose blocktime is between
+        time_from and time_to, both included and either of them optional. See
+        get_stream_items_in_range.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+            key = key.strip()
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if not key:
+                raise ValueError("key can't be empty")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            keys = MultiChainClient.call(
+                blockchain_name, DataController.GET_STREAM_KEYS_ARG, stream, key, False
+            )
+            # The node lists no entry for a key that has no items
+            #
+            if not keys:
+                return []
+            return DataController.__get_items_in_range(
+                keys[0],
+                time_from,
+                time_to,
+                count,
+                start,
+                lambda range_count, range_start: DataController.get_items_by_key(
+                    blockchain_name, stream, key, verbose, range_count, range_start
+                ),
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    @single_flight.coalesced("get_items_by_keys")
+    @stream_cache.cached("get_items_by_keys")
     def get_items_by_keys(
         blockchain_name: str,
         stream: str,
         keys: list,
         verbose: bool = DEFAULT_VERBOSE_VALUE,
+        match_all: bool = DEFAULT_MATCH_ALL_VALUE,
     ):
         """
-        Retrieves items in stream which match all of the specified keys in query. 
-        The query is an object with a keys field. The keys field should 
-        specify an array of keys. Note that, unlike other stream retrieval APIs, 
-        liststreamqueryitems cannot rely completely on prior indexing, 
-        so the maxqueryscanitems runtime parameter limits how many 
-        items will be scanned after using the best index. If more than 
-        this is needed, an error will be returned.
+        Retrieves items in stream which match all of the specified keys in query, 
+        or any of them if match_all is false. If the local stream index is enabled 
+        and caught up with the stream, the items are read from it without any scan limit. 
+        Otherwise the query planner reads the items of the key with the fewest 
+        items and filters them locally, or reads the items of every key 
+        concurrently when any of them may match, so that the maxqueryscanitems 
+        runtime parameter of liststreamqueryitems never applies.
         """
         try:
             blockchain_name = blockchain_name.strip()
@@ -189,39 +576,44 @@ class DataController:
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            args = [
-                DataController.MULTICHAIN_ARG,
-                blockchain_name,
-                DataController.GET_STREAM_KEYS_ITEMS_ARG,
-                stream,
-                json.dumps({"keys": keys}),
-                json.dumps(verbose),
-            ]
-            items = run(args, check=True, capture_output=True)
+            stream_index = DataController.get_stream_index()
+            if stream_index is not None:
+                items = stream_index.query(
+                    blockchain_name,
+                    stream,
+                    keys=keys,
+                    match_all=match_all,
+                    verbose=verbose,
+                )
+                if items is not None:
+                    return items
 
-            return json.loads(items.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return query_planner.query(
+                blockchain_name, stream, keys=keys, match_all=match_all, verbose=verbose
+            )
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
 
     @staticmethod
+    @single_flight.coalesced("get_items_by_publishers")
+    @stream_cache.cached("get_items_by_publishers")
     def get_items_by_publishers(
         blockchain_name: str,
         stream: str,
         publishers: list,
         verbose: bool = DEFAULT_VERBOSE_VALUE,
+        match_all: bool = DEFAULT_MATCH_ALL_VALUE,
     ):
         """
-        Retrieves items in stream which match all of the specified publishers in query. 
-        The query is an object with a publishers field. The publishers field should 
-        specify an array of publishers. Note that, unlike other stream retrieval APIs, 
-        liststreamqueryitems cannot rely completely on prior indexing, 
-        so the maxqueryscanitems runtime parameter limits how many 
-        items will be scanned after using the best index. If more than 
-        this is needed, an error will be returned.
+        Retrieves items in stream which match all of the specified publishers in query, 
+        or any of them if match_all is false. If the local stream index is enabled 
+        and caught up with the stream, the items are read from it without any scan limit. 
+        Otherwise the query planner reads the items of the publisher with the fewest 
+        items and filters them locally, or reads the items of every publisher 
+        concurrently when any of them may match, so that the maxqueryscanitems 
+        runtime parameter of liststreamqueryitems never applies.
         """
         try:
             blockchain_name = blockchain_name.strip()
@@ -239,31 +631,186 @@ class DataController:
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            publisher_label = "publishers"
-
-            if len(publishers) == 1:
-                publisher_label = "publisher"
-                publishers = publishers[0]
+            stream_index = DataController.get_stream_index()
+            if stream_index is not None:
+                items = stream_index.query(
+                    blockchain_name,
+                    stream,
+                    publishers=publishers,
+                    match_all=match_all,
+                    verbose=verbose,
+                )
+                if items is not None:
+                    return items
 
-            args = [
-                DataController.MULTICHAIN_ARG,
+            return query_planner.query(
                 blockchain_name,
-                DataController.GET_STREAM_KEYS_ITEMS_ARG,
                 stream,
-                json.dumps({publisher_label: publishers}),
-                json.dumps(verbose),
-            ]
-            items = run(args, check=True, capture_output=True)
+                publishers=publishers,
+                match_all=match_all,
+                verbose=verbose,
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    @single_flight.coalesced("query_items")
+    @stream_cache.cached("query_items")
+    def query_items(
+        blockchain_name: str,
+        stream: str,
+        keys: list = DEFAULT_KEYS_LIST_CONTENT,
+        publishers: list = DEFAULT_PUBLISHERS_LIST_CONTENT,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        match_all: bool = DEFAULT_MATCH_ALL_VALUE,
+    ):
+        """
+        Retrieves items in stream which match all of the specified keys and
+        publishers, or any of them if match_all is false. Like get_items_by_keys,
+        the items are read from the local stream index if it has caught up with
+        the stream, and from the most selective key or publisher otherwise.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+            keys = keys or []
+            publishers = publishers or []
+            selectors = [selector.strip() for selector in keys + publishers]
 
-            return json.loads(items.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if not all(selectors):
+                raise ValueError(
+                    "Only "
+                    + str(len([selector for selector in selectors if selector]))
+                    + "/"
+                    + str(len(selectors))
+                    + " keys and publishers are valid. Please check the keys and publishers provided"
+                )
+
+            if not selectors:
+                raise ValueError("Keys and publishers can't both be empty")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            keys = [key.strip() for key in keys]
+            publishers = [publisher.strip() for publisher in publishers]
+
+            stream_index = DataController.get_stream_index()
+            if stream_index is not None:
+                items = stream_index.query(
+                    blockchain_name,
+                    stream,
+                    keys=keys,
+                    publishers=publishers,
+                    match_all=match_all,
+                    verbose=verbose,
+                )
+                if items is not None:
+                    return items
+
+            return query_planner.query(
+                blockchain_name, stream, keys, publishers, match_all, verbose
+            )
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
 
     @staticmethod
+    @single_flight.coalesced("get_latest_items")
+    @stream_cache.cached("get_latest_items")
+    def get_latest_items(
+        blockchain_name: str,
+        stream: str,
+        keys: list = DEFAULT_KEYS_LIST_CONTENT,
+        prefix: str = DEFAULT_KEY_PREFIX_VALUE,
+    ):
+        """
+        Retrieves the latest item of each of the keys, or of every key of stream
+        that starts with prefix if no keys are provided, for streams used as
+        key-value stores. Returns a dict of key to item, with None for requested
+        keys that have no item. The items are read from the latest items of the
+        local stream index if it has caught up with the stream, and otherwise
+        from a single verbose liststreamkeys call, never with a call per key.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+            prefix = prefix or ""
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if keys is not None:
+                cleaned_keys = list(dict.fromkeys(key.strip() for key in keys))
+                if not all(cleaned_keys):
+                    raise ValueError(
+                        "Only "
+                        + str(len([key for key in cleaned_keys if key]))
+                        + "/"
+                        + str(len(cleaned_keys))
+                        + " keys are valid. Please check the keys provided"
+                    )
+                keys = cleaned_keys
+
+            if keys and prefix:
+                raise ValueError("Keys and a key prefix can't be combined")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            max_keys = Config.LATEST_ITEMS_MAX_KEYS
+            if keys and len(keys) > max_keys:
+                raise ValueError("At most " + str(max_keys) + " keys can be requested")
+
+            items = None
+            stream_index = DataController.get_stream_index()
+            if stream_index is not None:
+                items = stream_index.get_latest_items(
+                    blockchain_name, stream, keys, prefix, max_keys + 1
+                )
+
+            if items is None and keys:
+                entries = MultiChainClient.call(
+                    blockchain_name,
+                    DataController.GET_STREAM_KEYS_ARG,
+                    stream,
+                    keys,
+                    True,
+                )
+                items = {
+                    entry["key"]: entry["last"]
+                    for entry in entries
+                    if entry.get("last")
+                }
+            elif items is None:
+                items = DataController.__get_latest_items_by_prefix(
+                    blockchain_name, stream, prefix, max_keys + 1
+                )
+
+            if len(items) > max_keys:
+                raise ValueError(
+                    "More than "
+                    + str(max_keys)
+                    + " keys match, please provide keys or a longer prefix"
+                )
+
+            if keys:
+                return {key: items.get(key) for key in keys}
+            return {key: items[key] for key in sorted(items)}
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    @single_flight.coalesced("get_stream_items")
+    @stream_cache.cached("get_stream_items")
     def get_stream_items(
         blockchain_name: str,
         stream: str,
@@ -292,27 +839,167 @@ class DataController:
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            args = [
-                DataController.MULTICHAIN_ARG,
+            items = MultiChainClient.call(
                 blockchain_name,
                 DataController.GET_STERAM_ITEMS_ARG,
                 stream,
-                json.dumps(verbose),
-                json.dumps(count),
-                json.dumps(start),
-                json.dumps(local_ordering),
-            ]
-            items = run(args, check=True, capture_output=True)
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
 
-            return json.loads(items.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return items
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
 
     @staticmethod
+    def get_stream_items_in_range(
+        blockchain_name: str,
+        stream: str,
+        time_from: int = None,
+        time_to: int = None,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+    ):
+        """
+        Retrieves the confirmed items of stream whose blocktime is between
+        time_from and time_to, as unix timestamps, both included and either of
+        them optional. count and start select part of the range as they do for
+        get_stream_items, so the default returns its most recent items. The bounds
+        of the range are found by binary search over the blocktime of single
+        items in chain order, so besides the items returned only a logarithmic
+        number of items is read.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            streams = MultiChainClient.call(
+                blockchain_name, DataController.GET_STREAMS_ARG, stream
+            )
+            return DataController.__get_items_in_range(
+                streams[0],
+                time_from,
+                time_to,
+                count,
+                start,
+                lambda range_count, range_start: DataController.get_stream_items(
+                    blockchain_name, stream, verbose, range_count, range_start, False
+                ),
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def wait_for_stream_items(
+        blockchain_name: str,
+        stream: str,
+        cursor: int = None,
+        timeout: float = DEFAULT_WAIT_TIMEOUT_VALUE,
+        key: str = None,
+        publisher: str = None,
+    ):
+        """
+        Waits up to timeout seconds for items to be added to stream after the
+        position given by cursor, or after the last item if no cursor is
+        provided, optionally only those with the key or from the publisher.
+        Returns the cursor to resume from and a list of (cursor, item) tuples.
+        Cursors are positions in local ordering. The stream is read by a single
+        watcher however many clients wait on it.
+        """
+        blockchain_name = blockchain_name.strip()
+        stream = stream.strip()
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if cursor is not None and cursor < 0:
+            raise ValueError("The cursor can't be negative")
+
+        if timeout < 0:
+            raise ValueError("The timeout can't be negative")
+
+        return stream_feed.wait(
+            blockchain_name,
+            stream,
+            cursor,
+            min(timeout, Config.STREAM_FEED_MAX_WAIT_MS / 1000.0),
+            key.strip() if key is not None else None,
+            publisher.strip() if publisher is not None else None,
+        )
+
+    @staticmethod
+    def export_stream_items(
+        blockchain_name: str,
+        stream: str,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        cursor: int = DEFAULT_EXPORT_CURSOR_VALUE,
+        local_ordering: bool = DEFAULT_LOCAL_ORDERING_VALUE,
+        page_size: int = None,
+    ):
+        """
+        Returns a generator over every item in stream from the position given by
+        cursor onwards. Items are read with liststreamitems in pages of page_size
+        items, so at most one page is held in memory at a time, and the node
+        call slot is only held while a page is read, not while it is consumed.
+        Each generated value is a
+        (cursor, item) tuple where cursor is the position to resume from once
+        the item has been consumed.
+        """
+        blockchain_name = blockchain_name.strip()
+        stream = stream.strip()
+        page_size = page_size or Config.EXPORT_PAGE_SIZE
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if cursor < 0:
+            raise ValueError("The cursor can't be negative")
+
+        if page_size <= 0:
+            raise ValueError("The page size must be positive")
+
+        def generate(cursor):
+            while True:
+                item_count = 0
+                for item in MultiChainClient.iterate(
+                    blockchain_name,
+                    DataController.GET_STERAM_ITEMS_ARG,
+                    stream,
+                    verbose,
+                    page_size,
+                    cursor,
+                    local_ordering,
+                ):
+                    item_count += 1
+                    cursor += 1
+                    yield cursor, item
+                if item_count < page_size:
+                    return
+
+        return generate(cursor)
+
+    @staticmethod
+    @single_flight.coalesced("get_stream_publishers")
+    @stream_cache.cached("get_stream_publishers")
     def get_stream_publishers(
         blockchain_name: str,
         stream: str,
@@ -347,30 +1034,28 @@ class DataController:
                 ]
                 if not publishers:
                     raise ValueError("Addresses can't be empty")
-                address_selector = json.dumps(publishers)
+                address_selector = publishers
 
-            args = [
-                DataController.MULTICHAIN_ARG,
+            publishers = MultiChainClient.call(
                 blockchain_name,
                 DataController.GET_STREAM_PUBLISHERS_ARG,
                 stream,
                 address_selector,
-                json.dumps(verbose),
-                json.dumps(count),
-                json.dumps(start),
-                json.dumps(local_ordering),
-            ]
-            publishers = run(args, check=True, capture_output=True)
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
 
-            return json.loads(publishers.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return publishers
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
 
     @staticmethod
+    @single_flight.coalesced("get_stream_keys")
+    @stream_cache.cached("get_stream_keys")
     def get_stream_keys(
         blockchain_name: str,
         stream: str,
@@ -402,25 +1087,376 @@ class DataController:
                 keys = [key.strip() for key in keys if key.strip()]
                 if not keys:
                     raise ValueError("Addresses can't be empty")
-                keys_selector = json.dumps(keys)
+                keys_selector = keys
 
-            args = [
-                DataController.MULTICHAIN_ARG,
+            stream_keys = MultiChainClient.call(
                 blockchain_name,
                 DataController.GET_STREAM_KEYS_ARG,
                 stream,
                 keys_selector,
-                json.dumps(verbose),
-                json.dumps(count),
-                json.dumps(start),
-                json.dumps(local_ordering),
-            ]
-            stream_keys = run(args, check=True, capture_output=True)
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
 
-            return json.loads(stream_keys.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return stream_keys
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
+
+    @staticmethod
+    def get_stream_items_page(
+        blockchain_name: str,
+        stream: str,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DEFAULT_LOCAL_ORDERING_VALUE,
+        cursor: str = None,
+    ):
+        """
+        Returns a page of up to count items of stream along with the cursor of
+        the next page. The first page is chosen by start as in get_stream_items,
+        and the following ones by passing the cursor of the previous page. A
+        negative start walks towards the oldest items, otherwise the walk goes
+        towards the newest ones. Unless local_ordering is set, only confirmed
+        items are walked, since the position of unconfirmed items may change.
+        """
+        return DataController.__get_page(
+            StreamCursor.ITEMS,
+            blockchain_name,
+            stream,
+            None,
+            count,
+            start,
+            local_ordering,
+            cursor,
+            lambda page_count, page_start: DataController.get_stream_items(
+                blockchain_name, stream, verbose, page_count, page_start, local_ordering
+            ),
+        )
+
+    @staticmethod
+    def get_stream_keys_page(
+        blockchain_name: str,
+        stream: str,
+        keys: list = DEFAULT_KEYS_LIST_CONTENT,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DEFAULT_LOCAL_ORDERING_VALUE,
+        cursor: str = None,
+    ):
+        """
+        Returns a page of up to count keys of stream along with the cursor of the
+        next page. See get_stream_items_page for how pages are walked.
+        """
+        return DataController.__get_page(
+            StreamCursor.KEYS,
+            blockchain_name,
+            stream,
+            keys,
+            count,
+            start,
+            local_ordering,
+            cursor,
+            lambda page_count, page_start: DataController.get_stream_keys(
+                blockchain_name,
+                stream,
+                keys,
+                verbose,
+                page_count,
+                page_start,
+                local_ordering,
+            ),
+        )
+
+    @staticmethod
+    def get_stream_publishers_page(
+        blockchain_name: str,
+        stream: str,
+        publishers: list = DEFAULT_PUBLISHERS_LIST_CONTENT,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DEFAULT_LOCAL_ORDERING_VALUE,
+        cursor: str = None,
+    ):
+        """
+        Returns a page of up to count publishers of stream along with the cursor
+        of the next page. See get_stream_items_page for how pages are walked.
+        """
+        return DataController.__get_page(
+            StreamCursor.PUBLISHERS,
+            blockchain_name,
+            stream,
+            publishers,
+            count,
+            start,
+            local_ordering,
+            cursor,
+            lambda page_count, page_start: DataController.get_stream_publishers(
+                blockchain_name,
+                stream,
+                publishers,
+                verbose,
+                page_count,
+                page_start,
+                local_ordering,
+            ),
+        )
+
+    @staticmethod
+    def get_changes(
+        blockchain_name: str,
+        streams: list,
+        cursor: str = None,
+        limit: int = DEFAULT_CHANGES_LIMIT_VALUE,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+    ):
+        """
+        Returns up to limit items added to the streams since cursor, or since
+        their creation if no cursor is provided, along with the cursor to pass
+        next time and whether more items are waiting. Items are read in local
+        ordering, so items that get confirmed later aren't returned twice. A
+        single liststreams call finds the streams that changed, then each of them
+        is read with one liststreamitems call. The limit is shared evenly between
+        the changed streams, and what a stream leaves unused goes to the next.
+        """
+        blockchain_name = blockchain_name.strip()
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        streams = list(dict.fromkeys(stream.strip() for stream in streams or []))
+        if not streams or not all(streams):
+            raise ValueError("Stream names can't be empty")
+
+        if not 0 < limit <= DataController.MAX_CHANGES_LIMIT_VALUE:
+            raise ValueError(
+                "The limit must be between 1 and "
+                + str(DataController.MAX_CHANGES_LIMIT_VALUE)
+            )
+
+        positions = {}
+        if cursor is not None and cursor.strip() not in StreamCursor.START_CURSORS:
+            positions = StreamCursor.decode_positions(cursor.strip(), blockchain_name)
+        for stream in streams:
+            positions.setdefault(stream, 0)
+
+        # Streams the node isn't subscribed to have no item count and are always
+        # read
+        #
+        item_counts = {
+            stream["name"]: stream.get(StreamCursor.ITEMS)
+            for stream in MultiChainClient.call(
+                blockchain_name, DataController.GET_STREAMS_ARG, streams
+            )
+        }
+        changed_streams = [
+            stream
+            for stream in streams
+            if item_counts.get(stream) is None
+            or item_counts[stream] > positions[stream]
+        ]
+
+        changes = []
+        has_more = False
+        for index, stream in enumerate(changed_streams):
+            remaining = limit - len(changes)
+            share = -(-remaining // (len(changed_streams) - index))
+            if share <= 0:
+                has_more = True
+                break
+            items = DataController.get_stream_items(
+                blockchain_name, stream, verbose, share, positions[stream], True
+            )
+            positions[stream] += len(items)
+            changes.extend({"stream": stream, "item": item} for item in items)
+            if item_counts.get(stream) is None:
+                has_more = has_more or len(items) == share
+            else:
+                has_more = has_more or item_counts[stream] > positions[stream]
+
+        return {
+            "items": changes,
+            "nextCursor": StreamCursor.encode_positions(blockchain_name, positions),
+            "hasMore": has_more,
+        }
+
+    @staticmethod
+    def __get_page(
+        kind: str,
+        blockchain_name: str,
+        stream: str,
+        selectors: list,
+        count: int,
+        start: int,
+        local_ordering: bool,
+        cursor: str,
+        read,
+    ):
+        """
+        Reads a page with read(count, start), which is only ever given an absolute
+        start, and returns it with the cursor of the next page. A backward walk
+        ends at position 0, where its next cursor is None. A forward walk always
+        returns a cursor, which yields the entries added after the last page once
+        it has caught up.
+        """
+        blockchain_name = blockchain_name.strip()
+        stream = stream.strip()
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if count <= 0:
+            raise ValueError("The count must be positive")
+
+        if cursor is not None and cursor.strip() not in StreamCursor.START_CURSORS:
+            position, is_backward = StreamCursor.decode(
+                cursor.strip(), kind, blockchain_name, stream, local_ordering
+            )
+        elif start >= 0:
+            position, is_backward = start, False
+        else:
+            position, is_backward = None, True
+
+        if is_backward:
+            if position is None:
+                end = DataController.__get_stable_count(
+                    kind, blockchain_name, stream, selectors, local_ordering
+                )
+                first = max(end + start, 0)
+                last = min(first + count, end)
+            else:
+                first = max(position - count, 0)
+                last = position
+            items = read(last - first, first) if last > first else []
+            next_position = first if first > 0 else None
+        else:
+            page_count = count
+            if kind == StreamCursor.ITEMS and not local_ordering:
+                page_count = min(
+                    count,
+                    DataController.__get_stable_count(
+                        kind, blockchain_name, stream, selectors, local_ordering
+                    )
+                    - position,
+                )
+            items = read(page_count, position) if page_count > 0 else []
+            next_position = position + len(items)
+
+        next_cursor = None
+        if next_position is not None:
+            next_cursor = StreamCursor.encode(
+                kind,
+                blockchain_name,
+                stream,
+                local_ordering,
+                next_position,
+                is_backward,
+            )
+        return {"items": items, "nextCursor": next_cursor}
+
+    @staticmethod
+    def __get_items_in_range(
+        counts: dict,
+        time_from: int,
+        time_to: int,
+        count: int,
+        start: int,
+        read,
+    ):
+        """
+        Returns the items selected by count and start among the confirmed items,
+        read with read(count, start) in chain order, whose blocktime is between
+        time_from and time_to. counts is the liststreams or liststreamkeys entry
+        of the list, whose confirmed items come first in chain order.
+        """
+        if time_from is not None and time_to is not None and time_from > time_to:
+            raise ValueError("The start of the time range can't be after its end")
+
+        if count <= 0:
+            raise ValueError("The count must be positive")
+
+        confirmed = counts.get(DataController.CONFIRMED_ITEMS_FIELD)
+        if confirmed is None:
+            raise ValueError(
+                "Time ranges can only be used on streams this node is subscribed to"
+            )
+
+        def get_blocktime(position):
+            return read(1, position)[0][DataController.BLOCKTIME_FIELD]
+
+        first = 0
+        if time_from is not None:
+            first = DataController.__bisect(
+                0, confirmed, lambda position: get_blocktime(position) < time_from
+            )
+        last = confirmed
+        if time_to is not None:
+            last = DataController.__bisect(
+                first, confirmed, lambda position: get_blocktime(position) <= time_to
+            )
+
+        if start < 0:
+            range_start = max(last + start, first)
+        else:
+            range_start = min(first + start, last)
+        range_end = min(range_start + count, last)
+        if range_end <= range_start:
+            return []
+
+        # Block times only roughly grow along the chain, so the items next to the
+        # bounds are checked once more
+        #
+        return [
+            item
+            for item in read(range_end - range_start, range_start)
+            if (time_from is None or item[DataController.BLOCKTIME_FIELD] >= time_from)
+            and (time_to is None or item[DataController.BLOCKTIME_FIELD] <= time_to)
+        ]
+
+    @staticmethod
+    def __bisect(low: int, high: int, is_before):
+        """
+        Returns the first position between low and high for which is_before is
+        false, is_before being true for every position before it
+        """
+        while low < high:
+            middle = (low + high) // 2
+            if is_before(middle):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def __get_stable_count(
+        kind: str, blockchain_name: str, stream: str, selectors: list, local_ordering
+    ):
+        """
+        Returns the number of entries of the list being walked whose position
+        won't change: every key or publisher of the selectors or of the stream,
+        and every item in local ordering but only confirmed items in chain order
+        """
+        if selectors is not None:
+            return len([selector for selector in selectors if selector.strip()])
+
+        field = kind
+        if kind == StreamCursor.ITEMS and not local_ordering:
+            field = DataController.CONFIRMED_ITEMS_FIELD
+
+        streams = MultiChainClient.call(
+            blockchain_name, DataController.GET_STREAMS_ARG, stream
+        )
+        if streams[0].get(field) is None:
+            raise ValueError(
+                "Cursors can only be used on streams this node is subscribed to"
+            )
+        return streams[0][field]
@@ -1,11 +1,12 @@
-from subprocess import run, CalledProcessError
-from app.models.exception.multichain_error import MultiChainError
-import json
+from app.config import Config
+from app.models.client.multichain_client import MultiChainClient
+from app.models.data.single_flight import SingleFlight
+
+single_flight = SingleFlight(Config.READ_COALESCING_ENABLED)
 
 
 class DataStreamController:
     MAX_DATA_COUNT = 10
-    MULTICHAIN_ARG = "multichain-cli"
     CREATE_ARG = "create"
     STREAM_ARG = "stream"
     GET_STREAMS_ARG = "liststreams"
@@ -35,25 +36,22 @@ class DataStreamController:
             if not stream_name:
                 raise ValueError("Stream name can't be empty")
 
-            args = [
-                DataStreamController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 DataStreamController.CREATE_ARG,
                 DataStreamController.STREAM_ARG,
                 stream_name,
-                json.dumps(is_open),
-            ]
-            output = run(args, check=True, capture_output=True)
+                is_open,
+            )
 
-            return output.stdout.strip()
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output
         except ValueError as err:
             raise err
         except Exception as err:
             raise err
 
     @staticmethod
+    @single_flight.coalesced("get_streams")
     def get_streams(
         blockchain_name: str,
         streams: list = DEFAULT_STREAMS_LIST_CONTENT,
@@ -78,21 +76,17 @@ class DataStreamController:
                 streams = [stream.strip() for stream in streams if stream.strip()]
                 if not streams:
                     raise ValueError("Stream names can't be empty")
-                stream_selector = json.dumps(streams)
+                stream_selector = streams
 
-            args = [
-                DataStreamController.MULTICHAIN_ARG,
+            streams = MultiChainClient.call(
                 blockchain_name,
                 DataStreamController.GET_STREAMS_ARG,
                 stream_selector,
-                json.dumps(verbose),
-                json.dumps(count),
-                json.dumps(start),
-            ]
-            streams = run(args, check=True, capture_output=True)
-            return json.loads(streams.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+                verbose,
+                count,
+                start,
+            )
+            return streams
         except ValueError as err:
             raise err
         except Exception as err:
@@ -118,20 +112,16 @@ class DataStreamController:
             if not streams:
                 raise ValueError("Stream names can't be empty")
 
-            args = [
-                DataStreamController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 DataStreamController.SUBSCRIBE_TO_STREAM_ARG,
-                json.dumps(streams),
-                json.dumps(rescan),
-            ]
-            output = run(args, check=True, capture_output=True)
+                streams,
+                rescan,
+            )
 
             # returns True if output is empty (meaning it was a success)
             #
-            return not output.stdout.strip()
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output is None
         except ValueError as err:
             raise err
         except Exception as err:
@@ -152,19 +142,15 @@ class DataStreamController:
             if not streams:
                 raise ValueError("Stream names can't be empty")
 
-            args = [
-                DataStreamController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 DataStreamController.UNSUBSCRIBE_FROM_STREAM_ARG,
-                json.dumps(streams),
-            ]
-            output = run(args, check=True, capture_output=True)
+                streams,
+            )
 
             # returns True if output is empty (meaning it was a success)
             #
-            return not output.stdout.strip()
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output is None
         except ValueError as err:
             raise err
         except Exception as err:
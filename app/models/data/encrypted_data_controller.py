@@ -0,0 +1,501 @@
+import json
+import secrets
+
+from nacl.exceptions import CryptoError
+
+from app.config import Config
+from app.models.data.data_controller import DataController
+from app.models.encryption.batch_decryptor import BatchDecryptor
+from app.models.encryption.encryption_controller import EncrytpionController
+from app.models.encryption.envelope import Envelope
+from app.models.encryption.group_key_data import GroupKeyData
+from app.models.encryption.group_key_store import GroupKeyStore
+from app.models.encryption.key_data import KeyData
+from app.models.exception.multichain_error import MultiChainError
+
+batch_decryptor = BatchDecryptor(
+    Config.DECRYPTION_WORKERS,
+    Config.DECRYPTION_MIN_BATCH_SIZE,
+    Config.DECRYPTION_PROCESS_MIN_BYTES,
+)
+group_key_store = GroupKeyStore(
+    Config.GROUP_KEY_ROTATION_INTERVAL_MS, Config.GROUP_KEY_CACHE_SIZE
+)
+
+
+class EncryptedDataController:
+    """
+    Publishes items whose data is encrypted with EncrytpionController, so that
+    only the holders of the private keys of the recipients can read it, and
+    decrypts the items of a stream with the private key of a recipient
+    """
+
+    NOT_A_RECIPIENT_ERROR = "The item wasn't encrypted for this private key"
+    GROUP_KEY_NOT_FOUND_ERROR = "The group key of the item wasn't found"
+
+    @staticmethod
+    def publish_encrypted_item(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        data: str,
+        public_keys: list,
+        private_key: str = None,
+        key_stream: str = None,
+    ):
+        """
+        Encrypts data for each of the base64 encoded public keys and publishes it
+        in stream. If the private key of the publisher is provided, the data is
+        also encrypted for the publisher so that it can read the item back.
+        If a key stream is provided, the data is encrypted with the group key of
+        the recipients instead, see __get_group_key_data, and the item only holds
+        the ID of the group key.
+        """
+        try:
+            public_keys = [
+                public_key.strip() for public_key in public_keys if public_key.strip()
+            ]
+            if not public_keys:
+                raise ValueError("Public keys can't be empty")
+
+            if not data:
+                raise ValueError("Data can't be empty")
+
+            encryption_controller = EncryptedDataController.__get_encryption_controller(
+                private_key
+            )
+            if key_stream is not None:
+                key_stream = key_stream.strip()
+                if not key_stream:
+                    raise ValueError("Key stream name can't be empty")
+
+                key_data = EncryptedDataController.__get_group_key_data(
+                    blockchain_name,
+                    key_stream,
+                    data,
+                    public_keys,
+                    encryption_controller,
+                    include_user=private_key is not None,
+                )
+                return EncryptedDataController.__publish(
+                    blockchain_name, stream, keys, key_data
+                )
+
+            try:
+                key_data = encryption_controller.encrypt_data(
+                    data, public_keys, include_user=private_key is not None
+                )
+            except (TypeError, ValueError):
+                raise ValueError("One of the public keys is invalid")
+            return EncryptedDataController.__publish(
+                blockchain_name, stream, keys, key_data
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_decrypted_stream_items(
+        blockchain_name: str,
+        stream: str,
+        private_key: str,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+        key: str = None,
+    ):
+        """
+        Retrieves items in stream like DataController.get_stream_items, or the
+        items of key like DataController.get_items_by_key if a key is provided,
+        and decrypts the data of the encrypted items in a single batch. Items
+        that can't be decrypted with the private key keep their encrypted data
+        and get a decryptionError field instead, and unencrypted items are
+        returned as they are. Group keys are read from their key stream once per
+        page and kept in memory.
+        """
+        try:
+            if not private_key or not private_key.strip():
+                raise ValueError("Private key can't be empty")
+
+            private_key = private_key.strip()
+            encryption_controller = EncryptedDataController.__get_encryption_controller(
+                private_key
+            )
+            if key is None:
+                items = DataController.get_stream_items(
+                    blockchain_name, stream, verbose, count, start, local_ordering
+                )
+            else:
+                items = DataController.get_items_by_key(
+                    blockchain_name, stream, key, verbose, count, start, local_ordering
+                )
+            return EncryptedDataController.__decrypt_items(
+                blockchain_name.strip(), private_key, encryption_controller, items
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def publish_encrypted_file(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        file,
+        public_keys: list,
+        private_key: str = None,
+    ):
+        """
+        Encrypts a binary file object for each of the base64 encoded public keys,
+        like publish_encrypted_item, and publishes it in stream as an off-chain
+        item. The file is encrypted with libsodium secretstream and sent to the
+        node ENCRYPTED_FILE_CHUNK_SIZE bytes at a time, so that large files never
+        have to fit in memory. Returns the txid of the transaction.
+        """
+        try:
+            public_keys = [
+                public_key.strip() for public_key in public_keys if public_key.strip()
+            ]
+            if not public_keys:
+                raise ValueError("Public keys can't be empty")
+
+            encryption_controller = EncryptedDataController.__get_encryption_controller(
+                private_key
+            )
+            try:
+                symmetric_key, enc_keys = encryption_controller.generate_group_key(
+                    public_keys, include_user=private_key is not None
+                )
+            except (TypeError, ValueError):
+                raise ValueError("One of the public keys is invalid")
+
+            chunk_size = Config.ENCRYPTED_FILE_CHUNK_SIZE
+            enc_chunks = encryption_controller.encrypt_stream(
+                file, symmetric_key, chunk_size
+            )
+            stream_header = next(enc_chunks)
+
+            def chunks():
+                yield Envelope.encode_stream_header(enc_keys, chunk_size, stream_header)
+                yield from enc_chunks
+
+            return DataController.publish_offchain_item(
+                blockchain_name, stream, keys, chunks()
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_decrypted_file(
+        blockchain_name: str, stream: str, txid: str, private_key: str
+    ):
+        """
+        Returns a generator of the plain text chunks of a file published in
+        stream by publish_encrypted_file in the transaction txid. The encrypted
+        file is read from the node a chunk at a time, and each chunk decrypted as
+        soon as it is read. The private key is checked before the generator is
+        returned, so that a reader that can't decrypt the file gets an error
+        rather than an empty file.
+        """
+        try:
+            if not private_key or not private_key.strip():
+                raise ValueError("Private key can't be empty")
+
+            encryption_controller = EncryptedDataController.__get_encryption_controller(
+                private_key.strip()
+            )
+            read = EncryptedDataController.__get_item_reader(
+                blockchain_name, stream, txid
+            )
+            header_size = Envelope.get_stream_header_size(
+                read(Envelope.STREAM_PREFIX_SIZE, 0)
+            )
+            stream_header = (
+                Envelope.decode_stream_header(read(header_size, 0))
+                if header_size is not None
+                else None
+            )
+            if stream_header is None:
+                raise ValueError("The item isn't an encrypted file")
+
+            fingerprint_symmetric_key_map, chunk_size, header = stream_header
+            enc_symmetric_key = fingerprint_symmetric_key_map.get(
+                Envelope.get_fingerprint(
+                    encryption_controller.get_user_public_key().decode()
+                )
+            )
+            if enc_symmetric_key is None:
+                raise ValueError(EncryptedDataController.NOT_A_RECIPIENT_ERROR)
+
+            try:
+                symmetric_key = encryption_controller.decrypt_symmetric_key(
+                    bytes(enc_symmetric_key)
+                )
+            except CryptoError as err:
+                raise ValueError(str(err))
+
+            def enc_chunks():
+                enc_chunk_size = chunk_size + EncrytpionController.STREAM_CHUNK_OVERHEAD
+                start = header_size
+                while True:
+                    enc_chunk = read(enc_chunk_size, start)
+                    if not enc_chunk:
+                        return
+                    yield enc_chunk
+                    start += len(enc_chunk)
+
+            return encryption_controller.decrypt_stream(
+                enc_chunks(), symmetric_key, header
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def __get_item_reader(blockchain_name: str, stream: str, txid: str):
+        """
+        Returns a function reading count bytes of the binary data of an item from
+        start. Data MultiChain returns inline is sliced, and data larger than
+        maxshowndata, such as off-chain files, is read from the node by range.
+        """
+        item = DataController.get_stream_item(blockchain_name, stream, txid, False)
+        data = item.get("data")
+        if isinstance(data, str):
+            try:
+                buffer = bytes.fromhex(data)
+            except ValueError:
+                raise ValueError("The item isn't an encrypted file")
+            return lambda count, start: buffer[start : start + count]
+
+        if not isinstance(data, dict) or "size" not in data or "txid" not in data:
+            raise ValueError("The item isn't an encrypted file")
+
+        def read(count: int, start: int):
+            count = min(count, data["size"] - start)
+            if count <= 0:
+                return b""
+            return bytes.fromhex(
+                DataController.get_item_data(
+                    blockchain_name, data["txid"], data["vout"], count, start
+                )
+            )
+
+        return read
+
+    @staticmethod
+    def __get_group_key_data(
+        blockchain_name: str,
+        key_stream: str,
+        data: str,
+        public_keys: list,
+        encryption_controller: EncrytpionController,
+        include_user: bool,
+    ):
+        """
+        Encrypts data with the group key of the recipients. The first publish to
+        a recipient set generates a group key, seals it once for each recipient
+        and publishes the sealed keys in the key stream under a random group key
+        ID. Later publishes to the same recipients reuse it until it is due for
+        rotation, so that they cost a single symmetric encryption.
+        """
+        members = set(public_keys)
+        if include_user:
+            members.add(encryption_controller.get_user_public_key().decode())
+
+        def create_group_key():
+            try:
+                symmetric_key, enc_keys = encryption_controller.generate_group_key(
+                    sorted(members), include_user=False
+                )
+            except (TypeError, ValueError):
+                raise ValueError("One of the public keys is invalid")
+
+            group_key_id = secrets.token_hex(GroupKeyData.GROUP_KEY_ID_SIZE)
+            DataController.publish_item(
+                blockchain_name,
+                key_stream,
+                [group_key_id],
+                json.dumps(GroupKeyData.keys_to_dict(enc_keys)),
+            )
+            return group_key_id, symmetric_key
+
+        group_key_id, symmetric_key = group_key_store.get_or_create(
+            blockchain_name.strip(), key_stream, frozenset(members), create_group_key
+        )
+        return GroupKeyData(
+            group_key_id,
+            key_stream,
+            encryption_controller.encrypt_data_with_key(data, symmetric_key),
+        )
+
+    @staticmethod
+    def __get_group_key(
+        blockchain_name: str,
+        key_stream: str,
+        group_key_id: str,
+        encryption_controller: EncrytpionController,
+    ):
+        """
+        Returns a (group key, error) pair, the group key being decrypted from the
+        first item of its ID in the key stream unless it is already in memory
+        """
+        public_key = encryption_controller.get_user_public_key().decode()
+        symmetric_key = group_key_store.get_member_key(
+            blockchain_name, key_stream, group_key_id, public_key
+        )
+        if symmetric_key is not None:
+            return symmetric_key, None
+
+        try:
+            key_items = DataController.get_items_by_key(
+                blockchain_name, key_stream, group_key_id, False, 1, 0
+            )
+            data = key_items[0].get("data") if key_items else None
+
+            # Key items larger than maxshowndata have to be read separately
+            #
+            if isinstance(data, dict) and "json" not in data and "txid" in data:
+                data = DataController.get_item_data(
+                    blockchain_name, data["txid"], data["vout"]
+                )
+        except MultiChainError as err:
+            return None, err.get_error_message()
+        except ValueError as err:
+            return None, str(err)
+
+        public_key_symmetric_key_map = GroupKeyData.keys_from_dict(
+            data.get("json") if isinstance(data, dict) else None
+        )
+        if public_key_symmetric_key_map is None:
+            return None, EncryptedDataController.GROUP_KEY_NOT_FOUND_ERROR
+
+        enc_symmetric_key = public_key_symmetric_key_map.get(public_key)
+        if enc_symmetric_key is None:
+            return None, EncryptedDataController.NOT_A_RECIPIENT_ERROR
+
+        try:
+            symmetric_key = encryption_controller.decrypt_symmetric_key(
+                enc_symmetric_key
+            )
+        except Exception as err:
+            return None, str(err) or type(err).__name__
+
+        group_key_store.put_member_key(
+            blockchain_name, key_stream, group_key_id, public_key, symmetric_key
+        )
+        return symmetric_key, None
+
+    @staticmethod
+    def __decrypt_items(
+        blockchain_name: str,
+        private_key: str,
+        encryption_controller: EncrytpionController,
+        items: list,
+    ):
+        """
+        Returns copies of the items with their data decrypted by the batch
+        decryptor, in the same order
+        """
+        public_key = encryption_controller.get_user_public_key().decode()
+        fingerprint = Envelope.get_fingerprint(public_key)
+        items = list(items)
+        positions = []
+        entries = []
+        group_keys = {}
+        for position, item in enumerate(items):
+            # Binary envelopes are returned as hex and keyed by fingerprints
+            #
+            data = item.get("data")
+            if isinstance(data, str):
+                key_data = Envelope.decode_hex(data)
+                recipient = fingerprint
+            else:
+                data = data.get("json") if isinstance(data, dict) else None
+                key_data = KeyData.from_dict(data) or GroupKeyData.from_dict(data)
+                recipient = public_key
+
+            if isinstance(key_data, KeyData):
+                enc_symmetric_key = key_data.get_public_key_symmetric_key_map().get(
+                    recipient
+                )
+                if enc_symmetric_key is None:
+                    items[position] = dict(
+                        item,
+                        decryptionError=EncryptedDataController.NOT_A_RECIPIENT_ERROR,
+                    )
+                    continue
+
+                positions.append(position)
+                entries.append((key_data.get_encypted_data(), enc_symmetric_key, None))
+                continue
+
+            group_key_data = key_data
+            if group_key_data is None:
+                continue
+
+            group = (group_key_data.get_key_stream(), group_key_data.get_group_key_id())
+            if group not in group_keys:
+                group_keys[group] = EncryptedDataController.__get_group_key(
+                    blockchain_name, *group, encryption_controller
+                )
+            symmetric_key, error = group_keys[group]
+            if error is not None:
+                items[position] = dict(item, decryptionError=error)
+                continue
+
+            positions.append(position)
+            entries.append((group_key_data.get_encypted_data(), None, symmetric_key))
+
+        results = batch_decryptor.decrypt(private_key, entries)
+        for position, (plain_text, error) in zip(positions, results):
+            if error is not None:
+                items[position] = dict(items[position], decryptionError=error)
+            else:
+                items[position] = dict(
+                    items[position],
+                    data={"json": EncryptedDataController.__load_data(plain_text)},
+                )
+        return items
+
+    @staticmethod
+    def __publish(blockchain_name: str, stream: str, keys: list, key_data):
+        """
+        Publishes KeyData or GroupKeyData as a binary envelope, or as JSON if
+        binary envelopes are disabled
+        """
+        if Config.ENCRYPTION_BINARY_ENVELOPE:
+            return DataController.publish_item(
+                blockchain_name, stream, keys, Envelope.encode(key_data).hex(), raw=True
+            )
+        return DataController.publish_item(
+            blockchain_name, stream, keys, json.dumps(key_data.to_dict())
+        )
+
+    @staticmethod
+    def __load_data(plain_text: bytes):
+        """
+        Returns decrypted data the way DataController.publish_item stores it, as
+        JSON if it is valid JSON and as a string otherwise
+        """
+        plain_text = plain_text.decode()
+        try:
+            return json.loads(plain_text)
+        except ValueError:
+            return plain_text
+
+    @staticmethod
+    def __get_encryption_controller(private_key: str):
+        """
+        Returns the encryption controller of the user with the base64 encoded
+        private key, or of a new user if it is None
+        """
+        try:
+            return EncrytpionController(private_key)
+        except (TypeError, ValueError):
+            raise ValueError("The private key is invalid")
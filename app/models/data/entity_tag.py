@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+from flask import Response, request
+from flask_api import status
+
+from app.config import Config
+from app.models.data.data_controller import stream_cache
+from app.models.exception.multichain_error import MultiChainError
+
+
+class EntityTag:
+    """
+    Strong ETags of read endpoints. A tag is derived from the state of the chain,
+    or of the stream, as tracked by the stream cache, from the arguments of the
+    request and from the headers the encoding of the response depends on. It can
+    therefore be checked against If-None-Match before the node is queried.
+    """
+
+    VARIANT_HEADERS = ("Accept", "Accept-Encoding")
+
+    @staticmethod
+    def get(endpoint: str, blockchain_name: str, stream: str, arguments: list):
+        """
+        Returns the ETag of a request to the endpoint, or None if ETags are
+        disabled or the state of the chain can't be read. Pass None as the
+        stream for endpoints that depend on the whole chain.
+        """
+        if not Config.ETAGS_ENABLED:
+            return None
+        try:
+            version = stream_cache.get_version(blockchain_name, stream)
+        except (MultiChainError, ValueError):
+            # Let the query itself report why the chain or stream can't be read
+            #
+            return None
+
+        variant = [
+            request.headers.get(header, "") for header in EntityTag.VARIANT_HEADERS
+        ]
+        key = json.dumps(
+            [endpoint, blockchain_name, stream, arguments, version, variant],
+            sort_keys=True,
+            default=str,
+        )
+        return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    @staticmethod
+    def is_not_modified(etag: str):
+        """
+        Returns true if the If-None-Match header of the request matches the ETag
+        """
+        return etag is not None and request.if_none_match.contains(etag.strip('"'))
+
+    @staticmethod
+    def not_modified(etag: str):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    @staticmethod
+    def get_headers(etag: str):
+        """
+        Returns the headers of a response with the ETag
+        """
+        return {"ETag": etag} if etag is not None else {}
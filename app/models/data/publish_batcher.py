@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import Future
+
+from app.models.exception.multichain_error import MultiChainError
+from app.models.exception.node_busy_error import NodeBusyError
+from app.models.exception.node_timeout_error import NodeTimeoutError
+
+
+class PublishBatch:
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.is_full = threading.Event()
+
+
+class PublishBatcher:
+    """
+    Merges items published to the same blockchain within a short window into
+    a single publishmulti transaction. The first caller of a window becomes its
+    leader: it waits until the window elapses or the batch is full, then
+    publishes the whole batch and hands every caller its own result.
+    """
+
+    def __init__(self, publish_multi, window_ms: int, max_items: int):
+        self._publish_multi = publish_multi
+        self._window = window_ms / 1000.0
+        self._max_items = max_items
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def submit(self, blockchain_name: str, item: dict):
+        """
+        Adds an item to the current batch of the blockchain and blocks until the
+        batch has been published. Returns the txid of the transaction that
+        contains the item.
+        """
+        future = Future()
+        with self._lock:
+            batch = self._batches.get(blockchain_name)
+            is_leader = batch is None
+            if is_leader:
+                batch = PublishBatch()
+                self._batches[blockchain_name] = batch
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self._max_items:
+                self.__detach(blockchain_name, batch)
+                batch.is_full.set()
+
+        if is_leader:
+            batch.is_full.wait(self._window)
+            with self._lock:
+                self.__detach(blockchain_name, batch)
+            self.__flush(blockchain_name, batch)
+
+        return future.result()
+
+    def __detach(self, blockchain_name: str, batch: PublishBatch):
+        """
+        Stops new items from joining the batch. Must be called with the lock held.
+        """
+        if self._batches.get(blockchain_name) is batch:
+            del self._batches[blockchain_name]
+
+    def __flush(self, blockchain_name: str, batch: PublishBatch):
+        """
+        Publishes the batch in a single transaction. If the transaction is
+        rejected, the items are published one by one so that only the callers
+        whose item is invalid receive the error. A batch whose transaction timed
+        out may still be published, and a busy node would only be loaded further,
+        so neither is retried.
+        """
+        try:
+            txid = self._publish_multi(blockchain_name, batch.items)
+            for future in batch.futures:
+                future.set_result(txid)
+            return
+        except (NodeTimeoutError, NodeBusyError) as err:
+            for future in batch.futures:
+                future.set_exception(err)
+            return
+        except MultiChainError as err:
+            if len(batch.items) == 1:
+                batch.futures[0].set_exception(err)
+                return
+        except Exception as err:
+            for future in batch.futures:
+                future.set_exception(err)
+            return
+
+        for item, future in zip(batch.items, batch.futures):
+            try:
+                future.set_result(self._publish_multi(blockchain_name, [item]))
+            except Exception as err:
+                future.set_exception(err)
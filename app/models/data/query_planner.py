@@ -0,0 +1,205 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.client.multichain_client import MultiChainClient
+
+
+class QueryPlanner:
+    """
+    Answers queries on the keys and publishers of stream items from the node's
+    per-key and per-publisher indexes instead of liststreamqueryitems, which
+    fails once it has to scan more than maxqueryscanitems items. An AND query
+    reads the items of its most selective key or publisher, as told by the item
+    counts of liststreamkeys and liststreampublishers, and filters them locally,
+    so its work is bounded by the smallest index. An OR query reads the items of
+    every key and publisher concurrently and merges them.
+    """
+
+    GET_STREAM_KEYS_ARG = "liststreamkeys"
+    GET_STREAM_PUBLISHERS_ARG = "liststreampublishers"
+    GET_STREAM_KEY_ITEMS_ARG = "liststreamkeyitems"
+    GET_STREAM_PUBLISHER_ITEMS_ARG = "liststreampublisheritems"
+    ITEMS_FIELD = "items"
+    KEY_FIELD = "key"
+    KEYS_FIELD = "keys"
+    PUBLISHER_FIELD = "publisher"
+    PUBLISHERS_FIELD = "publishers"
+    BLOCKTIME_FIELD = "blocktime"
+
+    def __init__(self, page_size: int, max_concurrency: int):
+        self._page_size = page_size
+        self._max_concurrency = max_concurrency
+
+    def query(
+        self,
+        blockchain_name: str,
+        stream: str,
+        keys: list = None,
+        publishers: list = None,
+        match_all: bool = True,
+        verbose: bool = True,
+    ):
+        """
+        Returns the items of the stream that have all (or, if match_all is false,
+        any) of the keys and publishers. Items matching all of them are returned
+        in chain order, items matching any of them in block time order with
+        unconfirmed items last.
+        """
+        keys = list(dict.fromkeys(keys or []))
+        publishers = list(dict.fromkeys(publishers or []))
+        selectors = QueryPlanner.get_selectors(keys, publishers)
+        if not selectors:
+            return []
+        if len(selectors) == 1:
+            return list(self.__read(blockchain_name, stream, *selectors[0], verbose))
+        if not match_all:
+            return self.__get_union(blockchain_name, stream, selectors, verbose)
+
+        key_entries = publisher_entries = []
+        if keys:
+            key_entries = MultiChainClient.call(
+                blockchain_name, QueryPlanner.GET_STREAM_KEYS_ARG, stream, keys, False
+            )
+        if publishers:
+            publisher_entries = MultiChainClient.call(
+                blockchain_name,
+                QueryPlanner.GET_STREAM_PUBLISHERS_ARG,
+                stream,
+                publishers,
+                False,
+            )
+        selector = QueryPlanner.get_most_selective(
+            selectors, key_entries, publisher_entries
+        )
+        if selector is None:
+            return []
+
+        return QueryPlanner.filter_items(
+            self.__read(blockchain_name, stream, *selector, verbose), keys, publishers
+        )
+
+    @staticmethod
+    def get_selectors(keys: list, publishers: list):
+        """
+        Returns the (method, selector) pairs that read the items of each key and
+        publisher
+        """
+        return [(QueryPlanner.GET_STREAM_KEY_ITEMS_ARG, key) for key in keys] + [
+            (QueryPlanner.GET_STREAM_PUBLISHER_ITEMS_ARG, publisher)
+            for publisher in publishers
+        ]
+
+    @staticmethod
+    def get_most_selective(selectors: list, key_entries: list, publisher_entries: list):
+        """
+        Returns the selector with the fewest items, as told by the entries of
+        liststreamkeys and liststreampublishers, or None if one of them has no
+        items, in which case no item can match all of them
+        """
+        counts = {}
+        for entry in key_entries:
+            selector = (
+                QueryPlanner.GET_STREAM_KEY_ITEMS_ARG,
+                entry[QueryPlanner.KEY_FIELD],
+            )
+            counts[selector] = entry[QueryPlanner.ITEMS_FIELD]
+        for entry in publisher_entries:
+            selector = (
+                QueryPlanner.GET_STREAM_PUBLISHER_ITEMS_ARG,
+                entry[QueryPlanner.PUBLISHER_FIELD],
+            )
+            counts[selector] = entry[QueryPlanner.ITEMS_FIELD]
+
+        selector = min(selectors, key=lambda item: counts.get(item, 0))
+        if not counts.get(selector):
+            return None
+        return selector
+
+    @staticmethod
+    def filter_items(items, keys: list, publishers: list):
+        """
+        Returns the items that have all of the keys and publishers
+        """
+        keys = set(keys)
+        publishers = set(publishers)
+        return [
+            item
+            for item in items
+            if keys.issubset(item.get(QueryPlanner.KEYS_FIELD, []))
+            and publishers.issubset(item.get(QueryPlanner.PUBLISHERS_FIELD, []))
+        ]
+
+    @staticmethod
+    def merge_items(results):
+        """
+        Merges lists of items, dropping the items found more than once, in block
+        time order with unconfirmed items last
+        """
+        items = {}
+        for result in results:
+            for item in result:
+                items.setdefault(QueryPlanner.__get_item_id(item), item)
+
+        return sorted(
+            items.values(),
+            key=lambda item: (
+                item.get(QueryPlanner.BLOCKTIME_FIELD) is None,
+                item.get(QueryPlanner.BLOCKTIME_FIELD) or 0,
+            ),
+        )
+
+    def __get_union(
+        self, blockchain_name: str, stream: str, selectors: list, verbose: bool
+    ):
+        """
+        Reads the items of every selector concurrently and merges them, dropping
+        the items read more than once
+        """
+        with ThreadPoolExecutor(
+            max_workers=min(len(selectors), self._max_concurrency)
+        ) as executor:
+            return QueryPlanner.merge_items(
+                executor.map(
+                    lambda selector: list(
+                        self.__read(blockchain_name, stream, *selector, verbose)
+                    ),
+                    selectors,
+                )
+            )
+
+    def __read(
+        self,
+        blockchain_name: str,
+        stream: str,
+        method: str,
+        selector: str,
+        verbose: bool,
+    ):
+        """
+        Yields the items of a key or publisher in chain order, reading them a page
+        at a time so that no single call returns an unbounded response
+        """
+        start = 0
+        while True:
+            items = MultiChainClient.call(
+                blockchain_name,
+                method,
+                stream,
+                selector,
+                verbose,
+                self._page_size,
+                start,
+            )
+            yield from items
+            if len(items) < self._page_size:
+                return
+            start += len(items)
+
+    @staticmethod
+    def __get_item_id(item: dict):
+        """
+        Returns a value that identifies the item within its stream
+        """
+        if "vout" in item:
+            return item["txid"], item["vout"]
+        return json.dumps(item, sort_keys=True)
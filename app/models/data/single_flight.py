@@ -0,0 +1,79 @@
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+
+from app.models.monitor.metrics import READ_CALLS, READ_CALLS_COALESCED
+
+
+class SingleFlight:
+    """
+    Lets identical concurrent reads share a single execution. The first call of
+    an endpoint with given arguments runs, and identical calls arriving while it
+    is in flight wait for its result, or its error, instead of calling the node
+    themselves. Nothing is kept once the call has finished.
+    """
+
+    def __init__(self, enabled: bool):
+        self._enabled = enabled
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def coalesced(self, endpoint: str):
+        """
+        Decorates a read method so that identical concurrent calls are coalesced.
+        Calls are identical when their arguments are equal once defaults have
+        been applied and strings stripped.
+        """
+
+        def decorator(function):
+            signature = inspect.signature(function)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self._enabled:
+                    return function(*args, **kwargs)
+
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = [
+                    argument.strip() if isinstance(argument, str) else argument
+                    for argument in bound.arguments.values()
+                ]
+                return self.do(
+                    endpoint,
+                    json.dumps(arguments, sort_keys=True, default=str),
+                    lambda: function(*args, **kwargs),
+                )
+
+            return wrapper
+
+        return decorator
+
+    def do(self, endpoint: str, key: str, call):
+        """
+        Returns the result of call, or of the identical call already in flight
+        """
+        with self._lock:
+            future = self._calls.get((endpoint, key))
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[(endpoint, key)] = future
+
+        READ_CALLS.inc(endpoint)
+        if not is_leader:
+            READ_CALLS_COALESCED.inc(endpoint)
+            return future.result()
+
+        try:
+            result = call()
+            future.set_result(result)
+            return result
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(endpoint, key)]
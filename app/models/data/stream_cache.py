@@ -0,0 +1,200 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.models.client.multichain_client import MultiChainClient
+from app.models.exception.multichain_error import MultiChainError
+
+
+class StreamCache:
+    """
+    Read-through cache for stream queries. An entry is keyed by
+    (chain, stream, method, arguments) and stays valid while the chain's best
+    block hash and the stream's item count are unchanged. That state is read
+    from the node at most once per check interval for each stream.
+    """
+
+    GET_BEST_BLOCK_HASH_ARG = "getbestblockhash"
+    GET_MEMPOOL_INFO_ARG = "getmempoolinfo"
+    GET_STREAMS_ARG = "liststreams"
+    ITEMS_FIELD = "items"
+    SIZE_FIELD = "size"
+
+    def __init__(self, enabled: bool, max_entries: int, check_interval_ms: int):
+        self._enabled = enabled
+        self._max_entries = max_entries
+        self._check_interval = check_interval_ms / 1000.0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def cached(self, endpoint: str):
+        """
+        Decorates a read method whose first two parameters are the blockchain
+        name and the stream name so that its results are served from the cache
+        """
+
+        def decorator(function):
+            signature = inspect.signature(function)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self._enabled:
+                    return function(*args, **kwargs)
+
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = list(bound.arguments.values())
+                blockchain_name = str(arguments[0]).strip()
+                stream = str(arguments[1]).strip()
+                if not blockchain_name or not stream:
+                    return function(*args, **kwargs)
+
+                return self.get_or_load(
+                    endpoint,
+                    blockchain_name,
+                    stream,
+                    arguments[2:],
+                    lambda: function(*args, **kwargs),
+                )
+
+            return wrapper
+
+        return decorator
+
+    def get_or_load(
+        self, endpoint: str, blockchain_name: str, stream: str, arguments, load
+    ):
+        """
+        Returns the cached result of the query if the stream hasn't changed since
+        it was stored, otherwise calls load and caches its result
+        """
+        try:
+            version = self.get_version(blockchain_name, stream)
+        except (MultiChainError, ValueError):
+            # Let the query itself report why the chain or stream can't be read
+            #
+            return load()
+
+        key = (
+            blockchain_name,
+            stream,
+            endpoint,
+            json.dumps(arguments, sort_keys=True, default=str),
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.__count(endpoint, "hits")
+                return entry[1]
+            self.__count(endpoint, "misses")
+
+        value = load()
+
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, blockchain_name: str, stream: str = None):
+        """
+        Forces the next query on the stream, or on every stream of the chain if
+        no stream is provided, to re-check the chain and stream state. The state
+        of the chain itself is always re-checked.
+        """
+        with self._lock:
+            for version_key in list(self._versions):
+                if version_key[0] == blockchain_name and (
+                    stream is None or version_key[1] in (None, stream)
+                ):
+                    del self._versions[version_key]
+
+    def get_version(self, blockchain_name: str, stream: str = None):
+        """
+        Returns the (best block hash, stream item count) pair of the stream, or
+        the (best block hash, mempool size) pair of the chain if no stream is
+        provided, reading it from the node only if the check interval has elapsed
+        """
+        version_key = (blockchain_name, stream)
+        now = time.monotonic()
+        with self._lock:
+            cached_version = self._versions.get(version_key)
+            if (
+                cached_version is not None
+                and now - cached_version[1] < self._check_interval
+            ):
+                return cached_version[0]
+
+        best_block_hash = MultiChainClient.call(
+            blockchain_name, StreamCache.GET_BEST_BLOCK_HASH_ARG
+        )
+        if stream is None:
+            mempool = MultiChainClient.call(
+                blockchain_name, StreamCache.GET_MEMPOOL_INFO_ARG
+            )
+            version = (best_block_hash, mempool.get(StreamCache.SIZE_FIELD))
+        else:
+            streams = MultiChainClient.call(
+                blockchain_name, StreamCache.GET_STREAMS_ARG, stream
+            )
+            version = (best_block_hash, streams[0].get(StreamCache.ITEMS_FIELD))
+
+        with self._lock:
+            self._versions[version_key] = (version, now)
+        return version
+
+    def get_stats(self):
+        """
+        Returns the number of hits and misses per endpoint and the number of entries
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "endpoints": {
+                    endpoint: dict(counters)
+                    for endpoint, counters in self._stats.items()
+                },
+            }
+
+    def collect_metrics(self):
+        """
+        Returns the counters of the cache as metric families
+        """
+        stats = self.get_stats()
+        return [
+            (
+                "talos_stream_cache_" + counter + "_total",
+                "counter",
+                "Stream queries " + description + " the cache, by endpoint",
+                [
+                    (
+                        "talos_stream_cache_" + counter + "_total",
+                        {"endpoint": endpoint},
+                        counters[counter],
+                    )
+                    for endpoint, counters in sorted(stats["endpoints"].items())
+                ],
+            )
+            for counter, description in (
+                ("hits", "served from"),
+                ("misses", "missing from"),
+            )
+        ] + [
+            (
+                "talos_stream_cache_entries",
+                "gauge",
+                "Query results held by the cache",
+                [("talos_stream_cache_entries", {}, stats["entries"])],
+            )
+        ]
+
+    def __count(self, endpoint: str, counter: str):
+        counters = self._stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+        counters[counter] += 1
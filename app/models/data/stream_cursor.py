@@ -0,0 +1,116 @@
+import base64
+import json
+
+
+class StreamCursor:
+    """
+    Opaque pagination cursors. A cursor holds absolute positions in the lists
+    being walked and the query it belongs to, encoded as URL-safe base64 JSON.
+    Absolute positions don't shift as items are added at the end of a list,
+    unlike negative start values.
+    """
+
+    ITEMS = "items"
+    KEYS = "keys"
+    PUBLISHERS = "publishers"
+    CHANGES = "changes"
+    START_CURSORS = {"", "*"}
+    VERSION = 1
+
+    @staticmethod
+    def encode(
+        kind: str,
+        blockchain_name: str,
+        stream: str,
+        local_ordering: bool,
+        position: int,
+        is_backward: bool,
+    ):
+        """
+        Returns the cursor of the page of the walk that starts at position, or
+        that ends just before it for a backward walk
+        """
+        return StreamCursor.__dumps(
+            [
+                StreamCursor.VERSION,
+                kind,
+                blockchain_name,
+                stream,
+                local_ordering,
+                position,
+                is_backward,
+            ]
+        )
+
+    @staticmethod
+    def decode(
+        cursor: str, kind: str, blockchain_name: str, stream: str, local_ordering: bool
+    ):
+        """
+        Returns the (position, is_backward) pair of a cursor, after checking that
+        it was issued for the same query
+        """
+        try:
+            version, *query, position, is_backward = StreamCursor.__loads(cursor)
+        except (ValueError, TypeError):
+            raise ValueError("The cursor is invalid")
+
+        if (
+            version != StreamCursor.VERSION
+            or not isinstance(position, int)
+            or position < 0
+        ):
+            raise ValueError("The cursor is invalid")
+        if query != [kind, blockchain_name, stream, local_ordering]:
+            raise ValueError("The cursor was issued for another query")
+        return position, is_backward
+
+    @staticmethod
+    def encode_positions(blockchain_name: str, positions: dict):
+        """
+        Returns the cursor of a change feed, positions mapping each stream to the
+        number of its items, in local ordering, that have been returned
+        """
+        return StreamCursor.__dumps(
+            [StreamCursor.VERSION, StreamCursor.CHANGES, blockchain_name, positions]
+        )
+
+    @staticmethod
+    def decode_positions(cursor: str, blockchain_name: str):
+        """
+        Returns the positions of the streams held by a change feed cursor
+        """
+        try:
+            version, kind, cursor_blockchain_name, positions = StreamCursor.__loads(
+                cursor
+            )
+        except (ValueError, TypeError):
+            raise ValueError("The cursor is invalid")
+
+        if (
+            version != StreamCursor.VERSION
+            or not isinstance(positions, dict)
+            or not all(
+                isinstance(position, int) and position >= 0
+                for position in positions.values()
+            )
+        ):
+            raise ValueError("The cursor is invalid")
+        if [kind, cursor_blockchain_name] != [StreamCursor.CHANGES, blockchain_name]:
+            raise ValueError("The cursor was issued for another query")
+        return positions
+
+    @staticmethod
+    def __dumps(state: list):
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(state, separators=(",", ":")).encode()
+        )
+        return encoded.decode().rstrip("=")
+
+    @staticmethod
+    def __loads(cursor: str):
+        """
+        Decodes a cursor, raising a ValueError if it isn't base64 JSON
+        """
+        padding = "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(cursor + padding).decode())
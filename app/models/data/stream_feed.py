@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from app.models.client.multichain_client import MultiChainClient
+from app.models.exception.multichain_error import MultiChainError
+
+logger = logging.getLogger(__name__)
+
+
+class StreamWatcher:
+    """
+    Tails a single stream in a daemon thread and keeps its most recent items in
+    memory for every listener to read. Items are read in local ordering, the
+    order in which the node first saw them, since that order only ever grows at
+    the end. Positions and cursors are indexes in that order.
+    """
+
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_ITEMS_ARG = "liststreamitems"
+    ITEMS_FIELD = "items"
+
+    def __init__(
+        self, feed, blockchain_name: str, stream: str, interval: float, size: int
+    ):
+        self._feed = feed
+        self._blockchain_name = blockchain_name
+        self._stream = stream
+        self._interval = interval
+        self._items = deque(maxlen=size)
+        self._position = self.__get_item_count()
+        self._listeners = 0
+        self._last_active = time.monotonic()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self.run,
+            name="stream-watcher-" + blockchain_name + "-" + stream,
+            daemon=True,
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def add_listener(self):
+        with self._condition:
+            self._listeners += 1
+
+    def remove_listener(self):
+        with self._condition:
+            self._listeners -= 1
+            self._last_active = time.monotonic()
+
+    def is_idle(self, idle_timeout: float):
+        """
+        Returns true if nobody has listened to the stream for idle_timeout seconds
+        """
+        with self._condition:
+            return (
+                self._listeners == 0
+                and time.monotonic() - self._last_active >= idle_timeout
+            )
+
+    def run(self):
+        """
+        Reads new items of the stream until nobody listens to it anymore
+        """
+        while True:
+            if self._feed.remove_if_idle(self):
+                return
+            try:
+                self.poll()
+            except (MultiChainError, ValueError) as err:
+                logger.debug(
+                    "Could not watch %s on %s: %s",
+                    self._stream,
+                    self._blockchain_name,
+                    err,
+                )
+            time.sleep(self._interval)
+
+    def poll(self):
+        """
+        Reads the items added to the stream since the last poll and wakes up the
+        listeners waiting for them
+        """
+        count = self.__get_item_count()
+        while self._position < count:
+            items = self.__get_items(
+                self._position, min(count - self._position, self._items.maxlen)
+            )
+            if not items:
+                return
+            with self._condition:
+                for item in items:
+                    self._position += 1
+                    self._items.append((self._position, item))
+                self._condition.notify_all()
+
+    def wait(self, cursor: int, timeout: float):
+        """
+        Returns the cursor to resume from and a list of (cursor, item) tuples for
+        the items after cursor, waiting up to timeout seconds for at least one to
+        appear. A cursor of None starts from the items added from now on.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if cursor is None or cursor > self._position:
+                cursor = self._position
+            while self._position <= cursor:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return cursor, []
+                self._condition.wait(remaining)
+
+            position = self._position
+            if self._items and self._items[0][0] <= cursor + 1:
+                items = [entry for entry in self._items if entry[0] > cursor]
+                return position, items
+
+        # The listener is further behind than the items kept in memory, so it
+        # catches up from the node
+        #
+        items = self.__get_items(cursor, min(position - cursor, self._items.maxlen))
+        items = [(cursor + offset, item) for offset, item in enumerate(items, start=1)]
+        return cursor + len(items), items
+
+    def __get_item_count(self):
+        streams = MultiChainClient.call(
+            self._blockchain_name, StreamWatcher.GET_STREAMS_ARG, self._stream
+        )
+        return streams[0][StreamWatcher.ITEMS_FIELD]
+
+    def __get_items(self, start: int, count: int):
+        return MultiChainClient.call(
+            self._blockchain_name,
+            StreamWatcher.GET_STREAM_ITEMS_ARG,
+            self._stream,
+            True,
+            count,
+            start,
+            True,
+        )
+
+
+class StreamFeed:
+    """
+    Pushes new stream items to any number of listeners. A single StreamWatcher
+    per (chain, stream) reads the node, so the node load doesn't grow with the
+    number of listeners. A watcher is started by its first listener and stops
+    once nobody has listened for idle_timeout_ms.
+    """
+
+    def __init__(self, interval_ms: int, buffer_size: int, idle_timeout_ms: int):
+        self._interval = interval_ms / 1000.0
+        self._buffer_size = buffer_size
+        self._idle_timeout = idle_timeout_ms / 1000.0
+        self._watchers = {}
+        self._lock = threading.Lock()
+
+    def wait(
+        self,
+        blockchain_name: str,
+        stream: str,
+        cursor: int,
+        timeout: float,
+        key: str = None,
+        publisher: str = None,
+    ):
+        """
+        Returns the cursor to resume from and a list of (cursor, item) tuples for
+        the items after cursor that have the key and publisher, if provided,
+        waiting up to timeout seconds for at least one of them to appear
+        """
+        deadline = time.monotonic() + timeout
+        watcher = self.__get_watcher(blockchain_name, stream)
+        try:
+            while True:
+                cursor, items = watcher.wait(cursor, deadline - time.monotonic())
+                items = [
+                    (item_cursor, item)
+                    for item_cursor, item in items
+                    if (key is None or key in item.get("keys", []))
+                    and (publisher is None or publisher in item.get("publishers", []))
+                ]
+                if items or time.monotonic() >= deadline:
+                    return cursor, items
+        finally:
+            watcher.remove_listener()
+
+    def remove_if_idle(self, watcher: StreamWatcher):
+        """
+        Forgets the watcher if nobody has listened to it for idle_timeout_ms and
+        returns true if it was forgotten
+        """
+        with self._lock:
+            if not watcher.is_idle(self._idle_timeout):
+                return False
+            for watcher_key, other_watcher in list(self._watchers.items()):
+                if other_watcher is watcher:
+                    del self._watchers[watcher_key]
+            return True
+
+    def __get_watcher(self, blockchain_name: str, stream: str):
+        """
+        Returns the watcher of the stream with a listener added, starting the
+        watcher if the stream isn't watched yet
+        """
+        with self._lock:
+            watcher = self._watchers.get((blockchain_name, stream))
+            if watcher is not None:
+                watcher.add_listener()
+                return watcher
+
+        # Creating a watcher calls the node, so it is done without holding the
+        # lock every listener needs. If several listeners create a watcher for the
+        # same stream, only the first one to be inserted is started and used.
+        #
+        new_watcher = StreamWatcher(
+            self, blockchain_name, stream, self._interval, self._buffer_size
+        )
+        with self._lock:
+            watcher = self._watchers.setdefault((blockchain_name, stream), new_watcher)
+            watcher.add_listener()
+        if watcher is new_watcher:
+            watcher.start()
+        return watcher
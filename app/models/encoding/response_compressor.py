@@ -0,0 +1,62 @@
+import gzip
+import io
+import zlib
+
+from flask import request
+
+from app.config import Config
+
+
+class ResponseCompressor:
+    """
+    Compresses API responses with gzip or deflate when the client accepts it and
+    the body is at least COMPRESSION_MIN_SIZE bytes long
+    """
+
+    ENCODINGS = ["gzip", "deflate"]
+    COMPRESSIBLE_MIMETYPES = {"application/json", "application/msgpack"}
+    UNCOMPRESSED_STATUS_CODES = {204, 304}
+
+    @staticmethod
+    def compress_response(response):
+        """
+        Flask after_request handler compressing the body of the response in place
+        """
+        if (
+            not Config.COMPRESSION_ENABLED
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.content_length is None
+            or response.status_code in ResponseCompressor.UNCOMPRESSED_STATUS_CODES
+            or response.mimetype not in ResponseCompressor.COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if response.content_length < Config.COMPRESSION_MIN_SIZE:
+            return response
+        encoding = request.accept_encodings.best_match(ResponseCompressor.ENCODINGS)
+        if encoding is None:
+            return response
+
+        response.set_data(ResponseCompressor.compress(response.get_data(), encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def compress(data: bytes, encoding: str):
+        """
+        Returns data compressed with the provided encoding. The gzip header
+        carries no timestamp so that equal bodies compress to equal bytes, which
+        strong ETags rely on.
+        """
+        if encoding == "deflate":
+            return zlib.compress(data, Config.COMPRESSION_LEVEL)
+
+        buffer = io.BytesIO()
+        with gzip.GzipFile(
+            fileobj=buffer, mode="wb", compresslevel=Config.COMPRESSION_LEVEL, mtime=0
+        ) as gzip_file:
+            gzip_file.write(data)
+        return buffer.getvalue()
@@ -0,0 +1,130 @@
+import json
+
+import msgpack
+from flask import make_response
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from app.config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def dumps_orjson(data):
+    try:
+        return orjson.dumps(data)
+    except TypeError:
+        # orjson rejects integers wider than 64 bits, which json handles
+        #
+        return dumps_json(data)
+
+
+def dumps_ujson(data):
+    return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False).encode()
+
+
+def dumps_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class ResponseEncoder:
+    """
+    Encodes API responses as JSON, with the fastest JSON library installed, or as
+    MessagePack when the client sends Accept: application/msgpack
+    """
+
+    JSON_MIMETYPE = "application/json"
+    MSGPACK_MIMETYPE = "application/msgpack"
+    JSON_LIBRARIES = {"orjson": orjson, "ujson": ujson, "json": json}
+    JSON_DUMPS = {"orjson": dumps_orjson, "ujson": dumps_ujson, "json": dumps_json}
+
+    @staticmethod
+    def get_json_library(name: str = Config.JSON_ENCODER):
+        """
+        Returns the name of the JSON library to use, the first of orjson, ujson
+        and json that is installed unless a library is named
+        """
+        if name and name != "auto":
+            if name not in ResponseEncoder.JSON_LIBRARIES:
+                raise ValueError("Unknown JSON encoder " + name)
+            if ResponseEncoder.JSON_LIBRARIES[name] is None:
+                raise ValueError("The JSON encoder " + name + " is not installed")
+            return name
+        for library, module in ResponseEncoder.JSON_LIBRARIES.items():
+            if module is not None:
+                return library
+
+    @staticmethod
+    def get_mimetype(accept: str):
+        """
+        Returns the mimetype to answer with given the Accept header of a request,
+        JSON unless the client prefers MessagePack
+        """
+        return parse_accept_header(accept, MIMEAccept).best_match(
+            [ResponseEncoder.JSON_MIMETYPE, ResponseEncoder.MSGPACK_MIMETYPE],
+            default=ResponseEncoder.JSON_MIMETYPE,
+        )
+
+    @staticmethod
+    def encode(data, mimetype: str):
+        """
+        Returns data encoded in the provided mimetype
+        """
+        if mimetype == ResponseEncoder.MSGPACK_MIMETYPE:
+            return ResponseEncoder.dumps_msgpack(data)
+        return ResponseEncoder.dumps_json(data)
+
+    @staticmethod
+    def dumps_json(data):
+        """
+        Returns data encoded as compact UTF-8 JSON
+        """
+        return ResponseEncoder.JSON_DUMPS[JSON_LIBRARY](data)
+
+    @staticmethod
+    def dumps_msgpack(data):
+        """
+        Returns data encoded as MessagePack, with strings as the str type
+        """
+        return msgpack.packb(data, use_bin_type=True)
+
+    @staticmethod
+    def output_json(data, code, headers=None):
+        """
+        flask_restplus representation of application/json
+        """
+        response = make_response(ResponseEncoder.dumps_json(data), code)
+        response.headers.extend(headers or {})
+        return response
+
+    @staticmethod
+    def output_msgpack(data, code, headers=None):
+        """
+        flask_restplus representation of application/msgpack
+        """
+        response = make_response(ResponseEncoder.dumps_msgpack(data), code)
+        response.headers.extend(headers or {})
+        return response
+
+    @staticmethod
+    def accept_msgpack(namespace):
+        """
+        Lets the resources of a namespace answer in MessagePack when the client
+        prefers it. Other clients, and errors, still get JSON.
+        """
+        for resource, urls, kwargs in namespace.resources:
+            resource.representations = {
+                ResponseEncoder.JSON_MIMETYPE: ResponseEncoder.output_json,
+                ResponseEncoder.MSGPACK_MIMETYPE: ResponseEncoder.output_msgpack,
+            }
+
+
+JSON_LIBRARY = ResponseEncoder.get_json_library()
@@ -0,0 +1,109 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.models.encryption.encryption_controller import EncrytpionController
+
+
+def decrypt_entries(private_key: str, entries: list):
+    """
+    Decrypts (enc_data, enc_symmetric_key, symmetric_key) entries with the private
+    key and returns a (plain_text, error) pair for each of them, error being None
+    on success. Entries hold either the secret key encrypted for the private key
+    or, for group keys that were already decrypted, the secret key itself. The
+    encrypted values can be memoryviews of a decoded envelope, they are only
+    copied here because PyNaCl takes bytes.
+    Defined at module level so that process pool workers can run it.
+    """
+    encryption_controller = EncrytpionController(private_key)
+    results = []
+    for enc_data, enc_symmetric_key, symmetric_key in entries:
+        try:
+            if symmetric_key is None:
+                symmetric_key = encryption_controller.decrypt_symmetric_key(
+                    bytes(enc_symmetric_key)
+                )
+            plain_text = encryption_controller.decrypt_data_with_key(
+                bytes(enc_data), symmetric_key
+            )
+            results.append((plain_text, None))
+        except Exception as err:
+            results.append((None, str(err) or type(err).__name__))
+    return results
+
+
+class BatchDecryptor:
+    """
+    Decrypts batches of items with EncrytpionController on a pool of workers.
+    libsodium runs without the GIL, so threads decrypt in parallel. A process
+    pool is used instead, if process_min_bytes isn't 0, once a batch holds at
+    least process_min_bytes of encrypted data, so that the copies PyNaCl makes
+    of large buffers, which hold the GIL, don't stall the threads serving
+    requests. Batches are split in contiguous chunks, one per worker, and the
+    results keep the order of the entries.
+    """
+
+    def __init__(self, max_workers: int, min_batch_size: int, process_min_bytes: int):
+        self._max_workers = max_workers
+        self._min_batch_size = min_batch_size
+        self._process_min_bytes = process_min_bytes
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+
+    def decrypt(self, private_key: str, entries: list):
+        """
+        Returns a (plain_text, error) pair for each entry, see decrypt_entries, so
+        that an entry that can't be decrypted doesn't fail the batch
+        """
+        if self._max_workers <= 1 or len(entries) < self._min_batch_size:
+            return decrypt_entries(private_key, entries)
+
+        size = sum(len(entry[0]) for entry in entries)
+        if self._process_min_bytes and size >= self._process_min_bytes:
+            executor = self.__get_process_pool()
+
+            # Memoryviews can't be sent to other processes
+            #
+            entries = [
+                tuple(
+                    bytes(value) if isinstance(value, memoryview) else value
+                    for value in entry
+                )
+                for entry in entries
+            ]
+        else:
+            executor = self.__get_thread_pool()
+
+        chunk_size = -(-len(entries) // self._max_workers)
+        futures = [
+            executor.submit(
+                decrypt_entries, private_key, entries[start : start + chunk_size]
+            )
+            for start in range(0, len(entries), chunk_size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def __get_thread_pool(self):
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="decryptor"
+                )
+            return self._thread_pool
+
+    def __get_process_pool(self):
+        with self._lock:
+            if self._process_pool is None:
+                # Forking a server worker while another of its threads holds a
+                # lock could leave the lock held in the child, so workers are
+                # forked from a single-threaded fork server instead
+                #
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._process_pool
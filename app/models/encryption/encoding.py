@@ -0,0 +1,15 @@
+import base64
+
+
+def to_base64(value: bytes):
+    """
+    Returns the bytes base64 encoded, as a string
+    """
+    return base64.b64encode(value).decode()
+
+
+def to_text(public_key):
+    """
+    Returns the encoded public key as a string
+    """
+    return public_key.decode() if isinstance(public_key, bytes) else public_key
@@ -1,7 +1,11 @@
+import functools
+
+import nacl.bindings
 import nacl.secret
 import nacl.utils
 from nacl.public import PrivateKey, SealedBox, PublicKey
 
+from app.config import Config
 from app.models.encryption.asymmetric_key_pair import AsymmetricKeyPair
 from app.models.encryption.encoded_asymmetric_key_pair import EncodedAsymmetricKeyPair
 from app.models.encryption.key_data import KeyData
@@ -10,6 +14,9 @@ KEY_ENCODING = nacl.encoding.Base64Encoder
 
 
 class EncrytpionController:
+    STREAM_HEADER_SIZE = nacl.bindings.crypto_secretstream_xchacha20poly1305_HEADERBYTES
+    STREAM_CHUNK_OVERHEAD = nacl.bindings.crypto_secretstream_xchacha20poly1305_ABYTES
+
     def __init__(self, private_key: str = None):
         """
         If private key is None that means it is the first user (Admin)
@@ -22,6 +29,7 @@ class EncrytpionController:
 
         self._user_private_key = asymmetricKeyPair.get_private_key()
         self._user_public_key = asymmetricKeyPair.get_public_key()
+        self._unseal_box = SealedBox(self._user_private_key)
 
     def get_user_public_key(self):
         """
@@ -29,11 +37,12 @@ class EncrytpionController:
         """
         return self.__encode_key(self._user_public_key)
 
-    def encrypt_data(self, data: str, public_keys: list):
+    def encrypt_data(self, data: str, public_keys: list, include_user: bool = True):
         """
         Generates a random secret key that is used to encrypt the data. The randomly
         generated secret key is then encrypted using the public key of each user that
-        should view the data. The encrypted data as well as a map of public to encrypted
+        should view the data, and of the current user unless include_user is false.
+        The encrypted data as well as a map of public to encrypted
         secret key is returned  
         """
         # Generates a random secret key and encrypts the data provided
@@ -45,6 +54,8 @@ class EncrytpionController:
         # of the public key to encrypted secret key
         # Stores the encrypted symmetric key for each public key provided
         #
+        if include_user:
+            public_keys = public_keys + [self.get_user_public_key()]
         public_key_symmetric_key_map = self.__encrypt_symmetric_key_with_public_keys(
             symmetric_key, public_keys
         )
@@ -59,15 +70,100 @@ class EncrytpionController:
         """
         # Decrypts the encrypted symmetric key
         #
-        unseal_box = SealedBox(self._user_private_key)
-        symmetric_key = unseal_box.decrypt(enc_symmetric_key)
+        symmetric_key = self.decrypt_symmetric_key(enc_symmetric_key)
 
         # Decrypts the data using the symmetric key
         #
+        return self.decrypt_data_with_key(enc_data, symmetric_key)
+
+    def generate_group_key(self, public_keys: list, include_user: bool = True):
+        """
+        Generates a random secret key shared by a group of users, so that data
+        encrypted with it doesn't need a sealed key per user. The secret key is
+        returned along with a map of the public key of each user, and of the
+        current user unless include_user is false, to the encrypted secret key
+        """
+        symmetric_key = self.__generate_symmetric_key()
+        if include_user:
+            public_keys = public_keys + [self.get_user_public_key()]
+        public_key_symmetric_key_map = self.__encrypt_symmetric_key_with_public_keys(
+            symmetric_key, public_keys
+        )
+        return symmetric_key, public_key_symmetric_key_map
+
+    def encrypt_data_with_key(self, data: str, symmetric_key):
+        """
+        Encrypts the data with a secret key returned by generate_group_key
+        """
+        return self.__encrypt_data(data, symmetric_key)
+
+    def decrypt_symmetric_key(self, enc_symmetric_key):
+        """
+        Decrypts a secret key that was encrypted with the public key of the current user
+        """
+        return self._unseal_box.decrypt(enc_symmetric_key)
+
+    def decrypt_data_with_key(self, enc_data: str, symmetric_key):
+        """
+        Decrypts data that was encrypted with the secret key
+        """
         symmetric_box = nacl.secret.SecretBox(symmetric_key)
-        plain_text = symmetric_box.decrypt(enc_data)
+        return symmetric_box.decrypt(enc_data)
 
-        return plain_text
+    def encrypt_stream(self, reader, symmetric_key, chunk_size: int):
+        """
+        Encrypts the content of a binary file object with libsodium secretstream,
+        chunk_size bytes at a time, so that it is never held in memory as a whole.
+        Yields the secretstream header, then each encrypted chunk, the last one
+        being tagged as final so that truncated data is detected on decryption
+        """
+        state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+        yield nacl.bindings.crypto_secretstream_xchacha20poly1305_init_push(
+            state, symmetric_key
+        )
+
+        # The next chunk is read ahead to know which chunk is the last one
+        #
+        chunk = self.__read_chunk(reader, chunk_size)
+        while True:
+            next_chunk = (
+                self.__read_chunk(reader, chunk_size)
+                if len(chunk) == chunk_size
+                else b""
+            )
+            tag = (
+                nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_MESSAGE
+                if next_chunk
+                else nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_FINAL
+            )
+            yield nacl.bindings.crypto_secretstream_xchacha20poly1305_push(
+                state, chunk, tag=tag
+            )
+            if not next_chunk:
+                return
+            chunk = next_chunk
+
+    def decrypt_stream(self, enc_chunks, symmetric_key, header: bytes):
+        """
+        Decrypts the chunks yielded by encrypt_stream after the header and yields
+        their plain text. Raises a ValueError if a chunk was tampered with or the
+        chunks end before the final one
+        """
+        state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+        nacl.bindings.crypto_secretstream_xchacha20poly1305_init_pull(
+            state, header, symmetric_key
+        )
+        for enc_chunk in enc_chunks:
+            try:
+                chunk, tag = nacl.bindings.crypto_secretstream_xchacha20poly1305_pull(
+                    state, enc_chunk
+                )
+            except RuntimeError:
+                raise ValueError("A chunk of the encrypted data failed verification")
+            yield chunk
+            if tag == nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_FINAL:
+                return
+        raise ValueError("The encrypted data is truncated")
 
     def generate_asymetric_key_pair(self):
         """
@@ -87,7 +183,6 @@ class EncrytpionController:
         a map of public keys to their corresponding encrytped symmetric key
         """
         public_key_symmetric_key_map = {}
-        encoded_public_keys.append(self.__encode_key(self._user_public_key))
         for encoded_public_key in encoded_public_keys:
             public_key_symmetric_key_map[
                 encoded_public_key
@@ -96,6 +191,21 @@ class EncrytpionController:
             )
         return public_key_symmetric_key_map
 
+    def __read_chunk(self, reader, chunk_size: int):
+        """
+        Reads chunk_size bytes from a binary file object, or less at the end of it.
+        Request streams can return less than what is asked before their end.
+        """
+        parts = []
+        remaining = chunk_size
+        while remaining > 0:
+            part = reader.read(remaining)
+            if not part:
+                break
+            parts.append(part)
+            remaining -= len(part)
+        return b"".join(parts)
+
     def __encode_key(self, key):
         """
         returns an encoded verison of the key passed in. The key is encoded using
@@ -103,13 +213,6 @@ class EncrytpionController:
         """
         return key.encode(encoder=KEY_ENCODING)
 
-    def __decode_key(self, key_type, key):
-        """
-        Returns an key object that represents the key provided. The key is decoded
-        using the default encoding
-        """
-        return key_type(key, encoder=KEY_ENCODING)
-
     def __generate_symmetric_key(self):
         """
         Returns a randomly generated symmetric key
@@ -133,11 +236,21 @@ class EncrytpionController:
         Returns an encrypted symmetric key that has been encrypted using the provided
         public key
         """
-        public_key = self.__decode_key(PublicKey, encoded_public_key)
-        user_box = SealedBox(public_key)
+        user_box = EncrytpionController.__get_sealed_box(encoded_public_key)
         enc_key = user_box.encrypt(symmetric_key)
         return enc_key
 
+    @staticmethod
+    @functools.lru_cache(maxsize=Config.ENCRYPTION_KEY_CACHE_SIZE)
+    def __get_sealed_box(encoded_public_key):
+        """
+        Returns the sealed box of the encoded public key. The last
+        ENCRYPTION_KEY_CACHE_SIZE boxes are kept so that the public keys of
+        recipients that were already seen aren't decoded again on every publish
+        """
+        public_key = PublicKey(encoded_public_key, encoder=KEY_ENCODING)
+        return SealedBox(public_key)
+
     def __generate_asymetric_key_pair(self):
         """
         Returns a randomly generated asymmetric key pair. 
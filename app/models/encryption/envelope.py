@@ -0,0 +1,261 @@
+import base64
+import functools
+import hashlib
+import struct
+
+import nacl.bindings
+import nacl.secret
+
+from app.config import Config
+from app.models.encryption.encryption_controller import EncrytpionController
+from app.models.encryption.group_key_data import GroupKeyData
+from app.models.encryption.key_data import KeyData
+
+
+class Envelope:
+    """
+    Versioned binary encoding of KeyData and GroupKeyData, published as raw data
+    instead of JSON. Every envelope starts with a header made of MAGIC, the
+    version and the kind of envelope, followed for KEYS_KIND by
+
+        recipient count (uint16) | count x (fingerprint | sealed key) | ciphertext
+
+    where the fingerprint is a short hash of the public key of the recipient
+    rather than the key itself, for GROUP_KEY_KIND by
+
+        group key ID | key stream length (uint8) | key stream | ciphertext
+
+    and for STREAM_KIND, data encrypted by EncrytpionController.encrypt_stream, by
+
+        recipient count (uint16) | count x (fingerprint | sealed key) |
+        chunk size (uint32) | secretstream header | encrypted chunks
+
+    Decoding doesn't copy the envelope, the sealed keys and the ciphertext are
+    memoryviews of the buffer.
+    """
+
+    MAGIC = b"TE"
+    VERSION = 1
+    KEYS_KIND = 1
+    GROUP_KEY_KIND = 2
+    STREAM_KIND = 3
+    HEADER_SIZE = len(MAGIC) + 2
+    RECIPIENT_COUNT_SIZE = 2
+    STREAM_PREFIX_SIZE = HEADER_SIZE + RECIPIENT_COUNT_SIZE
+    CHUNK_SIZE_SIZE = 4
+    FINGERPRINT_SIZE = 8
+    SEALED_KEY_SIZE = (
+        nacl.bindings.crypto_box_SEALBYTES + nacl.secret.SecretBox.KEY_SIZE
+    )
+    RECIPIENT_SIZE = FINGERPRINT_SIZE + SEALED_KEY_SIZE
+    MAX_RECIPIENTS = 2 ** 16 - 1
+    MAX_KEY_STREAM_SIZE = 2 ** 8 - 1
+    MAX_CHUNK_SIZE = 2 ** 32 - 1
+
+    @staticmethod
+    def encode(key_data):
+        """
+        Returns the envelope of KeyData or GroupKeyData
+        """
+        if isinstance(key_data, GroupKeyData):
+            group_key_id = bytes.fromhex(key_data.get_group_key_id())
+            if len(group_key_id) != GroupKeyData.GROUP_KEY_ID_SIZE:
+                raise ValueError("Invalid group key ID")
+
+            key_stream = key_data.get_key_stream().encode()
+            if len(key_stream) > Envelope.MAX_KEY_STREAM_SIZE:
+                raise ValueError("The key stream name is too long")
+
+            return b"".join(
+                [
+                    Envelope.__get_header(Envelope.GROUP_KEY_KIND),
+                    group_key_id,
+                    struct.pack(">B", len(key_stream)),
+                    key_stream,
+                    key_data.get_encypted_data(),
+                ]
+            )
+
+        parts = [Envelope.__get_header(Envelope.KEYS_KIND)]
+        parts.extend(
+            Envelope.__encode_recipients(key_data.get_public_key_symmetric_key_map())
+        )
+        parts.append(key_data.get_encypted_data())
+        return b"".join(parts)
+
+    @staticmethod
+    def encode_stream_header(
+        public_key_symmetric_key_map: dict, chunk_size: int, stream_header: bytes
+    ):
+        """
+        Returns the start of a STREAM_KIND envelope, which the encrypted chunks
+        follow
+        """
+        if not 0 < chunk_size <= Envelope.MAX_CHUNK_SIZE:
+            raise ValueError("Invalid chunk size")
+
+        parts = [Envelope.__get_header(Envelope.STREAM_KIND)]
+        parts.extend(Envelope.__encode_recipients(public_key_symmetric_key_map))
+        parts.append(struct.pack(">I", chunk_size))
+        parts.append(stream_header)
+        return b"".join(parts)
+
+    @staticmethod
+    def decode(buffer):
+        """
+        Returns the KeyData or GroupKeyData of an envelope, or None if the buffer
+        doesn't hold one. The public key map of the KeyData is keyed by the
+        fingerprints of the public keys, see get_fingerprint.
+        """
+        view = memoryview(buffer)
+        kind = Envelope.__get_kind(view)
+        offset = Envelope.HEADER_SIZE
+        if kind == Envelope.KEYS_KIND:
+            recipients = Envelope.__decode_recipients(view, offset)
+            if recipients is None:
+                return None
+            fingerprint_symmetric_key_map, end = recipients
+            return KeyData(fingerprint_symmetric_key_map, view[end:])
+
+        if kind == Envelope.GROUP_KEY_KIND:
+            key_stream_offset = offset + GroupKeyData.GROUP_KEY_ID_SIZE + 1
+            if len(view) < key_stream_offset:
+                return None
+            key_stream_size = view[key_stream_offset - 1]
+            end = key_stream_offset + key_stream_size
+            if len(view) < end:
+                return None
+
+            return GroupKeyData(
+                view[offset : key_stream_offset - 1].hex(),
+                view[key_stream_offset:end].tobytes().decode(),
+                view[end:],
+            )
+        return None
+
+    @staticmethod
+    def get_stream_header_size(prefix):
+        """
+        Returns the size of the start of a STREAM_KIND envelope, up to the
+        encrypted chunks, given its first STREAM_PREFIX_SIZE bytes, or None if
+        they aren't the start of one
+        """
+        view = memoryview(prefix)
+        if (
+            Envelope.__get_kind(view) != Envelope.STREAM_KIND
+            or len(view) < Envelope.STREAM_PREFIX_SIZE
+        ):
+            return None
+        (count,) = struct.unpack_from(">H", view, Envelope.HEADER_SIZE)
+        return (
+            Envelope.STREAM_PREFIX_SIZE
+            + count * Envelope.RECIPIENT_SIZE
+            + Envelope.CHUNK_SIZE_SIZE
+            + EncrytpionController.STREAM_HEADER_SIZE
+        )
+
+    @staticmethod
+    def decode_stream_header(buffer):
+        """
+        Returns the (fingerprint to sealed key map, chunk size, secretstream
+        header) of the start of a STREAM_KIND envelope, or None
+        """
+        view = memoryview(buffer)
+        if Envelope.__get_kind(view) != Envelope.STREAM_KIND:
+            return None
+        recipients = Envelope.__decode_recipients(view, Envelope.HEADER_SIZE)
+        if recipients is None:
+            return None
+
+        fingerprint_symmetric_key_map, offset = recipients
+        header_offset = offset + Envelope.CHUNK_SIZE_SIZE
+        end = header_offset + EncrytpionController.STREAM_HEADER_SIZE
+        if len(view) < end:
+            return None
+        (chunk_size,) = struct.unpack_from(">I", view, offset)
+        return (
+            fingerprint_symmetric_key_map,
+            chunk_size,
+            view[header_offset:end].tobytes(),
+        )
+
+    @staticmethod
+    def decode_hex(data: str):
+        """
+        Returns the KeyData or GroupKeyData of an envelope published as raw data,
+        which MultiChain returns as a hex string, or None
+        """
+        try:
+            return Envelope.decode(bytes.fromhex(data))
+        except ValueError:
+            return None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=Config.ENCRYPTION_KEY_CACHE_SIZE)
+    def get_fingerprint(public_key):
+        """
+        Returns the fingerprint of a base64 encoded public key. The fingerprints
+        of the last ENCRYPTION_KEY_CACHE_SIZE keys are kept, like their sealed
+        boxes in EncrytpionController
+        """
+        return hashlib.blake2b(
+            base64.b64decode(public_key), digest_size=Envelope.FINGERPRINT_SIZE
+        ).digest()
+
+    @staticmethod
+    def __get_header(kind: int):
+        return Envelope.MAGIC + struct.pack(">BB", Envelope.VERSION, kind)
+
+    @staticmethod
+    def __get_kind(view: memoryview):
+        """
+        Returns the kind of envelope, or None if the view doesn't start with the
+        header of a supported version
+        """
+        if (
+            len(view) < Envelope.HEADER_SIZE
+            or view[: len(Envelope.MAGIC)] != Envelope.MAGIC
+            or view[len(Envelope.MAGIC)] != Envelope.VERSION
+        ):
+            return None
+        return view[len(Envelope.MAGIC) + 1]
+
+    @staticmethod
+    def __encode_recipients(public_key_symmetric_key_map: dict):
+        """
+        Returns the parts of an envelope holding the recipient count, then the
+        fingerprint and sealed key of each recipient
+        """
+        if len(public_key_symmetric_key_map) > Envelope.MAX_RECIPIENTS:
+            raise ValueError("Too many recipients")
+
+        parts = [struct.pack(">H", len(public_key_symmetric_key_map))]
+        for public_key, enc_key in public_key_symmetric_key_map.items():
+            if len(enc_key) != Envelope.SEALED_KEY_SIZE:
+                raise ValueError("Invalid sealed key")
+            parts.append(Envelope.get_fingerprint(public_key))
+            parts.append(enc_key)
+        return parts
+
+    @staticmethod
+    def __decode_recipients(view: memoryview, offset: int):
+        """
+        Returns the map of fingerprints to sealed keys of the recipients starting
+        at offset, and the offset that follows them, or None if the view is too
+        short
+        """
+        if len(view) < offset + Envelope.RECIPIENT_COUNT_SIZE:
+            return None
+        (count,) = struct.unpack_from(">H", view, offset)
+        offset += Envelope.RECIPIENT_COUNT_SIZE
+        end = offset + count * Envelope.RECIPIENT_SIZE
+        if len(view) < end:
+            return None
+
+        fingerprint_symmetric_key_map = {}
+        for start in range(offset, end, Envelope.RECIPIENT_SIZE):
+            fingerprint = view[start : start + Envelope.FINGERPRINT_SIZE]
+            fingerprint_symmetric_key_map[fingerprint.tobytes()] = view[
+                start + Envelope.FINGERPRINT_SIZE : start + Envelope.RECIPIENT_SIZE
+            ]
+        return fingerprint_symmetric_key_map, end
@@ -0,0 +1,91 @@
+import base64
+
+from app.models.encryption.encoding import to_base64, to_text
+from app.models.encryption.key_data import KeyData
+
+
+class GroupKeyData:
+    """
+    Data encrypted with a group key. Instead of the key itself the item only
+    holds the ID of the group key and the stream it was distributed in, where
+    the key is published once, sealed for each member of the group.
+    """
+
+    GROUP_KEY_ID_FIELD = "groupKeyId"
+    KEY_STREAM_FIELD = "keyStream"
+    ENCRYPTED_DATA_FIELD = KeyData.ENCRYPTED_DATA_FIELD
+    GROUP_KEY_ID_SIZE = 16
+
+    def __init__(self, group_key_id: str, key_stream: str, enc_data):
+        self._group_key_id = group_key_id
+        self._key_stream = key_stream
+        self._enc_data = enc_data
+
+    def get_group_key_id(self):
+        return self._group_key_id
+
+    def get_key_stream(self):
+        return self._key_stream
+
+    def get_encypted_data(self):
+        return self._enc_data
+
+    def to_dict(self):
+        """
+        Returns the group key data as a JSON object, with the encrypted data
+        base64 encoded
+        """
+        return {
+            GroupKeyData.GROUP_KEY_ID_FIELD: self._group_key_id,
+            GroupKeyData.KEY_STREAM_FIELD: self._key_stream,
+            GroupKeyData.ENCRYPTED_DATA_FIELD: to_base64(self._enc_data),
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Returns the group key data of a JSON object created by to_dict, or None if
+        the object doesn't hold group key data
+        """
+        if not isinstance(data, dict) or not all(
+            isinstance(data.get(field), str)
+            for field in (
+                GroupKeyData.GROUP_KEY_ID_FIELD,
+                GroupKeyData.KEY_STREAM_FIELD,
+                GroupKeyData.ENCRYPTED_DATA_FIELD,
+            )
+        ):
+            return None
+        return GroupKeyData(
+            data[GroupKeyData.GROUP_KEY_ID_FIELD],
+            data[GroupKeyData.KEY_STREAM_FIELD],
+            base64.b64decode(data[GroupKeyData.ENCRYPTED_DATA_FIELD]),
+        )
+
+    @staticmethod
+    def keys_to_dict(public_key_symmetric_key_map: dict):
+        """
+        Returns the JSON object published in the key stream for a group key, the
+        map of public keys to the encrypted group key, base64 encoded
+        """
+        return {
+            KeyData.ENCRYPTED_KEYS_FIELD: {
+                to_text(public_key): to_base64(enc_key)
+                for public_key, enc_key in public_key_symmetric_key_map.items()
+            }
+        }
+
+    @staticmethod
+    def keys_from_dict(data):
+        """
+        Returns the map of public keys to the encrypted group key of a JSON object
+        created by keys_to_dict, or None if the object doesn't hold one
+        """
+        if not isinstance(data, dict) or not isinstance(
+            data.get(KeyData.ENCRYPTED_KEYS_FIELD), dict
+        ):
+            return None
+        return {
+            public_key: base64.b64decode(enc_key)
+            for public_key, enc_key in data[KeyData.ENCRYPTED_KEYS_FIELD].items()
+        }
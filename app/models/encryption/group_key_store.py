@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class GroupKeyStore:
+    """
+    Keeps the group keys used to encrypt items, one per (chain, key stream,
+    recipient set), and the group keys readers decrypted, the last max_entries
+    of each. A group key stops being used for new items once it is older than
+    the rotation interval, and a different recipient set always gets its own
+    key, so that removed members can't read new items.
+    """
+
+    def __init__(self, rotation_interval_ms: int, max_entries: int):
+        self._rotation_interval = rotation_interval_ms / 1000.0
+        self._max_entries = max_entries
+        self._group_keys = OrderedDict()
+        self._group_locks = {}
+        self._member_keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(
+        self, blockchain_name: str, key_stream: str, members: frozenset, create
+    ):
+        """
+        Returns the (group key ID, group key) pair of the recipient set, calling
+        create to generate and distribute a new one if there is none yet or it
+        is due for rotation. Concurrent publishes to the same recipient set wait
+        for a single key to be created.
+        """
+        group = (blockchain_name, key_stream, members)
+        with self._lock:
+            group_lock = self._group_locks.setdefault(group, threading.Lock())
+
+        with group_lock:
+            with self._lock:
+                entry = self._group_keys.get(group)
+                if entry is not None and not self.__is_due(entry[2]):
+                    self._group_keys.move_to_end(group)
+                    return entry[0], entry[1]
+
+            try:
+                key_id, key = create()
+            except Exception:
+                # The lock would otherwise be kept forever for a recipient set
+                # whose key couldn't be created. A group with a key keeps its
+                # lock until the key is evicted.
+                #
+                with self._lock:
+                    if group not in self._group_keys:
+                        self._group_locks.pop(group, None)
+                raise
+
+            with self._lock:
+                self._group_keys[group] = (key_id, key, time.monotonic())
+                self._group_keys.move_to_end(group)
+                while len(self._group_keys) > self._max_entries:
+                    evicted, _ = self._group_keys.popitem(last=False)
+                    self._group_locks.pop(evicted, None)
+            return key_id, key
+
+    def get_member_key(
+        self, blockchain_name: str, key_stream: str, key_id: str, public_key: str
+    ):
+        """
+        Returns the group key the member with the public key decrypted, or None
+        """
+        member = (blockchain_name, key_stream, key_id, public_key)
+        with self._lock:
+            key = self._member_keys.get(member)
+            if key is not None:
+                self._member_keys.move_to_end(member)
+            return key
+
+    def put_member_key(
+        self,
+        blockchain_name: str,
+        key_stream: str,
+        key_id: str,
+        public_key: str,
+        key: bytes,
+    ):
+        """
+        Keeps the group key the member with the public key decrypted
+        """
+        member = (blockchain_name, key_stream, key_id, public_key)
+        with self._lock:
+            self._member_keys[member] = key
+            self._member_keys.move_to_end(member)
+            while len(self._member_keys) > self._max_entries:
+                self._member_keys.popitem(last=False)
+
+    def __is_due(self, created: float):
+        """
+        Returns true if a group key created at the monotonic time is due for
+        rotation. A rotation interval of 0 disables rotation on a schedule.
+        """
+        return (
+            self._rotation_interval > 0
+            and time.monotonic() - created >= self._rotation_interval
+        )
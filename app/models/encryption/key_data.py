@@ -1,4 +1,12 @@
+import base64
+
+from app.models.encryption.encoding import to_base64, to_text
+
+
 class KeyData:
+    ENCRYPTED_KEYS_FIELD = "encryptedKeys"
+    ENCRYPTED_DATA_FIELD = "encryptedData"
+
     def __init__(self, public_key_symmetric_key_map, enc_data):
         self._public_key_symmetric_key_map = public_key_symmetric_key_map
         self._enc_data = enc_data
@@ -8,3 +16,36 @@ class KeyData:
 
     def get_encypted_data(self):
         return self._enc_data
+
+    def to_dict(self):
+        """
+        Returns the key data as a JSON object, with the encrypted symmetric keys
+        and data base64 encoded
+        """
+        return {
+            KeyData.ENCRYPTED_KEYS_FIELD: {
+                to_text(public_key): to_base64(enc_key)
+                for public_key, enc_key in self._public_key_symmetric_key_map.items()
+            },
+            KeyData.ENCRYPTED_DATA_FIELD: to_base64(self._enc_data),
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Returns the key data of a JSON object created by to_dict, or None if the
+        object doesn't hold key data
+        """
+        if (
+            not isinstance(data, dict)
+            or not isinstance(data.get(KeyData.ENCRYPTED_KEYS_FIELD), dict)
+            or not isinstance(data.get(KeyData.ENCRYPTED_DATA_FIELD), str)
+        ):
+            return None
+        return KeyData(
+            {
+                public_key: base64.b64decode(enc_key)
+                for public_key, enc_key in data[KeyData.ENCRYPTED_KEYS_FIELD].items()
+            },
+            base64.b64decode(data[KeyData.ENCRYPTED_DATA_FIELD]),
+        )
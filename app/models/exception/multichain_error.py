@@ -2,24 +2,46 @@ import json
 
 
 class MultiChainError(Exception):
-    def __init__(self, message: str):
-        super().__init__(message.decode())
-        self.message_parts = self.__initialize_message_parts(message.decode())
+    def __init__(self, message, code=None, multichain_parameters=None):
+        if isinstance(message, bytes):
+            message = message.decode()
+        super().__init__(message)
+        self.message_parts = self.__initialize_message_parts(message)
+        self._code = code
+        self._multichain_parameters = multichain_parameters
+
+    @classmethod
+    def from_rpc_error(cls, error: dict, method: str, params: list):
+        """
+        Builds an error from the structured error object returned by the
+        MultiChain JSON-RPC interface, e.g. {"code": -708, "message": "..."}
+        """
+        return cls(
+            str(error.get("message", "")),
+            code=str(error.get("code", "N/A")),
+            multichain_parameters={"method": method, "params": params},
+        )
 
     def __initialize_message_parts(self, message: str):
         return list(filter(None, message.split("\n")))
 
     def get_error_code(self):
+        if self._code is not None:
+            return self._code
         if not any("error code:" in part.lower() for part in self.message_parts):
             return "N/A"
         return self.message_parts[1].split(": ")[1]
 
     def get_error_message(self):
+        if self._code is not None:
+            return "\n".join(self.message_parts)
         if "error:" in self.message_parts[0].lower():
             return self.message_parts[0].split(": ")[1]
         return "\n".join(self.message_parts[3:])
 
     def get_multichain_parameters(self):
+        if self._multichain_parameters is not None:
+            return self._multichain_parameters
         if not any("method" in part.lower() for part in self.message_parts):
             return "N/A"
         return json.loads(self.message_parts[0])
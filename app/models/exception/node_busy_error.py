@@ -0,0 +1,17 @@
+from app.models.exception.multichain_error import MultiChainError
+
+
+class NodeBusyError(MultiChainError):
+    """
+    Raised when a node call had to wait too long for one of the call slots of
+    its blockchain. The call was never sent to the node.
+    """
+
+    def __init__(self, blockchain_name: str, method: str, params: list):
+        super().__init__(
+            "Too many calls are in progress on blockchain "
+            + blockchain_name
+            + ", try again later",
+            code="N/A",
+            multichain_parameters={"method": method, "params": params},
+        )
@@ -0,0 +1,17 @@
+from app.models.exception.multichain_error import MultiChainError
+
+
+class NodeTimeoutError(MultiChainError):
+    """
+    Raised when a node call or MultiChain command doesn't finish within the
+    timeout of its method. The call has been abandoned and, for a command,
+    its process has been killed.
+    """
+
+    def __init__(self, method: str, params: list, timeout: float):
+        super().__init__(
+            method + " did not finish within " + str(timeout) + " seconds",
+            code="N/A",
+            multichain_parameters={"method": method, "params": params},
+        )
+        self.timeout = timeout
@@ -0,0 +1,587 @@
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from app.config import Config
+from app.models.client.multichain_client import MultiChainClient
+from app.models.configuration.configuration_controller import ConfigurationController
+from app.models.exception.multichain_error import MultiChainError
+
+logger = logging.getLogger(__name__)
+
+
+class StreamIndex:
+    """
+    Local SQLite index of the items of every subscribed stream, by key and by
+    publisher, along with the latest item of every key. The indexer tails each
+    stream with liststreamitems and only stores confirmed items, in chain order,
+    so a stream is caught up once every confirmed item the node knows about has
+    been indexed. Queries answer from the index only while the stream is caught
+    up, with the unconfirmed items that follow read from the node.
+    """
+
+    INDEX_FILE = "talos_index.sqlite"
+    LOCK_FILE_SUFFIX = ".lock"
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_ITEMS_ARG = "liststreamitems"
+    GET_BLOCK_ARG = "getblock"
+    GET_BLOCK_COUNT_ARG = "getblockcount"
+    ALL_STREAMS_COUNT = 2 ** 31 - 1
+    ITEMS_FIELD = "items"
+    CONFIRMED_ITEMS_FIELD = "confirmed"
+    # Row of the progress table recording that latest_items was built, which
+    # can't clash with a stream since chain names can't be empty
+    #
+    LATEST_ITEMS_PROGRESS = ("", "latest_items")
+    NON_VERBOSE_FIELDS = (
+        "publishers",
+        "keys",
+        "offchain",
+        "available",
+        "data",
+        "confirmations",
+        "blocktime",
+        "txid",
+    )
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            chain TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            txid TEXT NOT NULL,
+            vout INTEGER,
+            blocktime INTEGER,
+            blockheight INTEGER,
+            item TEXT NOT NULL,
+            PRIMARY KEY (chain, stream, position)
+        );
+        CREATE TABLE IF NOT EXISTS item_keys (
+            chain TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            key TEXT NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS item_keys_lookup
+            ON item_keys (chain, stream, key, position);
+        CREATE TABLE IF NOT EXISTS item_publishers (
+            chain TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            publisher TEXT NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS item_publishers_lookup
+            ON item_publishers (chain, stream, publisher, position);
+        CREATE TABLE IF NOT EXISTS latest_items (
+            chain TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            key TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (chain, stream, key)
+        );
+        CREATE TABLE IF NOT EXISTS progress (
+            chain TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (chain, stream)
+        );
+    """
+
+    def __init__(self, path: str = None):
+        self._path = (
+            path
+            or Config.STREAM_INDEX_PATH
+            or os.path.join(MultiChainClient.get_data_dir(), StreamIndex.INDEX_FILE)
+        )
+        self._local = threading.local()
+        self._block_heights = {}
+        self._thread = None
+        self._lock_file = None
+        self._stop = threading.Event()
+        self.__get_connection().executescript(StreamIndex.SCHEMA)
+        self.__fill_latest_items()
+
+    def start(self):
+        """
+        Starts tailing the subscribed streams of every blockchain in a daemon thread
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self.run, name="stream-indexer", daemon=True
+        )
+        self._thread.start()
+
+    def try_lock(self):
+        """
+        Returns true if this process holds the indexer lock of the index file,
+        taking it if no other process does, so that only one of the server
+        workers runs the indexer. The lock is released when the process exits.
+        """
+        if self._lock_file is not None:
+            return True
+        lock_file = open(self._path + StreamIndex.LOCK_FILE_SUFFIX, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def after_fork(self):
+        """
+        Stops the forked process from using the SQLite connections of its parent.
+        The indexer thread keeps running in the parent only.
+        """
+        self._local = threading.local()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """
+        Indexes new items of every subscribed stream until stopped
+        """
+        while not self._stop.is_set():
+            for blockchain_name in ConfigurationController.get_blockchains():
+                try:
+                    self.sync(blockchain_name)
+                except (MultiChainError, ValueError) as err:
+                    logger.debug("Could not index %s: %s", blockchain_name, err)
+            self._stop.wait(Config.STREAM_INDEX_POLL_INTERVAL_MS / 1000.0)
+
+    def sync(self, blockchain_name: str):
+        """
+        Indexes the confirmed items that were added to the subscribed streams of
+        the blockchain since the last sync
+        """
+        streams = MultiChainClient.call(
+            blockchain_name,
+            StreamIndex.GET_STREAMS_ARG,
+            "*",
+            False,
+            StreamIndex.ALL_STREAMS_COUNT,
+        )
+        for stream in streams:
+            if stream.get("subscribed"):
+                self.__sync_stream(blockchain_name, stream["name"])
+        self._block_heights.clear()
+
+    def is_caught_up(self, blockchain_name: str, stream: str):
+        """
+        Returns true if exactly the confirmed items of the stream known to the
+        node have been indexed. Only confirmed items are indexed, and more of them
+        than the node has means some were orphaned by a reorganization of the
+        chain the indexer hasn't rolled back yet.
+        """
+        return self.__get_unconfirmed_range(blockchain_name, stream) is not None
+
+    def query(
+        self,
+        blockchain_name: str,
+        stream: str,
+        keys: list = None,
+        publishers: list = None,
+        match_all: bool = True,
+        verbose: bool = True,
+    ):
+        """
+        Returns the items of the stream that match all (or, if match_all is false,
+        any) of the provided keys and publishers, in chain order. Returns None if
+        the index hasn't caught up with the stream yet, in which case the caller
+        should ask the node instead.
+        """
+        unconfirmed_range = self.__get_unconfirmed_range(blockchain_name, stream)
+        if unconfirmed_range is None:
+            return None
+
+        criteria = [("item_keys", "key", key) for key in keys or []] + [
+            ("item_publishers", "publisher", publisher)
+            for publisher in publishers or []
+        ]
+        if not criteria:
+            return []
+
+        # Every criterion selects a set of positions, which are then intersected
+        # or united depending on match_all. Items the indexer may have stored
+        # since the unconfirmed items were counted are read from the node below.
+        #
+        selects = []
+        parameters = []
+        for table, column, value in criteria:
+            selects.append(
+                "SELECT position FROM "
+                + table
+                + " WHERE chain = ? AND stream = ? AND "
+                + column
+                + " = ?"
+            )
+            parameters += [blockchain_name, stream, value]
+        operator = " INTERSECT " if match_all else " UNION "
+
+        rows = self.__get_connection().execute(
+            "SELECT item, blockheight FROM items WHERE chain = ? AND stream = ? "
+            + "AND position IN ("
+            + operator.join(selects)
+            + ") AND position < ? ORDER BY position",
+            [blockchain_name, stream] + parameters + [unconfirmed_range[0]],
+        )
+
+        return self.__load_items(blockchain_name, rows, verbose) + [
+            item
+            for item in self.__get_unconfirmed_items(
+                blockchain_name, stream, unconfirmed_range, verbose
+            )
+            if StreamIndex.__matches(item, keys, publishers, match_all)
+        ]
+
+    def get_latest_items(
+        self,
+        blockchain_name: str,
+        stream: str,
+        keys: list = None,
+        prefix: str = "",
+        limit: int = -1,
+    ):
+        """
+        Returns a dict of the latest non-verbose item of each of the keys, or of
+        every key that starts with prefix if no keys are provided, of at most
+        limit keys unless limit is negative. Keys of unconfirmed items get the
+        latest of those, read from the node. Returns None if the index hasn't
+        caught up with the stream yet.
+        """
+        unconfirmed_range = self.__get_unconfirmed_range(blockchain_name, stream)
+        if unconfirmed_range is None:
+            return None
+
+        query = (
+            "SELECT latest_items.key, item, blockheight FROM latest_items "
+            + "JOIN items ON items.chain = latest_items.chain "
+            + "AND items.stream = latest_items.stream "
+            + "AND items.position = latest_items.position "
+            + "WHERE latest_items.chain = ? AND latest_items.stream = ? AND "
+        )
+        if keys:
+            query += "latest_items.key IN (" + ", ".join("?" * len(keys)) + ")"
+            parameters = [blockchain_name, stream] + keys
+        else:
+            query += "substr(latest_items.key, 1, ?) = ?"
+            parameters = [blockchain_name, stream, len(prefix), prefix]
+
+        rows = (
+            self.__get_connection()
+            .execute(query + " ORDER BY latest_items.key LIMIT ?", parameters + [limit])
+            .fetchall()
+        )
+        items = self.__load_items(
+            blockchain_name, [row[1:] for row in rows], verbose=False
+        )
+        latest_items = dict(zip([row[0] for row in rows], items))
+
+        # The unconfirmed items are read after the index, so they are newer than
+        # anything it has stored in the meantime
+        #
+        requested_keys = set(keys or [])
+        for item in self.__get_unconfirmed_items(
+            blockchain_name, stream, unconfirmed_range, False
+        ):
+            for key in item.get("keys", []):
+                if (key in requested_keys) if keys else key.startswith(prefix):
+                    latest_items[key] = item
+        return latest_items
+
+    def __get_unconfirmed_range(self, blockchain_name: str, stream: str):
+        """
+        Returns the position and the count of the unconfirmed items of the
+        stream, which come after its confirmed items, or None if the index
+        hasn't caught up with the stream
+        """
+        streams = MultiChainClient.call(
+            blockchain_name, StreamIndex.GET_STREAMS_ARG, stream
+        )
+        confirmed_count = streams[0].get(StreamIndex.CONFIRMED_ITEMS_FIELD)
+        if (
+            confirmed_count is None
+            or self.__get_position(blockchain_name, stream) != confirmed_count
+        ):
+            return None
+        item_count = streams[0].get(StreamIndex.ITEMS_FIELD, confirmed_count)
+        return confirmed_count, max(item_count - confirmed_count, 0)
+
+    def __get_unconfirmed_items(
+        self, blockchain_name: str, stream: str, unconfirmed_range: tuple, verbose: bool
+    ):
+        position, count = unconfirmed_range
+        if not count:
+            return []
+        return MultiChainClient.call(
+            blockchain_name,
+            StreamIndex.GET_STREAM_ITEMS_ARG,
+            stream,
+            verbose,
+            count,
+            position,
+            False,
+        )
+
+    @staticmethod
+    def __matches(item: dict, keys: list, publishers: list, match_all: bool):
+        """
+        Returns true if the item has all (or, if match_all is false, any) of the
+        keys and publishers
+        """
+        matches = [key in item.get("keys", []) for key in keys or []] + [
+            publisher in item.get("publishers", []) for publisher in publishers or []
+        ]
+        return all(matches) if match_all else any(matches)
+
+    def __load_items(self, blockchain_name: str, rows, verbose: bool):
+        """
+        Decodes (item, blockheight) rows into items whose confirmations are
+        counted from the current block count
+        """
+        block_count = MultiChainClient.call(
+            blockchain_name, StreamIndex.GET_BLOCK_COUNT_ARG
+        )
+        items = []
+        for item, block_height in rows:
+            item = json.loads(item)
+            item["confirmations"] = block_count - block_height + 1
+            if not verbose:
+                item = {
+                    field: item[field]
+                    for field in StreamIndex.NON_VERBOSE_FIELDS
+                    if field in item
+                }
+            items.append(item)
+        return items
+
+    def __sync_stream(self, blockchain_name: str, stream: str):
+        position = self.__get_position(blockchain_name, stream)
+        common_position = self.__get_common_position(blockchain_name, stream, position)
+        if common_position < position:
+            logger.info(
+                "Rolling back %d items of %s on %s orphaned by a reorganization",
+                position - common_position,
+                stream,
+                blockchain_name,
+            )
+            self.__rollback(blockchain_name, stream, common_position)
+            position = common_position
+
+        page_size = Config.STREAM_INDEX_PAGE_SIZE
+        while True:
+            items = MultiChainClient.call(
+                blockchain_name,
+                StreamIndex.GET_STREAM_ITEMS_ARG,
+                stream,
+                True,
+                page_size,
+                position,
+                False,
+            )
+
+            # Unconfirmed items come last in chain order and may still move, so
+            # indexing stops at the first one
+            #
+            confirmed_items = []
+            for item in items:
+                if not item.get("blockhash"):
+                    break
+                confirmed_items.append(item)
+
+            if confirmed_items:
+                self.__store(blockchain_name, stream, position, confirmed_items)
+                position += len(confirmed_items)
+
+            if len(confirmed_items) < page_size:
+                return
+
+    def __store(self, blockchain_name: str, stream: str, position: int, items: list):
+        connection = self.__get_connection()
+        with connection:
+            for offset, item in enumerate(items):
+                item_position = position + offset
+                connection.execute(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        blockchain_name,
+                        stream,
+                        item_position,
+                        item.get("txid"),
+                        item.get("vout"),
+                        item.get("blocktime"),
+                        self.__get_block_height(blockchain_name, item["blockhash"]),
+                        json.dumps(item),
+                    ),
+                )
+                connection.executemany(
+                    "INSERT INTO item_keys VALUES (?, ?, ?, ?)",
+                    [
+                        (blockchain_name, stream, key, item_position)
+                        for key in item.get("keys", [])
+                    ],
+                )
+                # Items are stored in chain order, so the item replaces the one
+                # previously recorded as the latest of each of its keys
+                #
+                connection.executemany(
+                    "INSERT OR REPLACE INTO latest_items VALUES (?, ?, ?, ?)",
+                    [
+                        (blockchain_name, stream, key, item_position)
+                        for key in item.get("keys", [])
+                    ],
+                )
+                connection.executemany(
+                    "INSERT INTO item_publishers VALUES (?, ?, ?, ?)",
+                    [
+                        (blockchain_name, stream, publisher, item_position)
+                        for publisher in item.get("publishers", [])
+                    ],
+                )
+            connection.execute(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?, ?)",
+                (blockchain_name, stream, position + len(items)),
+            )
+
+    def __get_common_position(self, blockchain_name: str, stream: str, position: int):
+        """
+        Returns how many of the position indexed items are still the first items
+        of the stream in chain order. Usually only the last indexed item is
+        compared with the node. If it was orphaned by a reorganization of the
+        chain, windows of doubling size are compared backwards until one starts
+        with an item that is still in place.
+        """
+        end = position
+        window_size = 1
+        while end > 0:
+            start = max(end - window_size, 0)
+            node_items = MultiChainClient.call(
+                blockchain_name,
+                StreamIndex.GET_STREAM_ITEMS_ARG,
+                stream,
+                True,
+                end - start,
+                start,
+                False,
+            )
+            rows = self.__get_connection().execute(
+                "SELECT item FROM items WHERE chain = ? AND stream = ? "
+                + "AND position >= ? AND position < ? ORDER BY position",
+                (blockchain_name, stream, start, end),
+            )
+            offset = 0
+            for row, node_item in zip(rows, node_items):
+                if StreamIndex.__get_item_id(json.loads(row[0])) != (
+                    StreamIndex.__get_item_id(node_item)
+                ):
+                    break
+                offset += 1
+
+            if offset > 0 or start == 0:
+                return start + offset
+            end = start
+            window_size = min(window_size * 2, Config.STREAM_INDEX_PAGE_SIZE)
+        return 0
+
+    def __rollback(self, blockchain_name: str, stream: str, position: int):
+        """
+        Removes the indexed items from position onwards and restores the latest
+        items of their keys from the items that remain
+        """
+        connection = self.__get_connection()
+        with connection:
+            for table in ("items", "item_keys", "item_publishers", "latest_items"):
+                connection.execute(
+                    "DELETE FROM "
+                    + table
+                    + " WHERE chain = ? AND stream = ? AND position >= ?",
+                    (blockchain_name, stream, position),
+                )
+            connection.execute(
+                "INSERT OR IGNORE INTO latest_items "
+                + "SELECT chain, stream, key, MAX(position) FROM item_keys "
+                + "WHERE chain = ? AND stream = ? GROUP BY chain, stream, key",
+                (blockchain_name, stream),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?, ?)",
+                (blockchain_name, stream, position),
+            )
+
+    @staticmethod
+    def __get_item_id(item: dict):
+        """
+        Returns a value that identifies the item and the block it was confirmed in
+        """
+        return item.get("txid"), item.get("vout"), item.get("blockhash")
+
+    def __fill_latest_items(self):
+        """
+        Builds the latest items of the keys of an index created before they were
+        tracked, once. Completion is recorded in the progress table under
+        LATEST_ITEMS_PROGRESS, since items indexed in the meantime may already
+        have latest items.
+        """
+        connection = self.__get_connection()
+        with connection:
+            if (
+                connection.execute(
+                    "SELECT 1 FROM progress WHERE chain = ? AND stream = ?",
+                    StreamIndex.LATEST_ITEMS_PROGRESS,
+                ).fetchone()
+                is not None
+            ):
+                return
+            connection.execute(
+                "INSERT OR REPLACE INTO latest_items "
+                + "SELECT chain, stream, key, MAX(position) "
+                + "FROM item_keys GROUP BY chain, stream, key"
+            )
+            connection.execute(
+                "INSERT INTO progress VALUES (?, ?, 1)",
+                StreamIndex.LATEST_ITEMS_PROGRESS,
+            )
+
+    def __get_position(self, blockchain_name: str, stream: str):
+        row = (
+            self.__get_connection()
+            .execute(
+                "SELECT position FROM progress WHERE chain = ? AND stream = ?",
+                (blockchain_name, stream),
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def __get_block_height(self, blockchain_name: str, block_hash: str):
+        height = self._block_heights.get(block_hash)
+        if height is None:
+            block = MultiChainClient.call(
+                blockchain_name, StreamIndex.GET_BLOCK_ARG, block_hash, 1
+            )
+            height = block["height"]
+            self._block_heights[block_hash] = height
+        return height
+
+    def __get_connection(self):
+        """
+        Returns the SQLite connection of the current thread
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+
+if __name__ == "__main__":
+    # Runs the indexer as its own process so that several server workers can
+    # share one index
+    #
+    logging.basicConfig(level=logging.INFO)
+    StreamIndex().run()
@@ -0,0 +1,239 @@
+import bisect
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+
+def format_labels(labels: dict):
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            name
+            + '="'
+            + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            + '"'
+            for name, value in labels.items()
+        )
+        + "}"
+    )
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Metric:
+    """
+    Base class of the metrics. A metric holds one value per combination of
+    label values, which must be passed in the order of its label names.
+    """
+
+    TYPE = None
+
+    def __init__(self, name: str, description: str, label_names: tuple = ()):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_samples(self):
+        """
+        Returns the (name, labels, value) samples of the metric
+        """
+        with self._lock:
+            return [
+                (self.name, dict(zip(self.label_names, label_values)), value)
+                for label_values, value in sorted(self._values.items())
+            ]
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *label_values, value):
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                # One counter per bucket plus +Inf, then the sum
+                #
+                counts = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[label_values] = counts
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def get_samples(self):
+        samples = []
+        for name, labels, counts in super().get_samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(
+                    (name + "_bucket", dict(labels, le=format_value(bound)), cumulative)
+                )
+            samples.append((name + "_sum", labels, counts[-1]))
+            samples.append((name + "_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of the process and renders them in the Prometheus text
+    format. Collectors are callbacks that return (name, type, description,
+    samples) families computed when the metrics are rendered, for values that
+    are already tracked elsewhere.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, description: str, label_names: tuple = ()):
+        return self.__register(Counter(name, description, label_names))
+
+    def gauge(self, name: str, description: str, label_names: tuple = ()):
+        return self.__register(Gauge(name, description, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        label_names: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        return self.__register(Histogram(name, description, label_names, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        families = [
+            (metric.name, metric.TYPE, metric.description, metric.get_samples())
+            for metric in self._metrics
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, metric_type, description, samples in families:
+            lines.append("# HELP " + name + " " + description)
+            lines.append("# TYPE " + name + " " + metric_type)
+            for sample_name, labels, value in samples:
+                lines.append(
+                    sample_name + format_labels(labels) + " " + format_value(value)
+                )
+        return "\n".join(lines) + "\n"
+
+    def __register(self, metric: Metric):
+        self._metrics.append(metric)
+        return metric
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "talos_http_request_duration_seconds",
+    "Time spent handling API requests",
+    ("route", "method", "status"),
+)
+HTTP_RESPONSE_SIZE = registry.histogram(
+    "talos_http_response_size_bytes",
+    "Size of API response bodies",
+    ("route",),
+    SIZE_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "talos_http_requests_in_flight", "API requests being handled"
+)
+NODE_CALL_DURATION = registry.histogram(
+    "talos_node_call_duration_seconds",
+    "Time spent in MultiChain JSON-RPC calls and commands, by method",
+    ("method",),
+)
+NODE_CALLS_IN_FLIGHT = registry.gauge(
+    "talos_node_calls_in_flight",
+    "MultiChain JSON-RPC calls and commands in progress, by method",
+    ("method",),
+)
+NODE_CALL_ERRORS = registry.counter(
+    "talos_node_call_errors_total",
+    "Failed MultiChain JSON-RPC calls and commands, by method and error code",
+    ("method", "code"),
+)
+NODE_CALL_QUEUE_WAIT = registry.histogram(
+    "talos_node_call_queue_wait_seconds",
+    "Time node calls waited for a call slot of their blockchain",
+    ("blockchain",),
+)
+NODE_CALLS_REJECTED = registry.counter(
+    "talos_node_calls_rejected_total",
+    "Node calls rejected because no call slot freed up in time",
+    ("blockchain",),
+)
+READ_CALLS = registry.counter(
+    "talos_read_calls_total",
+    "Calls of the coalesced read endpoints",
+    ("endpoint",),
+)
+READ_CALLS_COALESCED = registry.counter(
+    "talos_read_calls_coalesced_total",
+    "Calls of the coalesced read endpoints that shared an identical call in flight",
+    ("endpoint",),
+)
@@ -1,11 +1,8 @@
-from subprocess import run, CalledProcessError
-from app.models.exception.multichain_error import MultiChainError
-import json
+from app.models.client.multichain_client import MultiChainClient
 import time
 
 
 class NetworkController:
-    MULTICHAIN_ARG = "multichain-cli"
     GET_PEER_INFO_ARG = "getpeerinfo"
     GET_WALLET_ADDRESSES_ARG = "getaddresses"
     TARGET_DATE_TIME_FORMAT = "%m-%d-%Y %H:%M:%S"
@@ -27,14 +24,9 @@ class NetworkController:
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            args = [
-                NetworkController.MULTICHAIN_ARG,
-                blockchain_name,
-                NetworkController.GET_PEER_INFO_ARG,
-            ]
-            output = run(args, check=True, capture_output=True)
-
-            json_peer_info = json.loads(output.stdout)
+            json_peer_info = MultiChainClient.call(
+                blockchain_name, NetworkController.GET_PEER_INFO_ARG
+            )
 
             # Iterate over each peer and convert the time in seconds since epoch (Jan 1 1970 GMT)
             # to a human readable date and time
@@ -53,8 +45,6 @@ class NetworkController:
                 )
 
             return json_peer_info
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
         except Exception as err:
             raise err
 
@@ -68,21 +58,14 @@ class NetworkController:
             if not blockchain_name:
                 raise ValueError("Blockchain name can't be empty")
 
-            args = [
-                NetworkController.MULTICHAIN_ARG,
-                blockchain_name,
-                NetworkController.GET_WALLET_ADDRESSES_ARG,
-            ]
-            output = run(args, check=True, capture_output=True)
-
-            wallet_addresses = json.loads(output.stdout)
+            wallet_addresses = MultiChainClient.call(
+                blockchain_name, NetworkController.GET_WALLET_ADDRESSES_ARG
+            )
             wallet_address = wallet_addresses[0]
 
             if not wallet_address:
                 raise ValueError("The wallet address is empty")
 
             return wallet_address
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
         except Exception as err:
             raise err
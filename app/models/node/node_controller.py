@@ -1,13 +1,14 @@
-from subprocess import run, CalledProcessError
+from subprocess import CalledProcessError
 import re
+from app.models.client.command_executor import CommandExecutor
+from app.models.client.multichain_client import MultiChainClient
 from app.models.exception.multichain_error import MultiChainError
 
 
 class NodeController:
-    MULTICHAIN_CLI_ARG = ["multichain-cli"]
     MULTICHAIN_D_ARG = ["multichaind"]
-    CONNECT_ARG = ["connect"]
-    GRANT_ARG = ["grant"]
+    CONNECT_ARG = "connect"
+    GRANT_ARG = "grant"
 
     @staticmethod
     def connect_to_admin_node(admin_node_address: str):
@@ -18,7 +19,7 @@ class NodeController:
         """
         cmd = NodeController.MULTICHAIN_D_ARG + [admin_node_address]
         try:
-            output = run(cmd, capture_output=True, check=True)
+            output = CommandExecutor.run(cmd)
             return (
                 re.findall(
                     r"(?<=grant )(.*)(?= connect\\n)", str(output.stdout.strip())
@@ -38,16 +39,11 @@ class NodeController:
         :return:
         """
         try:
-            cmd = (
-                NodeController.MULTICHAIN_CLI_ARG
-                + [blockchain_name]
-                + NodeController.GRANT_ARG
-                + [new_node_wallet_address]
-                + NodeController.CONNECT_ARG
+            return MultiChainClient.call(
+                blockchain_name,
+                NodeController.GRANT_ARG,
+                new_node_wallet_address,
+                NodeController.CONNECT_ARG,
             )
-            output = run(cmd, capture_output=True, check=True)
-            return output.stdout.strip().decode("utf-8")
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
         except Exception as err:
             raise err
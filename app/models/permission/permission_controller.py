@@ -1,10 +1,7 @@
-from subprocess import run, CalledProcessError
-from app.models.exception.multichain_error import MultiChainError
-import json
+from app.models.client.multichain_client import MultiChainClient
 
 
 class PermissionController:
-    MULTICHAIN_ARG = "multichain-cli"
     GRANT_ARG = "grant"
     REVOKE_ARG = "revoke"
     GET_PERMISSION_ARG = "listpermissions"
@@ -58,18 +55,14 @@ class PermissionController:
                     + " does not exist."
                 )
 
-            args = [
-                PermissionController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 PermissionController.GRANT_ARG,
                 ",".join(addresses),
                 ",".join(permissions),
-            ]
-            output = run(args, check=True, capture_output=True)
+            )
 
-            return output.stdout
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output
         except ValueError as err:
             raise err
         except Exception as err:
@@ -103,18 +96,14 @@ class PermissionController:
                     "The permission provided:" + str(permission) + " does not exist."
                 )
 
-            args = [
-                PermissionController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 PermissionController.GRANT_ARG,
                 address,
                 stream_name + "." + permission.lower(),
-            ]
-            output = run(args, check=True, capture_output=True)
+            )
 
-            return output.stdout
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output
         except ValueError as err:
             raise err
         except Exception as err:
@@ -159,19 +148,15 @@ class PermissionController:
                     raise ValueError("The list of addresses is empty")
                 address_selector = ",".join(addresses)
 
-            args = [
-                PermissionController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 PermissionController.GET_PERMISSION_ARG,
                 permission_selector,
                 address_selector,
-                json.dumps(verbose),
-            ]
-            output = run(args, check=True, capture_output=True)
+                verbose,
+            )
 
-            return json.loads(output.stdout)
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output
         except ValueError as err:
             raise err
         except Exception as err:
@@ -211,18 +196,14 @@ class PermissionController:
                     + " does not exist."
                 )
 
-            args = [
-                PermissionController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 PermissionController.REVOKE_ARG,
                 ",".join(addresses),
                 ",".join(permissions),
-            ]
-            output = run(args, check=True, capture_output=True)
+            )
 
-            return output.stdout
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output
         except ValueError as err:
             raise err
         except Exception as err:
@@ -259,18 +240,14 @@ class PermissionController:
                     "The permission provided: " + permission + " does not exist."
                 )
 
-            args = [
-                PermissionController.MULTICHAIN_ARG,
+            output = MultiChainClient.call(
                 blockchain_name,
                 PermissionController.REVOKE_ARG,
                 address,
                 stream_name + "." + permission.lower(),
-            ]
-            output = run(args, check=True, capture_output=True)
+            )
 
-            return output.stdout
-        except CalledProcessError as err:
-            raise MultiChainError(err.stderr)
+            return output
         except ValueError as err:
             raise err
         except Exception as err:
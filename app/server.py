@@ -0,0 +1,68 @@
+from gunicorn.app.base import BaseApplication
+
+from app import app
+from app.config import Config
+from app.models.client.command_executor import CommandExecutor
+from app.models.client.multichain_client import MultiChainClient
+from app.models.data.data_controller import DataController
+
+
+def post_fork(server, worker):
+    """
+    Runs in every worker right after it has been forked from the master, which
+    already imported the app. The stream indexer is started by the worker that
+    holds the index lock, and by its replacement if that worker exits.
+    """
+    MultiChainClient.after_fork()
+    CommandExecutor.after_fork()
+    stream_index = DataController.get_stream_index()
+    if stream_index is not None:
+        stream_index.after_fork()
+        if not Config.STREAM_INDEX_EXTERNAL and stream_index.try_lock():
+            stream_index.start()
+
+
+class TalosServer(BaseApplication):
+    """
+    Serves the app with a pre-forking gunicorn server. The app is imported once
+    in the master before the workers are forked, and on SIGTERM workers finish
+    their in-flight requests for up to the graceful timeout before exiting.
+    """
+
+    def __init__(self, application, options: dict):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def get_options():
+    """
+    Returns the gunicorn settings built from the server configuration
+    """
+    return {
+        "bind": Config.SERVER_BIND,
+        "workers": Config.SERVER_WORKERS,
+        "threads": Config.SERVER_THREADS,
+        "worker_class": "gthread" if Config.SERVER_THREADS > 1 else "sync",
+        "backlog": Config.SERVER_BACKLOG,
+        "timeout": Config.SERVER_TIMEOUT,
+        "graceful_timeout": Config.SERVER_GRACEFUL_TIMEOUT,
+        "keepalive": Config.SERVER_KEEPALIVE,
+        "preload_app": True,
+        "post_fork": post_fork,
+    }
+
+
+def main():
+    TalosServer(app, get_options()).run()
+
+
+if __name__ == "__main__":
+    main()
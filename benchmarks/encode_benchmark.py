@@ -0,0 +1,75 @@
+"""
+Compares the time taken to encode get_stream_items responses and the size of the
+encoded payloads, for flask_restplus's default JSON encoding and for each encoder
+of ResponseEncoder that is installed.
+
+    python3 -m benchmarks.encode_benchmark --items 10 100 1000 --item-size 300
+"""
+
+import argparse
+import json
+import timeit
+
+from app.models.encoding.response_encoder import (
+    ResponseEncoder,
+    dumps_json,
+    dumps_orjson,
+    dumps_ujson,
+    orjson,
+    ujson,
+)
+from benchmarks.fake_node import FakeNode
+
+
+def dumps_default(data):
+    """
+    Encodes data the way flask_restplus does without ResponseEncoder
+    """
+    return (json.dumps(data) + "\n").encode()
+
+
+def get_encoders():
+    encoders = [("json (flask_restplus default)", dumps_default), ("json", dumps_json)]
+    if ujson is not None:
+        encoders.append(("ujson", dumps_ujson))
+    if orjson is not None:
+        encoders.append(("orjson", dumps_orjson))
+    encoders.append(("msgpack", ResponseEncoder.dumps_msgpack))
+    return encoders
+
+
+def measure(encode, data, min_time: float = 0.5):
+    """
+    Returns the mean time in seconds encode takes on data, and the encoded size
+    """
+    timer = timeit.Timer(lambda: encode(data))
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return elapsed / number, len(encode(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--item-size", type=int, default=300)
+    args = parser.parse_args()
+
+    print("| Items | Encoder | Encode time | Size | Time vs default |")
+    print("| --- | --- | --- | --- | --- |")
+    for items in args.items:
+        data = FakeNode(items, args.item_size, 0).items
+        baseline = None
+        for name, encode in get_encoders():
+            duration, size = measure(encode, data)
+            baseline = baseline or duration
+            print(
+                "| {} | {} | {:.1f} us | {:,} B | {:.2f}x |".format(
+                    items, name, duration * 1e6, size, duration / baseline
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
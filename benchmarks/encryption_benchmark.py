@@ -0,0 +1,121 @@
+"""
+Measures how many items per second EncrytpionController encrypts as the number
+of recipients grows, for recipients whose public keys are already in the key
+cache and for recipients seen for the first time, and with the group key of the
+recipients, how many items per second a recipient decrypts, and the size of the
+published items.
+
+    python3 -m benchmarks.encryption_benchmark --recipients 1 10 50 200 --item-size 300
+"""
+
+import argparse
+import json
+import time
+
+from app.models.encryption.encryption_controller import EncrytpionController
+from app.models.encryption.group_key_data import GroupKeyData
+
+
+def measure(function, min_time: float = 1.0):
+    """
+    Returns how many times per second function runs
+    """
+    runs = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - started
+    return runs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--item-size", type=int, default=300)
+    args = parser.parse_args()
+
+    publisher = EncrytpionController()
+    data = "x" * args.item_size
+
+    print(
+        "| Recipients | Encrypt, new recipients | Encrypt, cached recipients "
+        "| Encrypt, group key | Decrypt | Decrypt, group key | Item size "
+        "| Item size, group key |"
+    )
+    print("| --- | --- | --- | --- | --- | --- | --- | --- |")
+    for recipient_count in args.recipients:
+        key_pairs = [
+            publisher.generate_asymetric_key_pair() for _ in range(recipient_count)
+        ]
+        public_keys = [key_pair.get_public_key() for key_pair in key_pairs]
+
+        # Keys of new recipients are generated outside of the timed calls, a
+        # batch at a time
+        #
+        new_public_keys = []
+
+        def encrypt_for_new_recipients():
+            if not new_public_keys:
+                new_public_keys.extend(
+                    publisher.generate_asymetric_key_pair().get_public_key()
+                    for _ in range(recipient_count * 64)
+                )
+            recipients = new_public_keys[-recipient_count:]
+            del new_public_keys[-recipient_count:]
+            started = time.perf_counter()
+            publisher.encrypt_data(data, recipients)
+            return time.perf_counter() - started
+
+        new_elapsed = 0.0
+        new_runs = 0
+        while new_elapsed < 1.0:
+            new_elapsed += encrypt_for_new_recipients()
+            new_runs += 1
+
+        cached = measure(lambda: publisher.encrypt_data(data, public_keys))
+
+        # The group key is created once per recipient set, so only the
+        # encryption of the data itself is timed
+        #
+        group_key, _ = publisher.generate_group_key(public_keys)
+        grouped = measure(lambda: publisher.encrypt_data_with_key(data, group_key))
+        group_key_data = GroupKeyData(
+            "0" * 32, "keys", publisher.encrypt_data_with_key(data, group_key)
+        )
+
+        reader = EncrytpionController(key_pairs[0].get_private_key())
+        key_data = publisher.encrypt_data(data, public_keys)
+        enc_symmetric_key = key_data.get_public_key_symmetric_key_map()[
+            public_keys[0]
+        ]
+        decrypted = measure(
+            lambda: reader.decrypt_data(
+                key_data.get_encypted_data(), enc_symmetric_key
+            )
+        )
+        decrypted_grouped = measure(
+            lambda: reader.decrypt_data_with_key(
+                group_key_data.get_encypted_data(), group_key
+            )
+        )
+
+        print(
+            "| %d | %.0f items/s | %.0f items/s | %.0f items/s | %.0f items/s "
+            "| %.0f items/s | %d bytes | %d bytes |"
+            % (
+                recipient_count,
+                new_runs / new_elapsed,
+                cached,
+                grouped,
+                decrypted,
+                decrypted_grouped,
+                len(json.dumps(key_data.to_dict())),
+                len(json.dumps(group_key_data.to_dict())),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
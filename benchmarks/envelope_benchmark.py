@@ -0,0 +1,75 @@
+"""
+Compares the size of encrypted items and the time it takes to encode and decode
+them as JSON KeyData and as binary envelopes, as the number of recipients grows.
+Decoding includes looking up the sealed key of a recipient.
+
+    python3 -m benchmarks.envelope_benchmark --recipients 1 10 50 200 --item-size 300
+"""
+
+import argparse
+import json
+
+from app.models.encryption.encryption_controller import EncrytpionController
+from app.models.encryption.envelope import Envelope
+from app.models.encryption.key_data import KeyData
+from benchmarks.encryption_benchmark import measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--item-size", type=int, default=300)
+    args = parser.parse_args()
+
+    publisher = EncrytpionController()
+    data = "x" * args.item_size
+
+    print(
+        "| Recipients | JSON size | Envelope size | Envelope hex size "
+        "| JSON encode | Envelope encode | JSON decode | Envelope decode |"
+    )
+    print("| --- | --- | --- | --- | --- | --- | --- | --- |")
+    for recipient_count in args.recipients:
+        public_keys = [
+            publisher.generate_asymetric_key_pair().get_public_key().decode()
+            for _ in range(recipient_count)
+        ]
+        key_data = publisher.encrypt_data(data, public_keys, include_user=False)
+        reader_public_key = public_keys[-1]
+        reader_fingerprint = Envelope.get_fingerprint(reader_public_key)
+
+        json_text = json.dumps(key_data.to_dict())
+        envelope = Envelope.encode(key_data)
+        envelope_hex = envelope.hex()
+
+        json_encode = measure(lambda: json.dumps(key_data.to_dict()))
+        envelope_encode = measure(lambda: Envelope.encode(key_data).hex())
+        json_decode = measure(
+            lambda: KeyData.from_dict(json.loads(json_text))
+            .get_public_key_symmetric_key_map()
+            .get(reader_public_key)
+        )
+        envelope_decode = measure(
+            lambda: Envelope.decode_hex(envelope_hex)
+            .get_public_key_symmetric_key_map()
+            .get(reader_fingerprint)
+        )
+
+        print(
+            "| %d | %d bytes | %d bytes | %d bytes | %.1f µs | %.1f µs | %.1f µs "
+            "| %.1f µs |"
+            % (
+                recipient_count,
+                len(json_text),
+                len(envelope),
+                len(envelope_hex),
+                1e6 / json_encode,
+                1e6 / envelope_encode,
+                1e6 / json_decode,
+                1e6 / envelope_decode,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Stand-in for multichaind that answers the JSON-RPC methods used by the server
+with canned responses of configurable size and latency, so the server can be
+benchmarked without a MultiChain install.
+
+    python3 -m benchmarks.fake_node --data-dir /tmp/talos --items 10 --item-size 300
+"""
+
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAIN_NAME = "bench"
+STREAM_NAME = "stream1"
+RPC_USER = "bench"
+RPC_PASSWORD = "bench"
+ADDRESS = "1BenchAddressXXXXXXXXXXXXXXXXXXXXXXX"
+TXID = "ab" * 32
+BLOCK_HASH = "cd" * 32
+BLOCK_COUNT = 1000
+NETWORK_PORT = 7447
+
+
+class FakeNode:
+    """
+    Builds the canned responses once, sized by the number of items returned by
+    list calls and the size of each item's data
+    """
+
+    def __init__(self, items: int, item_size: int, latency_ms: float):
+        self.latency = latency_ms / 1000.0
+        now = int(time.time())
+        self.items = [
+            {
+                "publishers": [ADDRESS],
+                "keys": ["key" + str(index % 10)],
+                "offchain": False,
+                "available": True,
+                "data": {"json": {"value": "x" * item_size}},
+                "confirmations": BLOCK_COUNT - index,
+                "blockhash": BLOCK_HASH,
+                "blockindex": 0,
+                "blocktime": now - items + index,
+                "txid": TXID,
+                "vout": 0,
+                "valid": True,
+                "time": now - items + index,
+                "timereceived": now - items + index,
+            }
+            for index in range(items)
+        ]
+        self.stream = {
+            "name": STREAM_NAME,
+            "createtxid": TXID,
+            "streamref": "53-265-45994",
+            "open": True,
+            "details": {},
+            "subscribed": True,
+            "synchronized": True,
+            "items": items,
+            "confirmed": items,
+            "keys": 10,
+            "publishers": 1,
+        }
+        self.peers = [
+            {
+                "id": index,
+                "addr": "10.0.0." + str(index + 2) + ":" + str(NETWORK_PORT),
+                "addrlocal": "10.0.0.1:" + str(NETWORK_PORT),
+                "services": "0000000000000001",
+                "lastsend": now,
+                "lastrecv": now,
+                "bytessent": 1024,
+                "bytesrecv": 2048,
+                "conntime": now - 3600,
+                "timeoffset": 0,
+                "pingtime": 0.001,
+                "version": 70002,
+                "subver": "/MultiChain:0.2.0.6/",
+                "handshakelocal": ADDRESS,
+                "handshake": ADDRESS,
+                "inbound": False,
+                "startingheight": BLOCK_COUNT,
+                "banscore": 0,
+                "synced_headers": BLOCK_COUNT,
+                "synced_blocks": BLOCK_COUNT,
+            }
+            for index in range(max(1, items // 10))
+        ]
+        self.permissions = [
+            {
+                "address": ADDRESS,
+                "for": None,
+                "type": permission,
+                "startblock": 0,
+                "endblock": 4294967295,
+            }
+            for permission in (
+                "connect",
+                "send",
+                "receive",
+                "issue",
+                "create",
+                "mine",
+                "activate",
+                "admin",
+            )
+        ]
+        self.handlers = {
+            "addnode": lambda *params: None,
+            "create": lambda *params: TXID,
+            "getaddresses": lambda *params: [ADDRESS],
+            "getbestblockhash": lambda *params: BLOCK_HASH,
+            "getblock": lambda *params: {"hash": BLOCK_HASH, "height": BLOCK_COUNT},
+            "getblockcount": lambda *params: BLOCK_COUNT,
+            "getmempoolinfo": lambda *params: {"size": 0, "bytes": 0},
+            "getnetworkinfo": lambda *params: {
+                "localaddresses": [{"address": "10.0.0.1", "port": NETWORK_PORT}]
+            },
+            "getpeerinfo": lambda *params: self.peers,
+            "grant": lambda *params: TXID,
+            "listpermissions": lambda *params: self.permissions,
+            "liststreamitems": self.list_items,
+            "liststreamkeyitems": self.list_items,
+            "liststreamkeys": lambda *params: [
+                {"key": "key" + str(index), "items": 1, "confirmed": 1}
+                for index in range(10)
+            ],
+            "liststreampublisheritems": self.list_items,
+            "liststreampublishers": lambda *params: [
+                {"publisher": ADDRESS, "items": len(self.items), "confirmed": 0}
+            ],
+            "liststreamqueryitems": lambda *params: self.items,
+            "liststreams": lambda *params: [self.stream],
+            "publish": lambda *params: TXID,
+            "publishmulti": lambda *params: TXID,
+            "revoke": lambda *params: TXID,
+            "subscribe": lambda *params: None,
+            "unsubscribe": lambda *params: None,
+        }
+
+    def list_items(self, *params):
+        """
+        Returns the last count items, count being the third parameter of the
+        liststream*items methods
+        """
+        count = params[2] if len(params) > 2 else len(self.items)
+        return self.items[-count:] if count > 0 else []
+
+    def call(self, method: str, params: list):
+        """
+        Returns the body of the JSON-RPC response to a request
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        handler = self.handlers.get(method)
+        if handler is None:
+            return {
+                "result": None,
+                "error": {"code": -32601, "message": "Method not found"},
+            }
+        return {"result": handler(*params), "error": None}
+
+
+def write_chain_files(data_dir: str, port: int):
+    """
+    Writes the multichain.conf and params.dat files the server reads to find
+    the node of the fake chain
+    """
+    chain_dir = os.path.join(data_dir, CHAIN_NAME)
+    os.makedirs(chain_dir, exist_ok=True)
+    with open(os.path.join(chain_dir, "multichain.conf"), "w") as conf:
+        conf.write(
+            "rpcuser="
+            + RPC_USER
+            + "\nrpcpassword="
+            + RPC_PASSWORD
+            + "\nrpcport="
+            + str(port)
+            + "\n"
+        )
+    with open(os.path.join(chain_dir, "params.dat"), "w") as params:
+        params.write(
+            "default-network-port = "
+            + str(NETWORK_PORT)
+            + "\ndefault-rpc-port = "
+            + str(port)
+            + "\n"
+        )
+
+
+def create_server(node: FakeNode, host: str = "127.0.0.1", port: int = 0):
+    class RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            response = node.call(request["method"], request.get("params", []))
+            response["id"] = request.get("id")
+            body = json.dumps(response).encode()
+            status = 200 if response["error"] is None else 500
+
+            # Headers and body go out in a single write so that the client
+            # doesn't wait on Nagle's algorithm for the second segment
+            #
+            self.wfile.write(
+                (
+                    "HTTP/1.1 "
+                    + str(status)
+                    + " "
+                    + self.responses[status][0]
+                    + "\r\n"
+                    + "Content-Type: application/json\r\n"
+                    + "Content-Length: "
+                    + str(len(body))
+                    + "\r\n\r\n"
+                ).encode()
+                + body
+            )
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--item-size", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = create_server(
+        FakeNode(args.items, args.item_size, args.latency_ms), port=args.port
+    )
+    write_chain_files(args.data_dir, server.server_address[1])
+    print(server.server_address[1], flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Sends requests to a running server from several threads for a fixed
+duration and reports throughput and latency percentiles.
+
+    python3 -m benchmarks.load_test "http://127.0.0.1:5000/api/..." -c 32 -d 30
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values: list, fraction: float):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def run_load_test(
+    url: str, concurrency: int, duration: float, method: str = "GET", body=None
+):
+    """
+    Returns the number of requests per second, the p50 and p99 latencies in
+    milliseconds and the number of failed requests. A body is sent as JSON.
+    """
+    parts = urlsplit(url)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    headers = {}
+    if body is not None:
+        body = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    deadline = time.monotonic() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        own_latencies = []
+        own_errors = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    own_errors += 1
+            except (OSError, http.client.HTTPException):
+                own_errors += 1
+                connection.close()
+                continue
+            own_latencies.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("url")
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-d", "--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    result = run_load_test(args.url, args.concurrency, args.duration)
+    print(
+        "{requests_per_second:.1f} req/s  p50 {p50_ms:.1f} ms  "
+        "p99 {p99_ms:.1f} ms  errors {errors}".format(**result)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Starts a fake node and the production server, then load-tests endpoints of every API
+namespace and reports requests/s, p50/p99 latency and the peak RSS of the
+server. No MultiChain install is needed.
+
+    python3 -m benchmarks.run_benchmarks -c 16 -d 10 --items 100 --latency-ms 1
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_node import ADDRESS, CHAIN_NAME, STREAM_NAME
+from benchmarks.load_test import run_load_test
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIN_DIR = os.path.join(ROOT_DIR, "benchmarks", "bin")
+
+# (namespace, method, path, JSON body)
+#
+BENCHMARKS = [
+    ("configuration", "GET", "/api/configuration/get_blockchains", None),
+    (
+        "configuration",
+        "GET",
+        "/api/configuration/get_node_address?blockchainName=" + CHAIN_NAME,
+        None,
+    ),
+    (
+        "data",
+        "GET",
+        "/api/data/get_stream_items?blockchainName="
+        + CHAIN_NAME
+        + "&streamName="
+        + STREAM_NAME,
+        None,
+    ),
+    (
+        "data",
+        "GET",
+        "/api/data/get_items_by_key?blockchainName="
+        + CHAIN_NAME
+        + "&streamName="
+        + STREAM_NAME
+        + "&key=key1",
+        None,
+    ),
+    (
+        "data",
+        "POST",
+        "/api/data/publish_item",
+        {
+            "blockchainName": CHAIN_NAME,
+            "streamName": STREAM_NAME,
+            "keys": ["key1"],
+            "data": "benchmark",
+        },
+    ),
+    (
+        "data_streams",
+        "GET",
+        "/api/data_streams/get_streams?blockchainName=" + CHAIN_NAME,
+        None,
+    ),
+    (
+        "permissions",
+        "GET",
+        "/api/permissions/get_permissions?blockchainName=" + CHAIN_NAME,
+        None,
+    ),
+    (
+        "permissions",
+        "POST",
+        "/api/permissions/grant_global_permission",
+        {
+            "blockchainName": CHAIN_NAME,
+            "addresses": [ADDRESS],
+            "permissions": ["send", "receive"],
+        },
+    ),
+    ("network", "GET", "/api/network/get_peer_info?blockchainName=" + CHAIN_NAME, None),
+    (
+        "network",
+        "GET",
+        "/api/network/get_wallet_address?blockchainName=" + CHAIN_NAME,
+        None,
+    ),
+    (
+        "nodes",
+        "POST",
+        "/api/nodes/add_node",
+        {"blockchainName": CHAIN_NAME, "newNodeAddress": ADDRESS},
+    ),
+    (
+        "nodes",
+        "POST",
+        "/api/nodes/connect_to_admin_node",
+        {"adminNodeAddress": CHAIN_NAME + "@127.0.0.1:7447"},
+    ),
+]
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("The server didn't start listening on port " + str(port))
+
+
+def get_process_tree(pid: int):
+    """
+    Returns the pid of a process and of all its descendants
+    """
+    pids = [pid]
+    for child_pid in pids:
+        try:
+            with open(
+                "/proc/" + str(child_pid) + "/task/" + str(child_pid) + "/children"
+            ) as children:
+                pids.extend(int(child) for child in children.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def get_peak_rss_mb(pid: int):
+    """
+    Returns the largest peak resident set size of a process and its descendants
+    in megabytes, as reported by /proc/<pid>/status
+    """
+    peak = 0
+    for process_pid in get_process_tree(pid):
+        try:
+            with open("/proc/" + str(process_pid) + "/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        peak = max(peak, int(line.split()[1]))
+        except OSError:
+            continue
+    return peak / 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=10)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--item-size", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument(
+        "--namespace", action="append", help="only run the benchmarks of a namespace"
+    )
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="talos-bench-")
+    node = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_node",
+            "--data-dir",
+            data_dir,
+            "--items",
+            str(args.items),
+            "--item-size",
+            str(args.item_size),
+            "--latency-ms",
+            str(args.latency_ms),
+        ],
+        cwd=ROOT_DIR,
+        stdout=subprocess.PIPE,
+    )
+    node.stdout.readline()
+
+    port = get_free_port()
+    environment = dict(
+        os.environ,
+        PATH=BIN_DIR + os.pathsep + os.environ.get("PATH", ""),
+        TALOS_MULTICHAIN_DATA_DIR=data_dir,
+        TALOS_SERVER_BIND="127.0.0.1:" + str(port),
+        TALOS_STREAM_CACHE_ENABLED="false",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server"],
+        cwd=ROOT_DIR,
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        wait_for_port(port)
+        print(
+            "{:<14} {:<6} {:<44} {:>8} {:>9} {:>9} {:>7} {:>9}".format(
+                "namespace",
+                "method",
+                "endpoint",
+                "req/s",
+                "p50 ms",
+                "p99 ms",
+                "errors",
+                "RSS MB",
+            )
+        )
+        for namespace, method, path, body in BENCHMARKS:
+            if args.namespace and namespace not in args.namespace:
+                continue
+            result = run_load_test(
+                "http://127.0.0.1:" + str(port) + path,
+                args.concurrency,
+                args.duration,
+                method,
+                body,
+            )
+            print(
+                "{:<14} {:<6} {:<44} {requests_per_second:>8.1f} {p50_ms:>9.1f} "
+                "{p99_ms:>9.1f} {errors:>7} {:>9.1f}".format(
+                    namespace,
+                    method,
+                    path.split("?")[0],
+                    get_peak_rss_mb(server.pid),
+                    **result
+                ),
+                flush=True,
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        node.terminate()
+        node.wait()
+
+
+if __name__ == "__main__":
+    main()
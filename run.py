@@ -1,3 +1,8 @@
-from app import app
+from app import app, start_stream_index
 
-app.run(debug=True)
+# Decryption workers import this module again when they start, so the server is
+# only started when it's run as a script
+#
+if __name__ == "__main__":
+    start_stream_index()
+    app.run(debug=True)